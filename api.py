@@ -0,0 +1,159 @@
+"""
+Servicio HTTP local para consultar documentos uno a uno desde otros sistemas.
+
+Rutas
+-----
+GET  /salud
+    Estado del servicio y micro-lotes despachados por fuente.
+GET  /fuentes
+    Fuentes disponibles.
+GET  /consulta?documento=123&fuente=Lista OFAC (SDN)&fuente=...
+POST /consulta   {"documento": "123", "fuentes": ["ofac", "Morosidad Judicial"]}
+    Filas de resultado del documento en cada fuente. Sin fuentes, se
+    consultan todas. Las fuentes admiten el nombre exacto o una parte única.
+
+Las consultas que llegan a una misma fuente dentro de una ventana corta se
+resuelven juntas (`utils.micro_batch`), así que muchas consultas por segundo
+aprovechan las sesiones HTTP compartidas de los scrapers de red. Las listas
+OFAC y UE comparten un único micro-lote que se resuelve contra ambas en una
+sola pasada del índice unificado de sanciones.
+
+Uso::
+
+    python api.py --host 127.0.0.1 --port 8080
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Dict, List
+
+from aiohttp import web
+
+from cli import resolve_source
+from config.scrappers_config import SCRAPERS
+from scrappers import SCRAPER_CLASSES
+from utils.checker_registry import start_watcher
+from utils.micro_batch import DEFAULT_MAX_LOTE, DEFAULT_VENTANA, MicroBatcher, SanctionsBatcher
+from utils.sanctions_screening import is_indexable
+
+BATCHERS = web.AppKey("batchers", Dict[str, MicroBatcher])
+
+
+def available_sources() -> List[str]:
+    """Fuentes con configuración e implementación."""
+    return [nombre for nombre in SCRAPERS if nombre in SCRAPER_CLASSES]
+
+
+def _error(status: int, mensaje: str) -> web.Response:
+    return web.json_response({"error": mensaje}, status=status)
+
+
+async def salud(request: web.Request) -> web.Response:
+    batchers = {b.fuente: b for b in request.app[BATCHERS].values()}
+    return web.json_response({
+        "estado": "ok",
+        "fuentes": {
+            nombre: {"consultas": b.consultas, "lotes": b.lotes} for nombre, b in batchers.items()
+        },
+    })
+
+
+async def fuentes(request: web.Request) -> web.Response:
+    return web.json_response({"fuentes": available_sources()})
+
+
+async def consulta(request: web.Request) -> web.Response:
+    if request.method == "POST":
+        try:
+            cuerpo = await request.json()
+        except ValueError:
+            cuerpo = None
+        if not isinstance(cuerpo, dict):
+            return _error(400, "El cuerpo debe ser un objeto JSON.")
+        documento = cuerpo.get("documento")
+        pedidas = cuerpo.get("fuentes") or []
+    else:
+        documento = request.query.get("documento")
+        pedidas = request.query.getall("fuente", [])
+
+    if documento is None or not str(documento).strip():
+        return _error(400, "Falta el parámetro 'documento'.")
+    try:
+        nombres = list(dict.fromkeys(resolve_source(f) for f in pedidas)) or available_sources()
+    except ValueError as e:
+        return _error(404, str(e))
+
+    # Las fuentes que comparten micro-lote (OFAC y UE) se piden una sola vez.
+    grupos: Dict[int, tuple] = {}
+    for nombre in nombres:
+        batcher = request.app[BATCHERS][nombre]
+        grupos.setdefault(id(batcher), (batcher, []))[1].append(nombre)
+    salidas = await asyncio.gather(
+        *(batcher.submit(str(documento)) for batcher, _ in grupos.values()), return_exceptions=True
+    )
+    resultados, errores = {}, {}
+    for (_, del_grupo), salida in zip(grupos.values(), salidas):
+        for nombre in del_grupo:
+            if isinstance(salida, Exception):
+                errores[nombre] = f"{type(salida).__name__} - {salida}"
+            else:
+                resultados[nombre] = salida.get(nombre, [])
+    respuesta = {"documento": str(documento).strip(), "resultados": resultados}
+    if errores:
+        respuesta["errores"] = errores
+    return web.json_response(respuesta, status=502 if not resultados else 200)
+
+
+async def _close_batchers(app: web.Application) -> None:
+    """Cancela los micro-lotes en curso al apagar el servicio."""
+    for batcher in {id(b): b for b in app[BATCHERS].values()}.values():
+        await batcher.aclose()
+
+
+def create_app(ventana: float = DEFAULT_VENTANA, max_lote: int = DEFAULT_MAX_LOTE) -> web.Application:
+    """
+    Arma la aplicación aiohttp con un `MicroBatcher` por fuente de red y un
+    `SanctionsBatcher` compartido por las listas de sanciones.
+
+    Parameters
+    ----------
+    ventana : float
+        Segundos de espera para agrupar consultas de una misma fuente.
+    max_lote : int
+        Tamaño con el que un lote se despacha sin esperar la ventana.
+    """
+    app = web.Application()
+    sanciones = [nombre for nombre in available_sources() if is_indexable(nombre)]
+    compartido = SanctionsBatcher(sanciones, ventana, max_lote)
+    app[BATCHERS] = {
+        nombre: compartido if nombre in sanciones else MicroBatcher(nombre, ventana, max_lote)
+        for nombre in available_sources()
+    }
+    app.on_cleanup.append(_close_batchers)
+    app.router.add_get("/salud", salud)
+    app.router.add_get("/fuentes", fuentes)
+    app.router.add_get("/consulta", consulta)
+    app.router.add_post("/consulta", consulta)
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="API HTTP local de consulta de documentos de KnowMe.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--ventana-ms", type=float, default=DEFAULT_VENTANA * 1000,
+                        help="Milisegundos para agrupar consultas en un micro-lote.")
+    parser.add_argument("--max-lote", type=int, default=DEFAULT_MAX_LOTE,
+                        help="Documentos con los que un micro-lote se despacha sin esperar.")
+    args = parser.parse_args()
+
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger().setLevel(logging.WARNING)
+    # Recarga en segundo plano las listas OFAC/UE cuando cambian sus archivos.
+    start_watcher()
+    web.run_app(create_app(args.ventana_ms / 1000, args.max_lote), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,8 @@
-import asyncio
-from time import perf_counter
+import os
+import time
+from datetime import datetime
 import pandas as pd
 import streamlit as st
-import inspect
-import traceback
 
 # --- Asunciones sobre tus módulos ---
 # Asegúrate de que estas importaciones sean correctas y los archivos/directorios existan.
@@ -11,8 +10,15 @@ import traceback
 from config.scrappers_config import SCRAPERS
 from scrappers import SCRAPER_CLASSES
 from utils.data_loader import load_data
+from utils.jobs import COMPLETADO, ESTADOS_REANUDABLES, get_job_manager
+from utils.multi_source import MODULO_COMBINADO
+from utils.result_sink import FORMATOS, read_preview
+from utils.checker_registry import invalidate, start_watcher
 from auth.auth import login, logout, register_user
 
+# Segundos entre consultas del estado de un trabajo en curso.
+JOB_POLL_SECONDS = 1.0
+
 # --- Configuración de la Página de Streamlit ---
 st.set_page_config(
     page_title="KnowMe",
@@ -69,6 +75,9 @@ def _display_sidebar():
                 st.subheader("🛠️ Panel de Admin")
                 with st.expander("🧾 Registrar Nuevo Usuario"):
                     register_user()
+                if st.button("🔄 Recargar listas de sanciones", use_container_width=True):
+                    n = invalidate()
+                    st.success(f"Se descartaron {n} verificadores en caché; se recargarán en la próxima consulta.")
         
         st.markdown("---")
         if st.button("🚪 Cerrar Sesión", use_container_width=True):
@@ -120,6 +129,15 @@ def show_module_selection():
                     st.session_state['selected_module'] = name
                     st.rerun()
 
+    # --- Consulta combinada: varias fuentes sobre un mismo archivo ---
+    st.markdown("---")
+    with st.container(border=True):
+        st.markdown(f"### <i class='fas fa-layer-group'></i> {MODULO_COMBINADO}", unsafe_allow_html=True)
+        st.markdown("Consulta varios módulos a la vez con un solo archivo y obtén un único reporte por documento.")
+        if st.button("Abrir Módulo", key="btn_combinada", use_container_width=True):
+            st.session_state['selected_module'] = MODULO_COMBINADO
+            st.rerun()
+
 def show_scraper_page(scraper_name):
     """Muestra la página dedicada a un módulo de scraper individual."""
     _display_sidebar()
@@ -140,95 +158,175 @@ def show_scraper_page(scraper_name):
 
     if not uploaded_file:
         st.info("ℹ️ Por favor, sube un archivo para continuar.")
+        # Los trabajos enviados antes siguen visibles aunque no haya archivo cargado.
+        _show_jobs_section(scraper_name)
         st.stop()
 
+    # Las listas de sanciones también admiten búsqueda difusa por nombre.
+    modo = "Documento"
+    if hasattr(SCRAPER_CLASSES.get(scraper_name), "screen_names"):
+        modo = st.radio("🔎 **Tipo de búsqueda**", ["Documento", "Nombre"], horizontal=True)
+
+    nuips = _read_single_column(uploaded_file, modo)
+
+    formato = st.radio("💾 **Formato de descarga**", ["CSV", "Parquet"], horizontal=True)
+
+    st.markdown("---")
+    if st.button(f"🚀 Iniciar Consulta en {scraper_name}", type="primary", use_container_width=True):
+        # La consulta corre en segundo plano: sobrevive a reruns y pestañas cerradas.
+        job = get_job_manager().submit(scraper_name, nuips, modo, formato.lower(), st.session_state.get("user"))
+        st.session_state.setdefault("jobs", {})[scraper_name] = job.id
+        st.rerun()
+
+    _show_jobs_section(scraper_name)
+
+
+def show_multi_source_page():
+    """Página de la consulta combinada: varias fuentes sobre un mismo archivo."""
+    _display_sidebar()
+
+    st.title(f"🧩 {MODULO_COMBINADO}")
+    st.markdown("Sube un archivo y elige las fuentes: se consultan a la vez y el resultado es un único reporte por documento.")
+    st.markdown("---")
+
+    if st.button("⬅️ Volver al Menú de Módulos"):
+        st.session_state['selected_module'] = None
+        st.rerun()
+
+    fuentes = st.multiselect(
+        "🔗 **Fuentes a consultar**",
+        [nombre for nombre in SCRAPERS if nombre in SCRAPER_CLASSES],
+        default=[nombre for nombre in SCRAPERS if nombre in SCRAPER_CLASSES],
+    )
+
+    uploaded_file = st.file_uploader(
+        "📂 **Sube tu archivo (CSV o XLSX)**",
+        type=["csv", "xlsx"],
+        help="El archivo debe contener una única columna con los números de documento."
+    )
+
+    if not uploaded_file:
+        st.info("ℹ️ Por favor, sube un archivo para continuar.")
+        _show_jobs_section(MODULO_COMBINADO)
+        st.stop()
+
+    nuips = _read_single_column(uploaded_file, "Documento")
+    formato = st.radio("💾 **Formato de descarga**", ["CSV", "Parquet"], horizontal=True)
+
+    st.markdown("---")
+    if st.button(f"🚀 Consultar {len(fuentes)} fuentes", type="primary", use_container_width=True, disabled=not fuentes):
+        job = get_job_manager().submit(
+            MODULO_COMBINADO, nuips, formato=formato.lower(), usuario=st.session_state.get("user"), fuentes=fuentes,
+        )
+        st.session_state.setdefault("jobs", {})[MODULO_COMBINADO] = job.id
+        st.rerun()
+
+    _show_jobs_section(MODULO_COMBINADO)
+
+
+def _read_single_column(uploaded_file, columna):
+    """Lee el archivo cargado, valida que tenga una sola columna y la devuelve como lista de textos."""
     df_base = load_data(uploaded_file)
     if df_base is None or df_base.shape[1] != 1:
         st.error("❌ **Error:** El archivo debe tener exactamente UNA columna. Verifica el formato.")
         st.stop()
 
-    df_base.columns = ["Documento"]
+    df_base.columns = [columna]
     try:
-        df_base["Documento"] = df_base["Documento"].astype(str)
+        df_base[columna] = df_base[columna].astype(str)
     except Exception as e:
-        st.error(f"❌ Error al procesar la columna 'Documento': {e}")
+        st.error(f"❌ Error al procesar la columna '{columna}': {e}")
         st.stop()
-        
-    nuips = df_base["Documento"].tolist()
 
+    return df_base[columna].tolist()
+
+
+def _show_jobs_section(scraper_name):
+    """Historial de trabajos del módulo y el trabajo seleccionado en esta sesión."""
+    manager = get_job_manager()
+    _show_job_history(manager, scraper_name)
+    job = manager.get(st.session_state.get("jobs", {}).get(scraper_name, ""))
+    if job is None:
+        # Sin trabajo elegido, se muestra el más reciente del usuario en el módulo.
+        recientes = manager.list(st.session_state.get("user"), scraper_name)
+        job = recientes[0] if recientes else None
+    if job is not None:
+        _show_job(manager, job)
+
+
+def _show_job_history(manager, scraper_name):
+    """Lista los trabajos recientes del usuario en este módulo para retomarlos."""
+    recientes = manager.list(st.session_state.get("user"), scraper_name)
+    if not recientes:
+        return
+    with st.expander(f"🗂️ Mis trabajos en {scraper_name} ({len(recientes)})"):
+        for job in recientes[:20]:
+            col_info, col_btn = st.columns([4, 1])
+            creado = datetime.fromtimestamp(job.creado).strftime("%Y-%m-%d %H:%M")
+            col_info.markdown(f"**{creado}** · {job.total} filas · {job.estado}")
+            if col_btn.button("Ver", key=f"ver_{job.id}", use_container_width=True):
+                st.session_state.setdefault("jobs", {})[scraper_name] = job.id
+                st.rerun()
+
+
+def _show_job(manager, job):
+    """Muestra el avance de un trabajo en curso o sus resultados si terminó."""
     st.markdown("---")
-    if st.button(f"🚀 Iniciar Consulta en {scraper_name}", type="primary", use_container_width=True):
-        
-        start_time = perf_counter()
-        progress_container = st.container()
-        ui_overall_progress_bar = progress_container.progress(0.0, text="Iniciando proceso...")
-        ui_detailed_progress_label = progress_container.empty()
-
-        with st.spinner(f"⏳ Ejecutando consulta en {scraper_name}... Por favor, espera."):
-            df_result, summary = run_single_scraper(scraper_name, nuips, ui_overall_progress_bar, ui_detailed_progress_label)
-        
-        elapsed_time = perf_counter() - start_time
-        ui_overall_progress_bar.empty()
-        ui_detailed_progress_label.empty()
-
-        st.markdown("---")
-        if df_result is not None:
-            st.success(f"🎉 ¡Proceso completado en {elapsed_time:.2f} segundos!")
-            st.info(f"📄 **Resumen:** {summary}")
-            
-            st.subheader("Resultados de la Consulta:")
-            st.dataframe(df_result, use_container_width=True)
+    if not job.finished:
+        st.progress(min(job.fraccion or 0.0, 1.0), text=f"⏳ {job.estado} · {job.duracion:.0f} s")
+        if job.texto:
+            st.caption(job.texto)
+        if st.button("⏹️ Cancelar consulta", key=f"cancelar_{job.id}", use_container_width=True):
+            manager.cancel(job.id)
+        # Se vuelve a consultar el estado periódicamente mientras el trabajo siga en curso.
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
 
+    if job.estado != COMPLETADO:
+        st.error(f"El proceso finalizó con estado '{job.estado}'. {job.mensaje}")
+        if job.estado in ESTADOS_REANUDABLES and st.button(
+            "🔁 Reanudar consulta", key=f"reanudar_{job.id}", use_container_width=True
+        ):
+            # Continúa desde la bitácora del trabajo: solo se consulta lo que faltaba.
             try:
-                csv_bytes = df_result.to_csv(index=False).encode("utf-8")
-                st.download_button(
-                    label=f"⬇️ Descargar resultados como CSV",
-                    data=csv_bytes,
-                    file_name=f"resultados_{scraper_name.lower().replace(' ', '_')}.csv",
-                    mime="text/csv",
-                    use_container_width=True
-                )
-            except Exception as e:
-                st.error(f"❌ Error al generar el archivo CSV para descarga: {e}")
-        else:
-            st.error(f"El proceso finalizó con errores. {summary}")
-
-def run_single_scraper(scraper_name, nuips, progress_bar, progress_label):
-    """Ejecuta un único scraper y devuelve los resultados."""
-    cfg = SCRAPERS.get(scraper_name)
-    ScraperClass = SCRAPER_CLASSES.get(scraper_name)
-
-    if not ScraperClass or not cfg:
-        msg = f"No existe implementación o configuración para '{scraper_name}'."
-        return None, msg
-
-    scraper_instance = ScraperClass(**cfg)
-    try:
-        run_method = scraper_instance.run
-        is_async = inspect.iscoroutinefunction(run_method)
-        params = inspect.signature(run_method).parameters
-        run_args = [nuips]
-        
-        if "progress_bar" in params and "progress_label" in params:
-            run_args.extend([progress_bar, progress_label])
+                nuevo = manager.resume(job.id)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                return
+            st.session_state.setdefault("jobs", {})[job.scraper] = nuevo.id
+            st.rerun()
+        return
+    if not os.path.exists(job.resultado):
+        st.warning("El archivo de resultados de este trabajo ya no está disponible. Vuelve a ejecutar la consulta.")
+        return
 
-        df_res = asyncio.run(run_method(*run_args)) if is_async else run_method(*run_args)
-        
-        if "Documento" not in df_res.columns:
-            return None, f"El scraper '{scraper_name}' no devolvió la columna 'Documento'."
-        
-        df_res["Documento"] = df_res["Documento"].astype(str)
-        return df_res, f"Consulta en '{scraper_name}' completada exitosamente."
+    st.success(f"🎉 ¡Proceso completado en {job.duracion:.2f} segundos!")
+    st.info(f"📄 **Resumen:** {job.mensaje}")
 
+    st.subheader("Resultados de la Consulta:")
+    df_preview = read_preview(job.resultado, 1000)
+    if job.filas > len(df_preview):
+        st.caption(f"Mostrando las primeras {len(df_preview)} de {job.filas} filas; el archivo descargable las contiene todas.")
+    st.dataframe(df_preview, use_container_width=True)
+
+    extension = os.path.splitext(job.resultado)[1].lstrip(".")
+    try:
+        with open(job.resultado, "rb") as f:
+            st.download_button(
+                label=f"⬇️ Descargar resultados como {extension.upper()}",
+                data=f,
+                file_name=f"resultados_{job.scraper.lower().replace(' ', '_')}.{extension}",
+                mime=FORMATOS[extension],
+                use_container_width=True
+            )
     except Exception as e:
-        tb_str = traceback.format_exc()
-        error_type = type(e).__name__
-        msg = f"Error crítico en '{scraper_name}': {error_type} - {e}."
-        print(f"--- TRACEBACK ERROR: {scraper_name} ---\n{tb_str}\n---")
-        return None, msg
+        st.error(f"❌ Error al generar el archivo {extension.upper()} para descarga: {e}")
 
 def main():
     """Función principal que gestiona la autenticación y la navegación."""
+    # Recarga en segundo plano las listas OFAC/UE cuando cambian sus archivos.
+    start_watcher()
+
     if "authenticated" not in st.session_state:
         st.session_state.update({
             "authenticated": False,
@@ -241,7 +339,9 @@ def main():
         if not st.session_state["authenticated"]:
             st.stop()
     
-    if st.session_state.get('selected_module'):
+    if st.session_state.get('selected_module') == MODULO_COMBINADO:
+        show_multi_source_page()
+    elif st.session_state.get('selected_module'):
         show_scraper_page(st.session_state['selected_module'])
     else:
         show_module_selection()
@@ -0,0 +1,232 @@
+"""
+Ejecución por línea de comandos, sin Streamlit, para lotes programados.
+
+Ejemplos
+--------
+Listar las fuentes configuradas::
+
+    python cli.py --listar
+
+Consultar una fuente y escribir los resultados a medida que llegan::
+
+    python cli.py cedulas.xlsx -f "Morosidad Judicial" -o morosidad.parquet --qps 5
+
+Consulta combinada (un reporte ancho por documento)::
+
+    python cli.py cedulas.csv -f defunciones -f ofac -f "unión europea" -o reporte.csv
+
+Si una consulta se interrumpe o falla, se informa su ID de ejecución; con él
+se reanuda desde la bitácora y solo se consulta lo que faltaba::
+
+    python cli.py cedulas.xlsx -f "Morosidad Judicial" -o morosidad.parquet --reanudar morosidad_judicial-1f2e3d4c5b6a7980
+
+Re-verificación incremental de la cartera guardada contra OFAC/UE: solo se
+cruzan las entradas nuevas o modificadas de cada lista y se reportan las
+coincidencias que aparecen o desaparecen. Con un archivo de entrada, la
+cartera se reemplaza primero y todas sus coincidencias salen como nuevas::
+
+    python cli.py cartera.xlsx --cartera -f ofac -f "unión europea" -o cambios.csv
+    python cli.py --cartera -f ofac -f "unión europea" -o cambios.csv
+
+Las fuentes se indican por su nombre en `SCRAPERS` o por una parte única de
+él, sin distinguir mayúsculas. El código de salida es 0 si la consulta
+terminó y 1 si falló.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from typing import List, Optional
+
+from config.scrappers_config import SCRAPERS
+from scrappers import SCRAPER_CLASSES
+from scrappers.sanctions.portfolio import DEFAULT_PORTFOLIO_DIR, ELIMINADA, NUEVA, PortfolioScreener
+from utils.dedup import DocumentDedup
+from utils.input_reader import read_input
+from utils.multi_source import MODULO_COMBINADO, run_sources
+from utils.result_sink import ResultSink
+from utils.run_journal import make_run_id
+from utils.sanctions_screening import is_indexable
+from utils.scraper_runner import build_scraper, run_scraper
+
+
+class _ConsoleProgress:
+    """Barra y etiqueta de progreso que escriben una línea en stderr."""
+
+    def __init__(self) -> None:
+        self._fraccion = 0.0
+
+    def progress(self, fraccion: float) -> None:
+        self._fraccion = fraccion
+
+    def text(self, texto: str) -> None:
+        sys.stderr.write(f"\r[{self._fraccion:6.1%}] {texto[:150]:<150}")
+        sys.stderr.flush()
+
+
+def resolve_source(nombre: str) -> str:
+    """
+    Nombre configurado de una fuente a partir del nombre exacto o de una parte única.
+
+    Raises
+    ------
+    ValueError
+        Si no corresponde a ninguna fuente o es ambiguo.
+    """
+    disponibles = [n for n in SCRAPERS if n in SCRAPER_CLASSES]
+    if nombre in disponibles:
+        return nombre
+    candidatos = [n for n in disponibles if nombre.lower() in n.lower()]
+    if len(candidatos) != 1:
+        motivo = "ambigua" if candidatos else "desconocida"
+        raise ValueError(f"Fuente {motivo}: '{nombre}'. Disponibles: {', '.join(disponibles)}")
+    return candidatos[0]
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Consulta de documentos en las fuentes de KnowMe, sin interfaz.")
+    parser.add_argument("entrada", nargs="?", help="Archivo CSV, XLSX o Parquet con los documentos.")
+    parser.add_argument("-f", "--fuente", action="append", default=[], help="Fuente a consultar; repetir para varias.")
+    parser.add_argument("-o", "--salida", help="Archivo de resultados (.csv o .parquet).")
+    parser.add_argument("-c", "--columna", help="Columna de documentos si el archivo tiene varias.")
+    parser.add_argument("--modo", choices=["Documento", "Nombre"],
+                        help="Búsqueda por documento (por defecto) o por nombre (solo listas de sanciones, una fuente).")
+    parser.add_argument("--max-concurrent", type=int, help="Máximo de peticiones en vuelo por fuente.")
+    parser.add_argument("--min-concurrent", type=int, help="Mínimo de la concurrencia adaptativa.")
+    parser.add_argument("--qps", type=float, help="Peticiones por segundo por host.")
+    parser.add_argument("--burst", type=int, help="Ráfaga del limitador de tasa.")
+    parser.add_argument("--cache-ttl-horas", type=float, help="Vigencia de la caché de resultados (0 la desactiva).")
+    parser.add_argument("--reanudar", metavar="RUN_ID",
+                        help="Reanuda la ejecución interrumpida con este ID desde su bitácora.")
+    parser.add_argument("--cartera", nargs="?", const=DEFAULT_PORTFOLIO_DIR, metavar="DIR",
+                        help="Re-verifica la cartera guardada en DIR contra listas de sanciones y escribe "
+                             "solo los cambios. Con entrada, la cartera se reemplaza antes.")
+    parser.add_argument("--listar", action="store_true", help="Lista las fuentes disponibles y termina.")
+    parser.add_argument("-q", "--silencioso", action="store_true", help="No muestra el progreso.")
+    parser.add_argument("-v", "--verboso", action="store_true", help="Muestra los mensajes informativos del log.")
+    args = parser.parse_args(argv)
+    if args.modo and len(set(args.fuente)) > 1:
+        parser.error("--modo solo se admite con una única --fuente")
+    if args.modo and args.cartera:
+        parser.error("--modo no se admite con --cartera")
+    if args.cartera and not (args.fuente and args.salida):
+        parser.error("--cartera requiere al menos una --fuente y --salida")
+    if not args.listar and not args.cartera and not (args.entrada and args.fuente and args.salida):
+        parser.error("se requieren la entrada, al menos una --fuente y --salida")
+    return args
+
+
+def _read_documents(path: str, columna: Optional[str]) -> List[str]:
+    df = read_input(path)
+    if columna is None:
+        if df.shape[1] != 1:
+            raise ValueError(f"El archivo tiene {df.shape[1]} columnas; indica cuál usar con --columna.")
+        columna = df.columns[0]
+    return df[columna].astype(str).tolist()
+
+
+def _rescreen_portfolio(args: argparse.Namespace, fuentes: List[str]) -> int:
+    """Re-verifica la cartera con `PortfolioScreener` y escribe los cambios en --salida."""
+    no_indexables = [f for f in fuentes if not is_indexable(f)]
+    if no_indexables:
+        print(f"Error: --cartera solo admite listas de sanciones; no: {', '.join(no_indexables)}", file=sys.stderr)
+        return 1
+    try:
+        screener = PortfolioScreener(args.cartera)
+        if args.entrada:
+            screener.set_documents(_read_documents(args.entrada, args.columna))
+        if screener.documentos.empty:
+            raise ValueError(f"La cartera en {args.cartera} está vacía; indica un archivo de entrada.")
+        sink = ResultSink(args.salida)
+    except (ValueError, KeyError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    for fuente in fuentes:
+        cambios = screener.rescreen(build_scraper(fuente))
+        cambios.insert(0, "Fuente", fuente)
+        sink.write_frame(cambios)
+        print(
+            f"'{fuente}': {(cambios['Cambio'] == NUEVA).sum()} coincidencias nuevas, "
+            f"{(cambios['Cambio'] == ELIMINADA).sum()} eliminadas"
+            + ("" if not cambios.empty else " (sin cambios desde la última verificación)")
+        )
+    sink.close()
+    print(f"Cartera de {len(screener.documentos)} documentos · {sink.filas_escritas} cambios escritos en {sink.path}")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    # Algunos scrapers configuran logging en INFO al importarse; en consola solo
+    # interesan las advertencias, salvo con --verboso.
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(message)s")
+    logging.getLogger().setLevel(logging.INFO if args.verboso else logging.WARNING)
+
+    if args.listar:
+        for nombre in SCRAPERS:
+            if nombre in SCRAPER_CLASSES:
+                print(nombre)
+        return 0
+
+    if args.cartera:
+        try:
+            fuentes = list(dict.fromkeys(resolve_source(f) for f in args.fuente))
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        return _rescreen_portfolio(args, fuentes)
+
+    try:
+        fuentes = list(dict.fromkeys(resolve_source(f) for f in args.fuente))
+        nuips = _read_documents(args.entrada, args.columna)
+        sink = ResultSink(args.salida)
+    except (ValueError, KeyError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    overrides = {
+        clave: valor for clave, valor in {
+            "max_concurrent": args.max_concurrent,
+            "min_concurrent": args.min_concurrent,
+            "qps": args.qps,
+            "burst": args.burst,
+            "cache_ttl_horas": args.cache_ttl_horas,
+        }.items() if valor is not None
+    }
+    progreso = None if args.silencioso else _ConsoleProgress()
+    run_id = args.reanudar or make_run_id(fuentes[0] if len(fuentes) == 1 else MODULO_COMBINADO)
+
+    inicio = time.monotonic()
+    try:
+        if len(fuentes) == 1:
+            result_sink, msg = asyncio.run(
+                run_scraper(fuentes[0], nuips, progreso, progreso, args.modo or "Documento", sink, overrides, run_id)
+            )
+        else:
+            result_sink, msg = asyncio.run(run_sources(fuentes, nuips, progreso, progreso, sink, overrides, run_id))
+    except KeyboardInterrupt:
+        result_sink, msg = None, "Consulta interrumpida."
+    segundos = time.monotonic() - inicio
+    if progreso is not None:
+        sys.stderr.write("\n")
+
+    if result_sink is None:
+        print(f"Error: {msg}", file=sys.stderr)
+        print(f"Para reanudarla, repite el comando con --reanudar {run_id}", file=sys.stderr)
+        return 1
+
+    unicos = len(DocumentDedup(nuips).unicos)
+    print(msg)
+    print(
+        f"{len(nuips)} filas de entrada ({unicos} documentos únicos) en {segundos:.1f} s · "
+        f"{unicos / segundos if segundos else 0:.1f} documentos/s · "
+        f"{result_sink.filas_escritas} filas escritas en {result_sink.path}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
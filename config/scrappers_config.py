@@ -1,24 +1,59 @@
 """
 Configuraciones para cada scrapper.
 Cada clave es un identificador de scrapper, y su valor un dict con parámetros.
+
+`cache_ttl_horas` fija cuánto tiempo se reutiliza, desde la caché local, el
+resultado de un documento ya consultado (0 deshabilita la caché).
+
+La concurrencia de los scrapers de red se ajusta sola (AIMD) entre
+`min_concurrent` y `max_concurrent`, reduciéndose ante timeouts, HTTP 429/5xx
+o respuestas más lentas que `latencia_objetivo` (segundos).
+
+`qps` y `burst` configuran el limitador de tasa (token bucket) del host de
+cada scraper; los scrapers que apuntan al mismo host lo comparten.
+
+Los reintentos (`max_retries`, 3 por defecto) solo aplican a errores de
+conexión, timeouts y HTTP 408/429/5xx, con backoff exponencial o la espera que
+pida `Retry-After`. Tras `umbral_circuito` fallos seguidos contra un host su
+circuito se abre durante `enfriamiento_circuito` segundos y las consultas
+fallan de inmediato.
+
+Todos los scrapers de red usan el pool HTTP compartido (`utils.http_pool`):
+una sesión por host con keep-alive, contextos TLS reutilizados y caché DNS.
 """
 
 SCRAPERS = {
     "Defunciones Registraduría": {
         "url": "https://defunciones.registraduria.gov.co:8443/VigenciaCedula/consulta",
         "max_concurrent": 100,
+        "min_concurrent": 5,
+        "latencia_objetivo": 5.0,
+        "qps": 20,
+        "burst": 40,
+        "cache_ttl_horas": 24,
     },
     "Morosidad Judicial": {
         "url": "https://cobrocoactivo.ramajudicial.gov.co/Home/Bdme_Read",
         "max_concurrent": 100,
+        "min_concurrent": 5,
+        "latencia_objetivo": 10.0,
+        "qps": 10,
+        "burst": 20,
+        "cache_ttl_horas": 12,
     },
     "Declaraciones Función Pública": {
         "max_concurrent": 10,
+        "min_concurrent": 2,
+        "latencia_objetivo": 10.0,
+        "qps": 5,
+        "burst": 10,
+        "cache_ttl_horas": 72,
     },
     "Lista OFAC (SDN)": {  # 👈 NUEVA ENTRADA
         # No requiere configuración de red
     },
     "Unión Europea":{
+        "eu_list_path": "20250522-FULL-1_0.xlsx",
     }
 }
 
@@ -1,18 +1,39 @@
-
-
 # -*- coding: utf-8 -*-
 """
 Clase modular para verificar cédulas/documentos en la lista de sanciones de la UE,
 buscando cada documento (ignorando ceros a la izquierda en la entrada)
 en la columna 'Iden_number' de la lista de la UE.
 La lista de la UE permite ceros a la izquierda en sus 'Iden_number'.
-Los datos de la lista de la UE se cargan y preparan una vez.
-Optimizada para mayor velocidad en la consulta.
+Los datos de la lista de la UE se cargan y preparan una vez, junto con una
+tabla de claves numéricas normalizadas de 'Iden_number' contra la que se
+cruza la entrada con un único merge.
+Si el archivo de la UE cambia, `reload_if_changed` construye una nueva versión y
+la intercambia de forma atómica; las consultas en curso terminan con la anterior.
 """
 
+import logging
+import os
+import numpy as np
 import pandas as pd
 import re
-from typing import List, Dict, Union
+from typing import List, Dict, NamedTuple, Optional, Tuple
+
+from scrappers.sanctions.name_screening import NameIndex
+from scrappers.sanctions.sanctions_index import SanctionsSource
+from utils.list_cache import DEFAULT_CACHE_DIR, file_signature, load_list_cached
+from utils.progress import ProgressChannel
+
+# Un documento numérico sin ceros a la izquierda coincide con r"\b0*{doc}(?:\D|$)"
+# si y solo si es una de las claves que este patrón extrae de 'Iden_number'.
+_NUMERIC_KEY_PATTERN = re.compile(r"\b0*([1-9]\d*)")
+
+
+class _EUSnapshot(NamedTuple):
+    """Versión inmutable de la lista de la UE cargada y su tabla de claves."""
+    df: pd.DataFrame
+    keys: pd.DataFrame
+    version: str
+    firma: Tuple[int, int]
 
 class UniversalModularEUChecker:
     """
@@ -23,28 +44,111 @@ class UniversalModularEUChecker:
     tengan ceros a la izquierda. Devuelve información detallada de las coincidencias.
     """
 
-    def __init__(self, eu_list_path: str = "20250522-FULL-1_0.csv") -> None:
+    # Instancia de solo lectura: el registro de verificadores la comparte entre sesiones.
+    FILE_BACKED = True
+
+    # Columnas que usa el verificador; True indica que es esencial para la búsqueda.
+    # Nombres tomados del script de ejemplo del usuario
+    ESSENTIAL_COLUMNS: Dict[str, bool] = {
+        'Iden_number': True,
+        'Naal_wholename': False,
+        'Subject_type': False,
+        'Entity_remark': False,
+        'EU_ref_num': False,
+        'Iden_programme': False
+    }
+
+    def __init__(
+        self,
+        eu_list_path: str = "20250522-FULL-1_0.csv",
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    ) -> None:
         """
         Inicializa el verificador cargando y preparando los datos de la lista de la UE.
 
         Parameters
         ----------
         eu_list_path : str
-            Ruta al archivo CSV de la lista de sanciones de la UE.
-            Se espera que el separador sea ';'
+            Ruta al archivo CSV (separador ';') o XLSX de la lista de sanciones de la UE.
+        cache_dir : str, opcional
+            Directorio de la caché Parquet de la lista. None desactiva la caché.
         """
         self.eu_list_path: str = eu_list_path
-        self.df_eu: pd.DataFrame = self._prepare_eu_list_dataframe()
+        self.cache_dir: Optional[str] = cache_dir
+        self._snapshot: _EUSnapshot = self._load_snapshot()
+        self._name_index: Optional[Tuple[str, NameIndex]] = None
+
+    @property
+    def df_eu(self) -> pd.DataFrame:
+        """Lista de la UE de la versión vigente."""
+        return self._snapshot.df
+
+    @property
+    def iden_keys(self) -> pd.DataFrame:
+        """Tabla de claves de 'Iden_number' de la versión vigente."""
+        return self._snapshot.keys
+
+    @property
+    def version(self) -> str:
+        """Versión vigente de la lista (prefijo del hash SHA-256 del archivo)."""
+        return self._snapshot.version
+
+    def _load_snapshot(
+        self, preparado: Optional[Tuple[pd.DataFrame, str]] = None, firma: Optional[Tuple[int, int]] = None,
+    ) -> _EUSnapshot:
+        """
+        Construye una versión completa (datos + claves) del archivo de la UE.
+
+        La versión es el hash de los mismos bytes de los que salieron los datos.
+        `preparado` y `firma` reutilizan una lectura ya hecha por `reload_if_changed`.
+        """
+        if preparado is None:
+            firma = file_signature(self.eu_list_path) if os.path.exists(self.eu_list_path) else (0, 0)
+            preparado = self._prepare_eu_list_dataframe()
+        df, digest = preparado
+        return _EUSnapshot(df, self._build_iden_keys(df), digest[:12], firma)
+
+    def reload_if_changed(self) -> bool:
+        """
+        Recarga la lista si el archivo de la UE cambió desde la última carga.
+
+        La nueva versión se construye por completo antes de reemplazar a la
+        vigente con una única asignación, de modo que las consultas en curso
+        terminan sobre la versión con la que empezaron.
+
+        Returns
+        -------
+        bool
+            True si se cargó una nueva versión.
+        """
+        try:
+            firma = file_signature(self.eu_list_path)
+        except OSError:
+            return False
+        vigente = self._snapshot
+        if firma == vigente.firma:
+            return False
+        preparado = self._prepare_eu_list_dataframe()
+        if preparado[1][:12] == vigente.version:
+            # Solo cambió la fecha de modificación, no el contenido.
+            self._snapshot = vigente._replace(firma=firma)
+            return False
+        self._snapshot = self._load_snapshot(preparado, firma)
+        logging.info(f"Lista UE recargada: versión {vigente.version} -> {self._snapshot.version}")
+        return True
 
-    def _prepare_eu_list_dataframe(self) -> pd.DataFrame:
+    def _prepare_eu_list_dataframe(self) -> Tuple[pd.DataFrame, str]:
         """
         Carga el archivo de la lista de la UE desde la ruta especificada y lo prepara.
+        Solo se leen las columnas de `ESSENTIAL_COLUMNS`; la lectura se sirve desde la
+        caché Parquet cuando el archivo fuente no ha cambiado.
         Asegura que las columnas clave para la búsqueda y los resultados existan y sean de tipo string.
 
         Returns
         -------
-        pd.DataFrame
-            DataFrame de Pandas con los datos de la lista de la UE procesados.
+        Tuple[pd.DataFrame, str]
+            (DataFrame de Pandas con los datos de la lista de la UE procesados,
+            hash SHA-256 del contenido del que se leyeron).
 
         Raises
         ------
@@ -54,32 +158,18 @@ class UniversalModularEUChecker:
             Si la columna esencial 'Iden_number' no se encuentra.
         """
         try:
-            df = pd.read_csv(
+            df, digest = load_list_cached(
                 self.eu_list_path,
+                self.ESSENTIAL_COLUMNS,
+                cache_dir=self.cache_dir,
                 sep=';',
-                engine='python', # Como en el script original
-                dtype=str, # Leer todas las columnas como string inicialmente
-                keep_default_na=False, # Tratar strings vacíos como tal, no NaN
-                na_values=[''] # Definir qué se considera NA si es necesario explícitamente
             )
         except FileNotFoundError:
             raise FileNotFoundError(f"Archivo de la lista UE no encontrado en la ruta: {self.eu_list_path}")
         except Exception as e:
-            raise ValueError(f"Error al leer el archivo CSV de la UE: {e}")
-
-
-        # Columnas esenciales para la búsqueda y obtención de resultados
-        # Nombres tomados del script de ejemplo del usuario
-        essential_columns = {
-            'Iden_number': True, # Esencial para la búsqueda
-            'Naal_wholename': False,
-            'Subject_type': False,
-            'Entity_remark': False,
-            'EU_ref_num': False,
-            'Iden_programme': False
-        }
+            raise ValueError(f"Error al leer el archivo de la lista de la UE: {e}")
 
-        for col_name, is_critical in essential_columns.items():
+        for col_name, is_critical in self.ESSENTIAL_COLUMNS.items():
             if col_name not in df.columns:
                 if is_critical:
                     raise ValueError(f"La columna '{col_name}' es esencial y no se encontró en el archivo de la UE.")
@@ -88,7 +178,121 @@ class UniversalModularEUChecker:
             # Asegurar que sea de tipo string y reemplazar NaNs verdaderos (si los hay después de dtype=str y na_values) por ""
             df[col_name] = df[col_name].fillna("").astype(str).str.strip()
             
-        return df
+        return df.reset_index(drop=True), digest
+
+    @staticmethod
+    def _build_iden_keys(df_eu: pd.DataFrame) -> pd.DataFrame:
+        """
+        Pre-tokeniza 'Iden_number' en claves numéricas normalizadas.
+
+        Cada valor se divide en secuencias de dígitos que empiezan en un límite
+        de palabra; los ceros a la izquierda se eliminan. Ej.: "00589758 (other)"
+        produce "589758" y "6602 516592" produce "6602" y "516592".
+
+        Returns
+        -------
+        pd.DataFrame
+            Tabla con columnas ['clave', 'fila'], donde 'fila' es la posición
+            de la fila en `df_eu`, ordenada según el archivo de la UE.
+        """
+        claves = df_eu['Iden_number'].str.findall(_NUMERIC_KEY_PATTERN).explode().dropna()
+        tabla = pd.DataFrame({'clave': claves.to_numpy(), 'fila': claves.index.to_numpy()})
+        return tabla.drop_duplicates().reset_index(drop=True)
+
+    @staticmethod
+    def _match_documents(snapshot: _EUSnapshot, docs_sin_ceros: List[str]) -> Dict[str, List[int]]:
+        """
+        Resuelve los documentos (ya sin ceros a la izquierda) contra la versión
+        `snapshot` de la lista UE.
+
+        Los documentos numéricos se cruzan con su tabla de claves en un único merge.
+        Los que contienen otros caracteres (p. ej. pasaportes "AB123") recurren
+        a la búsqueda regex sobre 'Iden_number'.
+
+        Returns
+        -------
+        Dict[str, List[int]]
+            Documento -> posiciones de fila en `df_eu`. Solo incluye documentos
+            con al menos una coincidencia.
+        """
+        docs = pd.Series(docs_sin_ceros, dtype=object)
+        es_numerico = docs.str.fullmatch(r"[1-9]\d*")
+
+        cruce = pd.DataFrame({'clave': docs[es_numerico]}).merge(snapshot.keys, on='clave')
+        cruce = cruce.sort_values('fila', kind='stable')
+        coincidencias = cruce.groupby('clave', sort=False)['fila'].agg(list).to_dict()
+
+        for doc_str in docs[~es_numerico]:
+            pattern = re.compile(rf"\b0*{re.escape(doc_str)}(?:\D|$)")
+            mask = snapshot.df['Iden_number'].str.contains(pattern, regex=True, na=False)
+            filas = mask.to_numpy().nonzero()[0].tolist()
+            if filas:
+                coincidencias[doc_str] = filas
+        return coincidencias
+
+    def as_sanctions_source(self) -> SanctionsSource:
+        """
+        Describe la lista de la UE cargada para ingerirla en el índice unificado
+        de sanciones (`SanctionsIndex`).
+
+        Returns
+        -------
+        SanctionsSource
+            Fuente "UE" con esquema "numerico" sobre 'Iden_number'.
+        """
+        snapshot = self._snapshot
+        entradas = pd.DataFrame({
+            'texto_busqueda': snapshot.df['Iden_number'],
+            'Iden_number_UE': snapshot.df['Iden_number'],
+            'Nombre_UE': snapshot.df['Naal_wholename'],
+            'Tipo_UE': snapshot.df['Subject_type'],
+            'Comentarios_UE': snapshot.df['Entity_remark'],
+            'ref_num_UE': snapshot.df['EU_ref_num'],
+            'Iden_programme_UE': snapshot.df['Iden_programme'],
+        })
+        return SanctionsSource(
+            nombre="UE",
+            esquema="numerico",
+            columnas=[
+                'Iden_number_UE', 'Nombre_UE', 'Tipo_UE',
+                'Comentarios_UE', 'ref_num_UE', 'Iden_programme_UE'
+            ],
+            documento_normalizado=False,
+            entradas=entradas,
+            version=snapshot.version,
+            columna_version='Version_UE',
+            columna_nombre='Nombre_UE',
+        )
+
+    def screen_names(self, nombres: List[str], umbral: float = 0.8, max_candidatos: int = 3) -> pd.DataFrame:
+        """
+        Verificación difusa por nombre contra 'Naal_wholename' de la lista de la UE.
+
+        El índice de trigramas (`NameIndex`) se construye la primera vez y se
+        reconstruye solo cuando cambia la versión de la lista.
+
+        Parameters
+        ----------
+        nombres : List[str]
+            Nombres a verificar.
+        umbral : float
+            Similitud mínima entre 0 y 1.
+        max_candidatos : int
+            Máximo de candidatos por nombre.
+
+        Returns
+        -------
+        pd.DataFrame
+            Columnas ['Nombre', 'Fuente', 'Nombre_lista', 'Puntaje', 'Version_UE'].
+        """
+        source = self.as_sanctions_source()
+        cached = self._name_index
+        if cached is None or cached[0] != source.version:
+            cached = (source.version, NameIndex([source]))
+            self._name_index = cached
+        df_resultados = cached[1].screen(nombres, umbral=umbral, max_candidatos=max_candidatos)
+        df_resultados['Version_UE'] = source.version
+        return df_resultados
 
     def run(self, documentos_a_buscar: List[str], progress_bar=None, progress_label=None) -> pd.DataFrame:
         """
@@ -112,115 +316,71 @@ class UniversalModularEUChecker:
         pd.DataFrame
             Un DataFrame con los resultados de la búsqueda. Las columnas son:
             ['Documento', 'Iden_number_UE', 'Nombre_UE', 'Tipo_UE', 
-             'Comentarios_UE', 'ref_num_UE', 'Iden_programme_UE'].
+             'Comentarios_UE', 'ref_num_UE', 'Iden_programme_UE', 'Version_UE'].
             Si un documento tiene múltiples coincidencias, se genera una fila por cada una.
+            'Version_UE' indica la versión de la lista contra la que se verificó.
         """
-        resultados = []
-        total_documentos = len(documentos_a_buscar)
+        # Toda la consulta usa la versión vigente al empezar, aunque haya una recarga en curso.
+        snapshot = self._snapshot
+        df_resultados = self._run_on_snapshot(snapshot, documentos_a_buscar, progress_bar, progress_label)
+        df_resultados['Version_UE'] = snapshot.version
+        return df_resultados
+
+    def _run_on_snapshot(self, snapshot: _EUSnapshot, documentos_a_buscar: List[str], progress_bar=None, progress_label=None) -> pd.DataFrame:
+        """
+        Ejecuta la verificación de `run` contra una versión concreta de la lista.
 
+        Cada documento único se resuelve una sola vez y el resultado se arma con
+        un merge contra la lista original: una fila por coincidencia, en el orden
+        de entrada, y una fila "Sin coincidencias" para los documentos sin match.
+        El progreso se reporta en unos pocos pasos gruesos, por el canal acotado.
+        """
         output_columns = [
             'Documento', 'Iden_number_UE', 'Nombre_UE', 'Tipo_UE',
             'Comentarios_UE', 'ref_num_UE', 'Iden_programme_UE'
         ]
+        columnas_lista = {
+            'Iden_number_UE': 'Iden_number',
+            'Nombre_UE': 'Naal_wholename',
+            'Tipo_UE': 'Subject_type',
+            'Comentarios_UE': 'Entity_remark',
+            'ref_num_UE': 'EU_ref_num',
+            'Iden_programme_UE': 'Iden_programme',
+        }
+        total_documentos = len(documentos_a_buscar)
 
         if total_documentos == 0:
             return pd.DataFrame(columns=output_columns)
-        
-        docs_to_process = []
-        for doc in documentos_a_buscar:
-            original_doc = str(doc) 
-            doc_sin_ceros = str(doc).lstrip('0').strip()
-            if doc_sin_ceros: 
-                 docs_to_process.append({'original': original_doc, 'sin_ceros': doc_sin_ceros})
-
-        unique_doc_strs_sin_ceros_to_search = sorted(list(set(d['sin_ceros'] for d in docs_to_process)))
-
-        if not unique_doc_strs_sin_ceros_to_search:
-            for i, original_doc_input in enumerate(documentos_a_buscar):
-                resultados.append({
-                    'Documento': str(original_doc_input), # Cambio aquí
-                    'Iden_number_UE': "Sin coincidencias",
-                    'Nombre_UE': "Sin coincidencias",
-                    'Tipo_UE': "Sin coincidencias",
-                    'Comentarios_UE': "Sin coincidencias",
-                    'ref_num_UE': "Sin coincidencias",
-                    'Iden_programme_UE': "Sin coincidencias"
-                })
-                if progress_bar: progress_bar.progress((i + 1) / total_documentos)
-                if progress_label: progress_label.text(f"Procesando {i + 1} de {total_documentos}")
-            return pd.DataFrame(resultados)
-
-        escaped_unique_docs_sin_ceros = [re.escape(doc_str) for doc_str in unique_doc_strs_sin_ceros_to_search]
-        
-        if len(escaped_unique_docs_sin_ceros) == 1:
-            combined_terms_pattern = escaped_unique_docs_sin_ceros[0]
-        else:
-            combined_terms_pattern = r"(?:" + r"|".join(escaped_unique_docs_sin_ceros) + r")"
-            
-        combined_regex_pattern_text = rf"\b0*{combined_terms_pattern}(?:\D|$)"
-        
-        relevant_eu_mask = self.df_eu['Iden_number'].str.contains(combined_regex_pattern_text, regex=True, na=False)
-        relevant_eu_df = self.df_eu[relevant_eu_mask]
-
-        if relevant_eu_df.empty:
-            for i, original_doc_input in enumerate(documentos_a_buscar):
-                resultados.append({
-                    'Documento': str(original_doc_input), # Cambio aquí
-                    'Iden_number_UE': "Sin coincidencias",
-                    'Nombre_UE': "Sin coincidencias",
-                    'Tipo_UE': "Sin coincidencias",
-                    'Comentarios_UE': "Sin coincidencias",
-                    'ref_num_UE': "Sin coincidencias",
-                    'Iden_programme_UE': "Sin coincidencias"
-                })
-                if progress_bar: progress_bar.progress((i + 1) / total_documentos)
-                if progress_label: progress_label.text(f"Procesando {i + 1} de {total_documentos}")
-            return pd.DataFrame(resultados)
-            
-        individual_patterns = {
-            doc_str: re.compile(rf"\b0*{re.escape(doc_str)}(?:\D|$)")
-            for doc_str in unique_doc_strs_sin_ceros_to_search
-        }
 
-        for idx, original_doc_input_val in enumerate(documentos_a_buscar, start=1):
-            original_doc_str = str(original_doc_input_val)
-            elemento_sin_ceros_str = original_doc_str.lstrip('0').strip()
-            
-            current_match_found = False
-            if elemento_sin_ceros_str and elemento_sin_ceros_str in individual_patterns:
-                current_pattern = individual_patterns[elemento_sin_ceros_str]
-                
-                coincidencias_df = relevant_eu_df[
-                    relevant_eu_df['Iden_number'].str.contains(current_pattern, regex=True, na=False)
-                ]
-                
-                if not coincidencias_df.empty:
-                    current_match_found = True
-                    for record in coincidencias_df.to_dict('records'):
-                        resultados.append({
-                            'Documento': original_doc_str, # Cambio aquí
-                            'Iden_number_UE': record.get('Iden_number', "N/A"),
-                            'Nombre_UE': record.get('Naal_wholename', "N/A"),
-                            'Tipo_UE': record.get('Subject_type', "N/A"),
-                            'Comentarios_UE': record.get('Entity_remark', "N/A"),
-                            'ref_num_UE': record.get('EU_ref_num', "N/A"),
-                            'Iden_programme_UE': record.get('Iden_programme', "N/A")
-                        })
-            
-            if not current_match_found:
-                resultados.append({
-                    'Documento': original_doc_str, # Cambio aquí
-                    'Iden_number_UE': "Sin coincidencias",
-                    'Nombre_UE': "Sin coincidencias",
-                    'Tipo_UE': "Sin coincidencias",
-                    'Comentarios_UE': "Sin coincidencias",
-                    'ref_num_UE': "Sin coincidencias",
-                    'Iden_programme_UE': "Sin coincidencias"
-                })
-            
-            if progress_bar:
-                progress_bar.progress(idx / total_documentos)
-            if progress_label:
-                progress_label.text(f"Procesando {idx} de {total_documentos}")
-        
-        return pd.DataFrame(resultados, columns=output_columns)
\ No newline at end of file
+        progreso = ProgressChannel(progress_bar, progress_label, total_documentos)
+        progreso.report(0.0, f"Normalizando {total_documentos} documentos")
+        documentos = pd.Series([str(d) for d in documentos_a_buscar], dtype=object)
+        sin_ceros = documentos.str.lstrip('0').str.strip()
+
+        # 1. Resolver cada documento único una sola vez contra la tabla de claves.
+        progreso.report(0.1, "Buscando coincidencias en la lista UE")
+        unicos = sorted(set(sin_ceros[sin_ceros != ""]))
+        coincidencias = pd.Series(self._match_documents(snapshot, unicos) if unicos else {}, dtype=object)
+        coincidencias = coincidencias.explode().rename_axis('sin_ceros').reset_index(name='fila')
+        coincidencias['orden'] = range(len(coincidencias))
+
+        # 2. Expandir las coincidencias sobre la lista original (uno a muchos).
+        progreso.report(0.6, "Armando resultados")
+        cruce = pd.DataFrame({'pos': range(total_documentos), 'sin_ceros': sin_ceros}).merge(coincidencias, on='sin_ceros')
+        cruce = cruce.sort_values(['pos', 'orden'], kind='stable')
+        pos = cruce['pos'].to_numpy(dtype='int64')
+        filas = snapshot.df.take(cruce['fila'].to_numpy(dtype='int64'))
+        con_match = pd.DataFrame({'pos': pos, 'Documento': documentos.to_numpy()[pos]})
+        for col, origen in columnas_lista.items():
+            con_match[col] = filas[origen].to_numpy(dtype=object)
+
+        # 3. Documentos sin coincidencias (incluye vacíos) conservan su valor original.
+        sin_pos = np.setdiff1d(np.arange(total_documentos), pos)
+        sin_match = pd.DataFrame({'pos': sin_pos, 'Documento': documentos.to_numpy()[sin_pos]})
+        for col in columnas_lista:
+            sin_match[col] = "Sin coincidencias"
+
+        resultado = pd.concat([con_match, sin_match], ignore_index=True).sort_values('pos', kind='stable')
+        resultado = resultado[output_columns].astype(object).reset_index(drop=True)
+        progreso.report(1.0, f"Procesados {total_documentos} de {total_documentos}", force=True)
+        return resultado
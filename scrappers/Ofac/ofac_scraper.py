@@ -3,13 +3,37 @@
 Clase modular para verificar cédulas/documentos en la lista SDN (OFAC)
 buscando cada documento de entrada como una palabra completa en 'Remarks'
 y devolviendo detalles de las coincidencias.
-Los datos de la lista SDN se cargan y preparan una vez.
-Optimizada para mayor velocidad en la consulta.
+Los datos de la lista SDN se cargan y preparan una vez, junto con un índice
+invertido token -> filas SDN sobre 'Remarks', de modo que cada documento
+se resuelve con una búsqueda en diccionario.
+Si el archivo SDN cambia, `reload_if_changed` construye una nueva versión y
+la intercambia de forma atómica; las consultas en curso terminan con la anterior.
 """
 
+import hashlib
+import io
+import logging
+import numpy as np
 import pandas as pd
 import re
-from typing import List, Dict, Union
+from typing import List, Dict, NamedTuple, Optional, Tuple
+
+from scrappers.sanctions.name_screening import NameIndex
+from scrappers.sanctions.sanctions_index import SanctionsSource
+from utils.list_cache import file_signature
+from utils.progress import ProgressChannel
+
+# Un documento formado solo por caracteres de palabra coincide con r"\b{doc}\b"
+# si y solo si es exactamente uno de los tokens r"\w+" de 'Remarks'.
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class _SDNSnapshot(NamedTuple):
+    """Versión inmutable de la lista SDN cargada y su índice."""
+    df: pd.DataFrame
+    index: Dict[str, List[int]]
+    version: str
+    firma: Tuple[int, int]
 
 class UniversalModularSDNChecker:
     """
@@ -19,6 +43,9 @@ class UniversalModularSDNChecker:
     y devuelve información detallada de las coincidencias.
     """
 
+    # Instancia de solo lectura: el registro de verificadores la comparte entre sesiones.
+    FILE_BACKED = True
+
     def __init__(self, sdn_path: str = "sdn.csv") -> None:
         """
         Inicializa el verificador cargando y preparando los datos de la lista SDN.
@@ -30,14 +57,93 @@ class UniversalModularSDNChecker:
             Por defecto es "sdn.csv".
         """
         self.sdn_path: str = sdn_path
-        self.df_sdn: pd.DataFrame = self._prepare_sdn_dataframe()
+        self._snapshot: _SDNSnapshot = self._load_snapshot()
+        self._name_index: Optional[Tuple[str, NameIndex]] = None
+
+    @property
+    def df_sdn(self) -> pd.DataFrame:
+        """Lista SDN de la versión vigente."""
+        return self._snapshot.df
+
+    @property
+    def remarks_index(self) -> Dict[str, List[int]]:
+        """Índice invertido de 'Remarks' de la versión vigente."""
+        return self._snapshot.index
+
+    @property
+    def version(self) -> str:
+        """Versión vigente de la lista (prefijo del hash SHA-256 del archivo)."""
+        return self._snapshot.version
+
+    def _read_sdn_file(self) -> Tuple[bytes, Tuple[int, int]]:
+        """
+        Lee el archivo SDN una sola vez; la versión y los datos salen de los
+        mismos bytes, de modo que no pueden referirse a contenidos distintos.
 
-    def _prepare_sdn_dataframe(self) -> pd.DataFrame:
+        Returns
+        -------
+        Tuple[bytes, Tuple[int, int]]
+            (contenido, firma tomada antes de leer).
+
+        Raises
+        ------
+        FileNotFoundError
+            Si el archivo SDN no se encuentra en la ruta especificada.
         """
-        Carga el archivo SDN desde la ruta especificada, lo procesa y lo prepara.
+        try:
+            firma = file_signature(self.sdn_path)
+            with open(self.sdn_path, "rb") as f:
+                return f.read(), firma
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Archivo SDN no encontrado en la ruta: {self.sdn_path}")
+
+    def _load_snapshot(self, leido: Optional[Tuple[bytes, Tuple[int, int]]] = None) -> _SDNSnapshot:
+        """Construye una versión completa (datos + índice) a partir del archivo SDN."""
+        contenido, firma = leido if leido is not None else self._read_sdn_file()
+        df = self._prepare_sdn_dataframe(contenido)
+        version = hashlib.sha256(contenido).hexdigest()[:12]
+        return _SDNSnapshot(df, self._build_remarks_index(df), version, firma)
+
+    def reload_if_changed(self) -> bool:
+        """
+        Recarga la lista si el archivo SDN cambió desde la última carga.
+
+        La nueva versión se construye por completo antes de reemplazar a la
+        vigente con una única asignación, de modo que las consultas en curso
+        terminan sobre la versión con la que empezaron.
+
+        Returns
+        -------
+        bool
+            True si se cargó una nueva versión.
+        """
+        try:
+            firma = file_signature(self.sdn_path)
+        except OSError:
+            return False
+        vigente = self._snapshot
+        if firma == vigente.firma:
+            return False
+        leido = self._read_sdn_file()
+        if hashlib.sha256(leido[0]).hexdigest()[:12] == vigente.version:
+            # Solo cambió la fecha de modificación, no el contenido.
+            self._snapshot = vigente._replace(firma=leido[1])
+            return False
+        self._snapshot = self._load_snapshot(leido)
+        logging.info(f"Lista SDN recargada: versión {vigente.version} -> {self._snapshot.version}")
+        return True
+
+    def _prepare_sdn_dataframe(self, contenido: bytes) -> pd.DataFrame:
+        """
+        Procesa y prepara el contenido del archivo SDN.
         Esto incluye leer el CSV, renombrar columnas y asegurar que las columnas
         clave ('Remarks', 'SDN_Name', 'SDN_Type') existan y sean de tipo string.
 
+        Parameters
+        ----------
+        contenido : bytes
+            Contenido del archivo SDN, leído con `_read_sdn_file`.
+
         Returns
         -------
         pd.DataFrame
@@ -45,23 +151,18 @@ class UniversalModularSDNChecker:
 
         Raises
         ------
-        FileNotFoundError
-            Si el archivo SDN no se encuentra en la ruta especificada.
         ValueError
             Si alguna columna esencial después del renombrado (como 'Remarks')
             no se encuentra o si hay problemas con los datos.
         """
-        try:
-            df = pd.read_csv(
-                self.sdn_path,
-                header=None,
-                sep=',',
-                quotechar='"',
-                encoding='utf-8',
-                on_bad_lines='skip'
-            )
-        except FileNotFoundError:
-            raise FileNotFoundError(f"Archivo SDN no encontrado en la ruta: {self.sdn_path}")
+        df = pd.read_csv(
+            io.BytesIO(contenido),
+            header=None,
+            sep=',',
+            quotechar='"',
+            encoding='utf-8',
+            on_bad_lines='skip'
+        )
 
         sdn_column_names = [
             'ent_num', 'SDN_Name', 'SDN_Type', 'Program', 'Title',
@@ -90,7 +191,99 @@ class UniversalModularSDNChecker:
                  df[col_name] = ""
 
 
-        return df
+        return df.reset_index(drop=True)
+
+    @staticmethod
+    def _build_remarks_index(df_sdn: pd.DataFrame) -> Dict[str, List[int]]:
+        r"""
+        Construye el índice invertido token -> posiciones de fila en `df_sdn`.
+
+        Cada valor de 'Remarks' se divide en tokens r"\w+"; las posiciones de
+        cada token se guardan en el orden del archivo SDN, sin repetidos.
+
+        Returns
+        -------
+        Dict[str, List[int]]
+            Diccionario de token a lista de posiciones de fila.
+        """
+        tokens = df_sdn['Remarks'].str.findall(_TOKEN_PATTERN).explode().dropna()
+        pares = pd.DataFrame({'token': tokens.to_numpy(), 'fila': tokens.index.to_numpy()})
+        pares = pares.drop_duplicates()
+        return pares.groupby('token', sort=False)['fila'].agg(list).to_dict()
+
+    @staticmethod
+    def _lookup(snapshot: _SDNSnapshot, doc_str: str) -> List[int]:
+        """
+        Devuelve las posiciones de fila SDN de `snapshot` cuyo 'Remarks' contiene
+        `doc_str` como palabra completa.
+
+        Los documentos compuestos solo por caracteres de palabra (el caso normal)
+        se resuelven en el índice invertido. Los que contienen separadores
+        (p. ej. "12.345.678") recurren a la búsqueda regex sobre 'Remarks'.
+        """
+        if _TOKEN_PATTERN.fullmatch(doc_str):
+            return snapshot.index.get(doc_str, [])
+        pattern = re.compile(rf"\b{re.escape(doc_str)}\b")
+        mask = snapshot.df['Remarks'].str.contains(pattern, regex=True, na=False)
+        return mask.to_numpy().nonzero()[0].tolist()
+
+    def as_sanctions_source(self) -> SanctionsSource:
+        """
+        Describe la lista SDN cargada para ingerirla en el índice unificado
+        de sanciones (`SanctionsIndex`).
+
+        Returns
+        -------
+        SanctionsSource
+            Fuente "OFAC" con esquema "token" sobre 'Remarks'.
+        """
+        snapshot = self._snapshot
+        entradas = pd.DataFrame({
+            'texto_busqueda': snapshot.df['Remarks'],
+            'Nombre_OFAC': snapshot.df['SDN_Name'],
+            'Tipo_OFAC': snapshot.df['SDN_Type'],
+            'Comentarios_OFAC': snapshot.df['Remarks'],
+        })
+        return SanctionsSource(
+            nombre="OFAC",
+            esquema="token",
+            columnas=['Nombre_OFAC', 'Tipo_OFAC', 'Comentarios_OFAC'],
+            documento_normalizado=True,
+            entradas=entradas,
+            version=snapshot.version,
+            columna_version='Version_OFAC',
+            columna_nombre='Nombre_OFAC',
+        )
+
+    def screen_names(self, nombres: List[str], umbral: float = 0.8, max_candidatos: int = 3) -> pd.DataFrame:
+        """
+        Verificación difusa por nombre contra 'SDN_Name' de la lista SDN.
+
+        El índice de trigramas (`NameIndex`) se construye la primera vez y se
+        reconstruye solo cuando cambia la versión de la lista.
+
+        Parameters
+        ----------
+        nombres : List[str]
+            Nombres a verificar.
+        umbral : float
+            Similitud mínima entre 0 y 1.
+        max_candidatos : int
+            Máximo de candidatos por nombre.
+
+        Returns
+        -------
+        pd.DataFrame
+            Columnas ['Nombre', 'Fuente', 'Nombre_lista', 'Puntaje', 'Version_OFAC'].
+        """
+        source = self.as_sanctions_source()
+        cached = self._name_index
+        if cached is None or cached[0] != source.version:
+            cached = (source.version, NameIndex([source]))
+            self._name_index = cached
+        df_resultados = cached[1].screen(nombres, umbral=umbral, max_candidatos=max_candidatos)
+        df_resultados['Version_OFAC'] = source.version
+        return df_resultados
 
     def run(self, documentos_a_buscar: List[str], progress_bar=None, progress_label=None) -> pd.DataFrame:
         """
@@ -111,92 +304,63 @@ class UniversalModularSDNChecker:
         -------
         pd.DataFrame
             Un DataFrame con los resultados de la búsqueda. Las columnas son:
-            ['Documento', 'Nombre_OFAC', 'Tipo_OFAC', 'Comentarios_OFAC'].
+            ['Documento', 'Nombre_OFAC', 'Tipo_OFAC', 'Comentarios_OFAC', 'Version_OFAC'].
             Si un documento tiene múltiples coincidencias, se genera una fila por cada una.
+            'Version_OFAC' indica la versión de la lista contra la que se verificó.
+        """
+        # Toda la consulta usa la versión vigente al empezar, aunque haya una recarga en curso.
+        snapshot = self._snapshot
+        df_resultados = self._run_on_snapshot(snapshot, documentos_a_buscar, progress_bar, progress_label)
+        df_resultados['Version_OFAC'] = snapshot.version
+        return df_resultados
+
+    def _run_on_snapshot(self, snapshot: _SDNSnapshot, documentos_a_buscar: List[str], progress_bar=None, progress_label=None) -> pd.DataFrame:
         """
-        resultados = []
+        Ejecuta la verificación de `run` contra una versión concreta de la lista.
+
+        Cada documento único se resuelve una sola vez y el resultado se arma con
+        un merge contra la lista original: una fila por coincidencia, en el orden
+        de entrada, y una fila "Sin coincidencias" para los documentos sin match.
+        El progreso se reporta en unos pocos pasos gruesos, por el canal acotado.
+        """
+        output_columns = ['Documento', 'Nombre_OFAC', 'Tipo_OFAC', 'Comentarios_OFAC']
         total_documentos = len(documentos_a_buscar)
 
         if total_documentos == 0:
-            return pd.DataFrame(columns=['Documento', 'Nombre_OFAC', 'Tipo_OFAC', 'Comentarios_OFAC'])
-
-        # 1. Obtener strings de documentos únicos para construir el filtro combinado inicial.
-        # Filtrar cadenas vacías después de la conversión a string.
-        unique_doc_strs_to_search = sorted(list(set(str(d).strip() for d in documentos_a_buscar if str(d).strip())))
-
-        # Si no hay strings de documentos válidos para buscar, todos los originales resultan en "Sin coincidencias".
-        if not unique_doc_strs_to_search:
-            for i, original_doc_input in enumerate(documentos_a_buscar):
-                resultados.append({
-                    'Documento': str(original_doc_input),
-                    'Nombre_OFAC': "Sin coincidencias",
-                    'Tipo_OFAC': "Sin coincidencias",
-                    'Comentarios_OFAC': "Sin coincidencias"
-                })
-                if progress_bar: progress_bar.progress((i + 1) / total_documentos)
-                if progress_label: progress_label.text(f"Procesando {i + 1} de {total_documentos}")
-            return pd.DataFrame(resultados)
-
-        # 2. Crear un único patrón regex para encontrar *cualquiera* de los documentos únicos.
-        escaped_unique_docs = [re.escape(doc_str) for doc_str in unique_doc_strs_to_search]
-        combined_regex_pattern = r"\b(?:" + r"|".join(escaped_unique_docs) + r")\b"
-        
-        # 3. Filtrar df_sdn para obtener solo filas que potencialmente contengan alguno de los términos.
-        relevant_sdn_mask = self.df_sdn['Remarks'].str.contains(combined_regex_pattern, regex=True, na=False)
-        relevant_sdn_df = self.df_sdn[relevant_sdn_mask]
-
-        # Si ninguna fila de SDN es relevante, todos los documentos serán "Sin coincidencias".
-        if relevant_sdn_df.empty:
-            for i, original_doc_input in enumerate(documentos_a_buscar):
-                resultados.append({
-                    'Documento': str(original_doc_input),
-                    'Nombre_OFAC': "Sin coincidencias",
-                    'Tipo_OFAC': "Sin coincidencias",
-                    'Comentarios_OFAC': "Sin coincidencias"
-                })
-                if progress_bar: progress_bar.progress((i + 1) / total_documentos)
-                if progress_label: progress_label.text(f"Procesando {i + 1} de {total_documentos}")
-            return pd.DataFrame(resultados)
-            
-        # 4. Pre-compilar patrones regex individuales para la búsqueda exacta posterior.
-        individual_patterns = {
-            doc_str: re.compile(rf"\b{re.escape(doc_str)}\b")
-            for doc_str in unique_doc_strs_to_search
-        }
+            return pd.DataFrame(columns=output_columns)
 
-        # 5. Iterar sobre la lista original de documentos_a_buscar.
-        for idx, original_doc_input in enumerate(documentos_a_buscar, start=1):
-            elemento_str = str(original_doc_input).strip()
-            
-            current_match_found = False
-            if elemento_str and elemento_str in individual_patterns:
-                current_pattern = individual_patterns[elemento_str]
-                
-                coincidencias_df = relevant_sdn_df[
-                    relevant_sdn_df['Remarks'].str.contains(current_pattern, regex=True, na=False)
-                ]
-                
-                if not coincidencias_df.empty:
-                    current_match_found = True
-                    for record in coincidencias_df.to_dict('records'):
-                        resultados.append({
-                            'Documento': elemento_str, # Usar el string del documento original buscado
-                            'Nombre_OFAC': record.get('SDN_Name', "N/A"),
-                            'Tipo_OFAC': record.get('SDN_Type', "N/A"),
-                            'Comentarios_OFAC': record.get('Remarks', "") # Remarks debería existir
-                        })
-            
-            if not current_match_found:
-                resultados.append({
-                    'Documento': str(original_doc_input), # Mantener el input original si no hubo match o fue inválido
-                    'Nombre_OFAC': "Sin coincidencias",
-                    'Tipo_OFAC': "Sin coincidencias",
-                    'Comentarios_OFAC': "Sin coincidencias"
-                })
-            
-            if progress_bar:
-                progress_bar.progress(idx / total_documentos)
-            if progress_label:
-                progress_label.text(f"Procesando {idx} de {total_documentos}")
-        
-        return pd.DataFrame(resultados)
\ No newline at end of file
+        progreso = ProgressChannel(progress_bar, progress_label, total_documentos)
+        progreso.report(0.0, f"Normalizando {total_documentos} documentos")
+        documentos = pd.Series([str(d) for d in documentos_a_buscar], dtype=object)
+        elementos = documentos.str.strip()
+
+        # 1. Resolver cada documento único una sola vez contra el índice invertido.
+        progreso.report(0.1, "Buscando coincidencias en la lista SDN")
+        unicos = pd.unique(elementos[elementos != ""])
+        pares = [(doc_str, fila) for doc_str in unicos for fila in self._lookup(snapshot, doc_str)]
+        coincidencias = pd.DataFrame(pares, columns=['elemento', 'fila'])
+        coincidencias['orden'] = range(len(coincidencias))
+
+        # 2. Expandir las coincidencias sobre la lista original (uno a muchos).
+        progreso.report(0.6, "Armando resultados")
+        cruce = pd.DataFrame({'pos': range(total_documentos), 'elemento': elementos}).merge(coincidencias, on='elemento')
+        cruce = cruce.sort_values(['pos', 'orden'], kind='stable')
+        filas = snapshot.df.take(cruce['fila'].to_numpy(dtype='int64'))
+        con_match = pd.DataFrame({
+            'pos': cruce['pos'].to_numpy(),
+            'Documento': cruce['elemento'].to_numpy(),
+            'Nombre_OFAC': filas['SDN_Name'].to_numpy(dtype=object),
+            'Tipo_OFAC': filas['SDN_Type'].to_numpy(dtype=object),
+            'Comentarios_OFAC': filas['Remarks'].to_numpy(dtype=object),
+        })
+
+        # 3. Documentos sin coincidencias (incluye vacíos) conservan su valor original.
+        sin_pos = np.setdiff1d(np.arange(total_documentos), con_match['pos'].to_numpy())
+        sin_match = pd.DataFrame({'pos': sin_pos, 'Documento': documentos.to_numpy()[sin_pos]})
+        for col in output_columns[1:]:
+            sin_match[col] = "Sin coincidencias"
+
+        resultado = pd.concat([con_match, sin_match], ignore_index=True).sort_values('pos', kind='stable')
+        resultado = resultado[output_columns].astype(object).reset_index(drop=True)
+        progreso.report(1.0, f"Procesados {total_documentos} de {total_documentos}", force=True)
+        return resultado
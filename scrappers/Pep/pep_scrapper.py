@@ -1,13 +1,99 @@
 import asyncio
-import aiohttp
-import pandas as pd
+import logging
+import multiprocessing
+import os
 import re
-from bs4 import BeautifulSoup
-from aiohttp import ClientSession, TCPConnector
-from asyncio import Semaphore
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import List, Optional, Tuple
+from bs4 import BeautifulSoup, SoupStrainer
+from aiohttp import ClientSession
+from urllib.parse import urlparse
 
-class FuncionPublicaScraper:
-    def __init__(self, max_concurrent=100, max_retries=3):
+from utils.concurrency import get_adaptive_concurrency
+from utils.network_scraper import NetworkScraper
+from utils.rate_limit import get_rate_limiter
+from utils.retry import CircuitOpenError, RetryableStatus, RetryPolicy, get_circuit_breaker, parse_retry_after, retry_call
+
+# Solo se construye el árbol de las tablas (entre ellas la de resultados); el
+# resto de la página se tokeniza pero se descarta.
+_SOLO_TABLA = SoupStrainer("table")
+_CEDULA_RE = re.compile(r'CEDULA DE CIUDADANIA\s*-\s*(\d+)')
+
+_parse_executor: Optional[ProcessPoolExecutor] = None
+_parse_executor_lock = threading.Lock()
+
+
+def get_parse_executor() -> ProcessPoolExecutor:
+    """
+    Pool de procesos compartido para parsear HTML fuera del event loop.
+
+    Los procesos se crean con "spawn": hacer fork de un proceso con hilos
+    (Streamlit, el loop de trabajos, el vigilante de listas) puede dejar al
+    hijo bloqueado en un lock que otro hilo tenía tomado.
+    """
+    global _parse_executor
+    with _parse_executor_lock:
+        if _parse_executor is None:
+            _parse_executor = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _parse_executor
+
+
+def parse_declaraciones(html: str, cedula: str) -> Tuple[List[dict], float]:
+    """
+    Extrae las declaraciones de `cedula` de la página de resultados.
+
+    Se ejecuta en un proceso del pool de parseo.
+
+    Returns
+    -------
+    Tuple[List[dict], float]
+        Filas del documento ("No existe" si no hay declaraciones) y segundos
+        dedicados al parseo.
+    """
+    inicio = perf_counter()
+    registros = []
+    soup = BeautifulSoup(html, "html.parser", parse_only=_SOLO_TABLA)
+
+    for fila in soup.select("table.table tbody tr"):
+        cedula_raw = fila.select_one("td > p:nth-of-type(2)")
+        if cedula_raw:
+            match = _CEDULA_RE.search(cedula_raw.text)
+            if match and match.group(1).strip() == cedula:
+                celdas = fila.select("td")
+                registros.append({
+                    "Documento": cedula,
+                    "Declarante": fila.select_one("td > p:nth-of-type(1)").text.strip(),
+                    "Entidad": celdas[2].text.strip(),
+                    "Cargo": celdas[3].text.strip(),
+                    "Tipo Declaración": celdas[4].text.strip(),
+                    "Declaración N°": celdas[5].text.strip(),
+                    "Fecha Publicación": celdas[6].text.strip(),
+                    "Estado": celdas[7].text.strip()
+                })
+
+    if not registros:
+        registros.append({
+            "Documento": cedula,
+            "Declarante": "No existe",
+            "Entidad": "No existe",
+            "Cargo": "No existe",
+            "Tipo Declaración": "No existe",
+            "Declaración N°": "No existe",
+            "Fecha Publicación": "No existe",
+            "Estado": "No existe"
+        })
+    return registros, perf_counter() - inicio
+
+
+class FuncionPublicaScraper(NetworkScraper):
+    CACHE_SOURCE = "funcion_publica"
+
+    def __init__(self, max_concurrent=100, max_retries=3, cache_ttl_horas=0.0, min_concurrent=1, latencia_objetivo=10.0,
+                 qps=None, burst=None, umbral_circuito=10, enfriamiento_circuito=30.0):
         self.BASE_URL = "https://www.funcionpublica.gov.co/fdci/consultaCiudadana/index"
         self.HEADERS = {
             "User-Agent": (
@@ -16,11 +102,23 @@ class FuncionPublicaScraper:
                 "Chrome/114.0.0.0 Safari/537.36"
             )
         }
-        self.semaphore = Semaphore(max_concurrent)
-        self.results = []
+        self.max_concurrent = max_concurrent
+        # Límite AIMD de peticiones en vuelo, compartido por todo el proceso hacia el host.
+        host = urlparse(self.BASE_URL).netloc
+        self.host = host
+        self.concurrency = get_adaptive_concurrency(
+            host, min_concurrent, max_concurrent, latencia_objetivo,
+            rate_limiter=get_rate_limiter(host, qps, burst),
+        )
+        self.retry_policy = RetryPolicy(max_retries)
+        self.breaker = get_circuit_breaker(host, umbral_circuito, enfriamiento_circuito)
+        # Segundos acumulados (suma sobre todas las peticiones) en red y en parseo.
+        self.tiempo_red = 0.0
+        self.tiempo_parseo = 0.0
         self.max_retries = max_retries
+        self.cache_ttl_horas = cache_ttl_horas
 
-    async def fetch_declaraciones(self, session: ClientSession, cedula: str):
+    async def _fetch(self, session: ClientSession, cedula: str):
         params = {
             "tipoPersonaId": "25",
             "primerNombre": "",
@@ -34,77 +132,46 @@ class FuncionPublicaScraper:
             "find": "Buscar"
         }
 
-        async with self.semaphore:
-            attempt = 0
-            while attempt < self.max_retries:
-                try:
-                    async with session.get(self.BASE_URL, params=params, headers=self.HEADERS, timeout=30) as response:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, "html.parser")
-                        filas = soup.select("table.table tbody tr")
-                        encontrados = False
-
-                        for fila in filas:
-                            cedula_raw = fila.select_one("td > p:nth-of-type(2)")
-                            if cedula_raw:
-                                match = re.search(r'CEDULA DE CIUDADANIA\s*-\s*(\d+)', cedula_raw.text)
-                                if match and match.group(1).strip() == cedula:
-                                    encontrados = True
-                                    self.results.append({
-                                        "Documento": cedula,
-                                        "Declarante": fila.select_one("td > p:nth-of-type(1)").text.strip(),
-                                        "Entidad": fila.select("td")[2].text.strip(),
-                                        "Cargo": fila.select("td")[3].text.strip(),
-                                        "Tipo Declaración": fila.select("td")[4].text.strip(),
-                                        "Declaración N°": fila.select("td")[5].text.strip(),
-                                        "Fecha Publicación": fila.select("td")[6].text.strip(),
-                                        "Estado": fila.select("td")[7].text.strip()
-                                    })
-
-                        if not encontrados:
-                            self.results.append({
-                                "Documento": cedula,
-                                "Declarante": "No existe",
-                                "Entidad": "No existe",
-                                "Cargo": "No existe",
-                                "Tipo Declaración": "No existe",
-                                "Declaración N°": "No existe",
-                                "Fecha Publicación": "No existe",
-                                "Estado": "No existe"
-                            })
-                        return  # ✅ Si tuvo éxito, salimos del loop
-
-                except Exception:
-                    attempt += 1
-                    if attempt == self.max_retries:
-                        self.results.append({
-                            "Documento": cedula,
-                            "Declarante": "Error",
-                            "Entidad": "Error",
-                            "Cargo": "Error",
-                            "Tipo Declaración": "Error",
-                            "Declaración N°": "Error",
-                            "Fecha Publicación": "Error",
-                            "Estado": "Error"
-                        })
-                    else:
-                        await asyncio.sleep(2)  # ⏱️ Espera antes de reintentar (puedes ajustar este valor)
-
-
-
-    async def run_async(self, nuips, progress_bar=None, progress_label=None):
-        connector = TCPConnector(limit_per_host=10)
-        async with ClientSession(connector=connector) as session:
-            tasks = []
-            for i, cedula in enumerate(nuips):
-                tasks.append(self.fetch_declaraciones(session, cedula))
-                if progress_bar and progress_label:
-                    progress_bar.progress(i / len(nuips))
-                    progress_label.text(f"{i + 1}/{len(nuips)} documentos")
-
-            await asyncio.gather(*tasks)
-
-    # ✅ Esta es la única parte que se cambia: la función ahora es async
-    async def run(self, nuips, progress_bar=None, progress_label=None):
-        await self.run_async(nuips, progress_bar, progress_label)
-        return pd.DataFrame(self.results)
+        async def intento():
+            async with self.concurrency.slot() as outcome:
+                inicio = perf_counter()
+                async with session.get(self.BASE_URL, params=params, headers=self.HEADERS, timeout=30) as response:
+                    outcome.status = response.status
+                    if self.retry_policy.is_retryable_status(response.status):
+                        raise RetryableStatus(response.status, parse_retry_after(response.headers.get("Retry-After")))
+                    html = await response.text()
+                self.tiempo_red += perf_counter() - inicio
+                return html
+
+        try:
+            # Reintentos con backoff exponencial; con el circuito abierto falla de inmediato.
+            html = await retry_call(intento, self.retry_policy, self.breaker, cedula)
+            # El parseo (CPU) corre en otro proceso para no frenar la red.
+            registros, segundos = await asyncio.get_running_loop().run_in_executor(
+                get_parse_executor(), parse_declaraciones, html, cedula
+            )
+            self.tiempo_parseo += segundos
+            return registros
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                logging.warning(f"Consulta fallida para {cedula}: {e}")
+            return [{
+                "Documento": cedula,
+                "Declarante": "Error",
+                "Entidad": "Error",
+                "Cargo": "Error",
+                "Tipo Declaración": "Error",
+                "Declaración N°": "Error",
+                "Fecha Publicación": "Error",
+                "Estado": "Error"
+            }]
+
+    def timing_summary(self) -> str:
+        """Tiempo acumulado en red y en parseo, para el resumen de la ejecución."""
+        return f"Tiempo acumulado: red {self.tiempo_red:.1f} s, parseo HTML {self.tiempo_parseo:.1f} s"
+
+    async def _run_network(self, nuips, progress_bar=None, progress_label=None, registrar=None, acumular=True):
+        self.tiempo_red = self.tiempo_parseo = 0.0
+        resultado = await super()._run_network(nuips, progress_bar, progress_label, registrar, acumular)
+        logging.info(self.timing_summary())
+        return resultado
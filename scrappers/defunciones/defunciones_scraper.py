@@ -1,70 +1,57 @@
-import asyncio
-from typing import List, Optional
-import pandas as pd
-from aiohttp import ClientSession, TCPConnector
-import ssl
+from typing import Optional
+from aiohttp import ClientSession
 import logging
-import random
+from urllib.parse import urlparse
+
+from utils.concurrency import get_adaptive_concurrency
+from utils.network_scraper import NetworkScraper
+from utils.rate_limit import get_rate_limiter
+from utils.retry import CircuitOpenError, RetryableStatus, RetryPolicy, get_circuit_breaker, parse_retry_after, retry_call
 
 # Configura el logging
 logging.basicConfig(level=logging.INFO)
 
-class DefuncionesScraper:
-    def __init__(self, url: str, max_concurrent: int, verify_ssl: bool = False, max_retries: int = 3) -> None:
+class DefuncionesScraper(NetworkScraper):
+    CACHE_SOURCE = "defunciones"
+
+    def __init__(
+        self, url: str, max_concurrent: int, verify_ssl: bool = False, max_retries: int = 3,
+        cache_ttl_horas: float = 0.0, min_concurrent: int = 1, latencia_objetivo: float = 5.0,
+        qps: Optional[float] = None, burst: Optional[int] = None,
+        umbral_circuito: int = 10, enfriamiento_circuito: float = 30.0,
+    ) -> None:
         self.url = url
         self.max_concurrent = max_concurrent
         self.verify_ssl = verify_ssl
         self.max_retries = max_retries
-        self.semaphore = asyncio.Semaphore(max_concurrent)
-
-    def _build_session(self) -> ClientSession:
-        if self.verify_ssl:
-            return ClientSession()
-        else:
-            ssl_ctx = ssl.create_default_context()
-            ssl_ctx.check_hostname = False
-            ssl_ctx.verify_mode = ssl.CERT_NONE
-            connector = TCPConnector(ssl=ssl_ctx)
-            return ClientSession(connector=connector)
+        self.cache_ttl_horas = cache_ttl_horas
+        # Límite AIMD de peticiones en vuelo, compartido por todo el proceso hacia el host.
+        host = urlparse(url).netloc
+        self.host = host
+        self.concurrency = get_adaptive_concurrency(
+            host, min_concurrent, max_concurrent, latencia_objetivo,
+            rate_limiter=get_rate_limiter(host, qps, burst),
+        )
+        self.retry_policy = RetryPolicy(max_retries)
+        self.breaker = get_circuit_breaker(host, umbral_circuito, enfriamiento_circuito)
 
     async def _fetch(self, session: ClientSession, nuip: str) -> dict:
         payload = {"nuip": nuip}
-        for attempt in range(1, self.max_retries + 1):
-            try:
+
+        async def intento() -> dict:
+            async with self.concurrency.slot() as outcome:
                 async with session.post(self.url, json=payload, timeout=10) as resp:
+                    outcome.status = resp.status
+                    if self.retry_policy.is_retryable_status(resp.status):
+                        raise RetryableStatus(resp.status, parse_retry_after(resp.headers.get("Retry-After")))
                     data = await resp.json()
                     vigencia = data.get("vigencia", "No disponible")
                     return {"Documento": nuip, "Vigencia": vigencia}
-            except Exception as e:
-                logging.warning(f"Intento {attempt} fallido para {nuip}: {e}")
-                if attempt < self.max_retries:
-                    wait = random.uniform(1, 3) * attempt
-                    await asyncio.sleep(wait)
-                else:
-                    return {"Documento": nuip, "Vigencia": "Error"}
-
-    async def _limited_task(self, session: ClientSession, doc: str) -> dict:
-        async with self.semaphore:
-            return await self._fetch(session, doc)
-
-    async def run(
-        self, nuips: List[str],
-        progress_bar: Optional[any] = None,
-        progress_label: Optional[any] = None
-    ) -> pd.DataFrame:
-        async with self._build_session() as session:
-            tasks = [self._limited_task(session, nuip) for nuip in nuips]
-            total = len(tasks)
-            resultados = []
-
-            for count, coro in enumerate(asyncio.as_completed(tasks), start=1):
-                res = await coro
-                resultados.append(res)
-
-                if progress_bar:
-                    frac = count / total
-                    progress_bar.progress(frac)
-                    if progress_label:
-                        progress_label.text(f"{count} de {total} ({frac:.1%})")
 
-        return pd.DataFrame(resultados)
+        # Reintentos con backoff exponencial; con el circuito abierto falla de inmediato.
+        try:
+            return await retry_call(intento, self.retry_policy, self.breaker, nuip)
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                logging.warning(f"Consulta fallida para {nuip}: {e}")
+            return {"Documento": nuip, "Vigencia": "Error"}
@@ -1,25 +1,33 @@
-import asyncio
+from typing import Optional
 
-from typing import List
-
-import pandas as pd
-
-from aiohttp import ClientSession, TCPConnector
+from aiohttp import ClientSession
 
 import logging
 
-import random
+from urllib.parse import urlparse
+
+from utils.concurrency import get_adaptive_concurrency
+from utils.network_scraper import NetworkScraper
+from utils.rate_limit import get_rate_limiter
+from utils.retry import CircuitOpenError, RetryableStatus, RetryPolicy, get_circuit_breaker, parse_retry_after, retry_call
 
 # Configura el logging
 logging.basicConfig(level=logging.INFO)
 
-class DeudoresScraper:
+class DeudoresScraper(NetworkScraper):
     """
     Scraper asíncrono para consultar morosidad en Rama Judicial.
-    Usa semáforo y connector para limitar concurrencia.
+    Usa un control adaptativo (AIMD) y el connector para limitar concurrencia.
     """
 
-    def __init__(self, url: str, max_concurrent: int, max_retries: int = 3) -> None:
+    CACHE_SOURCE = "deudores"
+
+    def __init__(
+        self, url: str, max_concurrent: int, max_retries: int = 3, cache_ttl_horas: float = 0.0,
+        min_concurrent: int = 1, latencia_objetivo: float = 10.0,
+        qps: Optional[float] = None, burst: Optional[int] = None,
+        umbral_circuito: int = 10, enfriamiento_circuito: float = 30.0,
+    ) -> None:
         """
         Parameters
         ----------
@@ -27,13 +35,33 @@ class DeudoresScraper:
             Endpoint para POST.
         max_concurrent : int
             Máximo de peticiones concurrentes.
+        min_concurrent : int
+            Mínimo al que puede reducirse la concurrencia adaptativa.
+        latencia_objetivo : float
+            Segundos de respuesta por encima de los cuales se reduce la concurrencia.
+        qps, burst : float, int, opcionales
+            Tasa y ráfaga del limitador compartido del host. Sin qps no se limita la tasa.
         max_retries : int
-            Máximo de reintentos por documento.
+            Máximo de intentos por documento. Solo se reintentan errores de
+            conexión, timeouts y HTTP 408/429/5xx, con backoff exponencial.
+        umbral_circuito, enfriamiento_circuito : int, float
+            Fallos consecutivos que abren el circuito del host y segundos que
+            permanece abierto; mientras tanto las consultas fallan de inmediato.
+        cache_ttl_horas : float
+            Vigencia en horas de los resultados en caché. Con 0 no se usa caché.
         """
         self.url = url
         self.max_concurrent = max_concurrent
         self.max_retries = max_retries
-        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.cache_ttl_horas = cache_ttl_horas
+        host = urlparse(url).netloc
+        self.host = host
+        self.concurrency = get_adaptive_concurrency(
+            host, min_concurrent, max_concurrent, latencia_objetivo,
+            rate_limiter=get_rate_limiter(host, qps, burst),
+        )
+        self.retry_policy = RetryPolicy(max_retries)
+        self.breaker = get_circuit_breaker(host, umbral_circuito, enfriamiento_circuito)
 
     async def _fetch(self, session: ClientSession, doc: str) -> dict:
         """
@@ -42,12 +70,17 @@ class DeudoresScraper:
         Returns
         -------
         dict
-            {'Documento': doc, 'Sancionado': ..., 'Estado': ...}.
+            {'Documento': doc, 'Sancionado': ..., 'Estado': ...}. Con circuito
+            abierto, 'Estado' es "Error" sin haber enviado la petición.
         """
         payload = {"Documento": doc}
-        for attempt in range(1, self.max_retries + 1):
-            try:
+
+        async def intento() -> dict:
+            async with self.concurrency.slot() as outcome:
                 async with session.post(self.url, json=payload, timeout=30) as resp:
+                    outcome.status = resp.status
+                    if self.retry_policy.is_retryable_status(resp.status):
+                        raise RetryableStatus(resp.status, parse_retry_after(resp.headers.get("Retry-After")))
                     if resp.status == 200:
                         data = await resp.json()
                         total = data.get("Total", 0)
@@ -62,50 +95,13 @@ class DeudoresScraper:
                         sancionado = None
                         estado = f"Error {resp.status}"
                     return {"Documento": doc, "Sancionado": sancionado, "Estado": estado}
-            except Exception as e:
-                logging.warning(f"Intento {attempt} fallido para {doc}: {e}")
-                if attempt < self.max_retries:
-                    wait = random.uniform(1, 3) * attempt
-                    await asyncio.sleep(wait)
-                else:
-                    return {"Documento": doc, "Sancionado": None, "Estado": "Error"}
-
-    async def _limited_task(self, session: ClientSession, doc: str) -> dict:
-        """
-        Wrapper que aplica el semáforo para limitar concurrencia.
-        """
-        async with self.semaphore:
-            return await self._fetch(session, doc)
-
-    async def run(
-        self,
-        nuips: List[str],
-        progress_bar,
-        progress_label,
-    ) -> pd.DataFrame:
-        """
-        Ejecuta las consultas de morosidad y actualiza UI.
-
-        Parameters
-        ----------
-        nuips : List[str]
-        progress_bar : st.Progress
-        progress_label : st.Empty
-
-        Returns
-        -------
-        pd.DataFrame
-        """
-        connector = TCPConnector(limit_per_host=self.max_concurrent)
-
-        async with ClientSession(connector=connector) as session:
-            tasks = [self._limited_task(session, str(doc)) for doc in nuips]
-            total = len(tasks)
-            resultados = []
-            for idx, coro in enumerate(asyncio.as_completed(tasks), start=1):
-                resultados.append(await coro)
-                frac = idx / total
-                progress_bar.progress(frac)
-                progress_label.text(f"{idx} de {total} ({frac:.1%})")
 
-        return pd.DataFrame(resultados)
+        try:
+            return await retry_call(intento, self.retry_policy, self.breaker, doc)
+        except RetryableStatus as e:
+            return {"Documento": doc, "Sancionado": None, "Estado": f"Error {e.status}"}
+        except CircuitOpenError:
+            return {"Documento": doc, "Sancionado": None, "Estado": "Error"}
+        except Exception as e:
+            logging.warning(f"Consulta fallida para {doc}: {e}")
+            return {"Documento": doc, "Sancionado": None, "Estado": "Error"}
@@ -0,0 +1,3 @@
+from .sanctions_index import SanctionsIndex, SanctionsSource
+from .portfolio import PortfolioScreener
+from .name_screening import NameIndex
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Verificación difusa de nombres contra listas de sanciones.
+
+Los nombres de las listas se normalizan (mayúsculas, sin tildes ni signos) y se
+descomponen en trigramas de caracteres. Un índice invertido trigrama -> nombres
+actúa como bloqueo: cada nombre de entrada solo se compara con los nombres de
+la lista que comparten alguno de sus trigramas menos frecuentes (filtrado por
+prefijo) y tienen una longitud compatible con el umbral. La similitud es el
+coeficiente de Dice entre los conjuntos de trigramas, 2|A∩B| / (|A| + |B|),
+y se calcula de forma vectorizada por bloques de consultas.
+"""
+
+import math
+import re
+import unicodedata
+from typing import Iterable, List, Set
+
+import numpy as np
+import pandas as pd
+
+from .sanctions_index import NO_MATCH, SanctionsSource
+
+# Máximo de pares (consulta, nombre) expandidos por bloque; acota la memoria.
+_MAX_PAIRS_PER_CHUNK = 4_000_000
+
+_NON_ALNUM = re.compile(r"[^0-9A-Z]+")
+
+
+def normalize_name(nombre: str) -> str:
+    """
+    Normaliza un nombre: sin tildes, en mayúsculas, con los signos reemplazados
+    por espacios y los espacios repetidos colapsados.
+    """
+    sin_tildes = unicodedata.normalize("NFKD", str(nombre))
+    sin_tildes = "".join(c for c in sin_tildes if not unicodedata.combining(c))
+    return _NON_ALNUM.sub(" ", sin_tildes.upper()).strip()
+
+
+def name_trigrams(nombre_normalizado: str) -> Set[str]:
+    """Trigramas de caracteres del nombre, con un espacio de relleno en cada extremo."""
+    if not nombre_normalizado:
+        return set()
+    relleno = f" {nombre_normalizado} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class NameIndex:
+    """
+    Índice de trigramas sobre los nombres de una o varias listas de sanciones.
+
+    Cada nombre distinto por fuente se indexa una sola vez.
+    """
+
+    def __init__(self, sources: Iterable[SanctionsSource]) -> None:
+        """
+        Parameters
+        ----------
+        sources : Iterable[SanctionsSource]
+            Listas a indexar. Se usan las que declaran `columna_nombre`.
+        """
+        frames = [
+            pd.DataFrame({'Fuente': source.nombre, 'Nombre_lista': source.entradas[source.columna_nombre].astype(str)})
+            for source in sources
+            if source.columna_nombre
+        ]
+        nombres = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['Fuente', 'Nombre_lista'])
+        nombres['normalizado'] = nombres['Nombre_lista'].map(normalize_name)
+        nombres = nombres[nombres['normalizado'] != ""].drop_duplicates(['Fuente', 'normalizado'])
+        self.nombres: pd.DataFrame = nombres.reset_index(drop=True)
+
+        self._vocab: dict = {}
+        tids, nids = [], []
+        for nid, normalizado in enumerate(self.nombres['normalizado']):
+            for trigrama in name_trigrams(normalizado):
+                tids.append(self._vocab.setdefault(trigrama, len(self._vocab)))
+                nids.append(nid)
+        tids = np.asarray(tids, dtype=np.int64)
+        nids = np.asarray(nids, dtype=np.int64)
+
+        # Listas de postings en formato CSR: los nombres del trigrama t son
+        # postings[indptr[t]:indptr[t + 1]].
+        orden = np.argsort(tids, kind='stable')
+        self._postings = nids[orden]
+        self._indptr = np.concatenate([[0], np.cumsum(np.bincount(tids, minlength=len(self._vocab)))])
+        self._lengths = np.bincount(nids, minlength=len(self.nombres))
+        # Pares (trigrama, nombre) como claves ordenadas trigrama * N + nombre.
+        self._keys = tids[orden] * max(len(self.nombres), 1) + self._postings
+
+    def screen(self, nombres: List[str], umbral: float = 0.8, max_candidatos: int = 3) -> pd.DataFrame:
+        """
+        Busca los nombres más parecidos de las listas para cada nombre de entrada.
+
+        Parameters
+        ----------
+        nombres : List[str]
+            Nombres a verificar.
+        umbral : float
+            Similitud mínima (Dice sobre trigramas, entre 0 y 1).
+        max_candidatos : int
+            Máximo de candidatos por nombre de entrada.
+
+        Returns
+        -------
+        pd.DataFrame
+            Columnas ['Nombre', 'Fuente', 'Nombre_lista', 'Puntaje'], una fila por
+            candidato ordenados de mayor a menor puntaje, en el orden de entrada.
+            Los nombres sin candidatos aparecen una vez con "Sin coincidencias".
+        """
+        columnas = ['Nombre', 'Fuente', 'Nombre_lista', 'Puntaje']
+        entrada = pd.DataFrame({'Nombre': [str(n) for n in nombres]})
+        if entrada.empty:
+            return pd.DataFrame(columns=columnas)
+        entrada['normalizado'] = entrada['Nombre'].map(normalize_name)
+
+        unicos = entrada['normalizado'].drop_duplicates().tolist()
+        candidatos = self._candidates(unicos, umbral, max_candidatos)
+        candidatos['normalizado'] = np.asarray(unicos, dtype=object)[candidatos['consulta'].to_numpy()]
+        candidatos = candidatos.merge(
+            self.nombres[['Fuente', 'Nombre_lista']], left_on='nombre_id', right_index=True
+        )
+
+        entrada['pos'] = np.arange(len(entrada))
+        resultado = entrada.merge(candidatos, on='normalizado', how='left')
+        resultado = resultado.sort_values(['pos', 'Puntaje'], ascending=[True, False], kind='stable')
+        sin = resultado['Puntaje'].isna()
+        resultado.loc[sin, ['Fuente', 'Nombre_lista']] = NO_MATCH
+        resultado['Puntaje'] = resultado['Puntaje'].round(3).astype(object)
+        resultado.loc[sin, 'Puntaje'] = NO_MATCH
+        return resultado[columnas].reset_index(drop=True)
+
+    def _candidates(self, normalizados: List[str], umbral: float, max_candidatos: int) -> pd.DataFrame:
+        """
+        Calcula los mejores candidatos de cada consulta.
+
+        Se usa filtrado por prefijo: un nombre con Dice >= umbral comparte con la
+        consulta al menos `c` trigramas, así que debe aparecer en alguno de sus
+        `|Q| - c + 1` trigramas menos frecuentes. Solo los postings de ese prefijo
+        generan candidatos; el resto de trigramas únicamente se comprueba para
+        ellos, lo que evita expandir los trigramas muy comunes.
+
+        Returns
+        -------
+        pd.DataFrame
+            Columnas ['consulta', 'nombre_id', 'Puntaje'], donde 'consulta' es la
+            posición en `normalizados`.
+        """
+        frecuencia = np.diff(self._indptr)
+        q_lengths = np.zeros(len(normalizados), dtype=np.int64)
+        prefijo_q, prefijo_t, sufijo_q, sufijo_t = [], [], [], []
+        for qid, normalizado in enumerate(normalizados):
+            trigramas = name_trigrams(normalizado)
+            lq = len(trigramas)
+            q_lengths[qid] = lq
+            if not lq:
+                continue
+            conocidos = [self._vocab[t] for t in trigramas if t in self._vocab]
+            conocidos.sort(key=frecuencia.__getitem__)
+            # Los trigramas desconocidos (frecuencia 0) ocupan primero el prefijo.
+            ln_min = math.ceil(umbral * lq / (2 - umbral) - 1e-9)
+            minimo = math.ceil(umbral * (lq + ln_min) / 2 - 1e-9)
+            largo_prefijo = max(lq - minimo + 1 - (lq - len(conocidos)), 0)
+            prefijo_q.extend([qid] * min(largo_prefijo, len(conocidos)))
+            prefijo_t.extend(conocidos[:largo_prefijo])
+            sufijo_q.extend([qid] * max(len(conocidos) - largo_prefijo, 0))
+            sufijo_t.extend(conocidos[largo_prefijo:])
+
+        prefijo_q = np.asarray(prefijo_q, dtype=np.int64)
+        prefijo_t = np.asarray(prefijo_t, dtype=np.int64)
+        sufijo_t = np.asarray(sufijo_t, dtype=np.int64)
+        sufijo_indptr = np.concatenate([[0], np.cumsum(np.bincount(np.asarray(sufijo_q, dtype=np.int64), minlength=len(normalizados)))])
+
+        volumen = frecuencia[prefijo_t]
+        # Bloques de consultas completas con a lo sumo ~_MAX_PAIRS_PER_CHUNK pares
+        # cada uno; `bloque` es no decreciente porque prefijo_q viene ordenado.
+        volumen_q = np.bincount(prefijo_q, weights=volumen, minlength=len(normalizados))
+        bloque = (np.cumsum(volumen_q) // _MAX_PAIRS_PER_CHUNK).astype(np.int64)[prefijo_q]
+
+        partes = []
+        for b in np.unique(bloque):
+            inicio, fin = np.searchsorted(bloque, b, side='left'), np.searchsorted(bloque, b, side='right')
+            partes.append(self._score_chunk(
+                prefijo_q[inicio:fin], prefijo_t[inicio:fin], sufijo_indptr, sufijo_t, q_lengths, umbral
+            ))
+        if not partes:
+            return pd.DataFrame({
+                'consulta': np.array([], dtype=np.int64),
+                'nombre_id': np.array([], dtype=np.int64),
+                'Puntaje': np.array([], dtype=float),
+            })
+
+        puntajes = pd.concat(partes, ignore_index=True)
+        puntajes = puntajes.sort_values(['consulta', 'Puntaje'], ascending=[True, False], kind='stable')
+        return puntajes.groupby('consulta', sort=False).head(max_candidatos).reset_index(drop=True)
+
+    def _score_chunk(self, prefijo_q, prefijo_t, sufijo_indptr, sufijo_t, q_lengths, umbral: float) -> pd.DataFrame:
+        """
+        Genera candidatos desde los trigramas del prefijo, aplica el filtro de
+        longitud y completa el conteo de trigramas compartidos con el sufijo.
+        """
+        n = max(len(self.nombres), 1)
+        consultas, nombres = self._gather(prefijo_q, prefijo_t)
+        claves, compartidos = np.unique(consultas * n + nombres, return_counts=True)
+        consulta, nombre_id = claves // n, claves % n
+
+        # Filtro de longitud: Dice >= umbral exige |N| en [t|Q|/(2-t), (2-t)|Q|/t].
+        lq, ln = q_lengths[consulta], self._lengths[nombre_id]
+        ok = (ln * (2 - umbral) >= umbral * lq - 1e-9) & (ln * umbral <= (2 - umbral) * lq + 1e-9)
+        consulta, nombre_id, compartidos = consulta[ok], nombre_id[ok], compartidos[ok]
+
+        # Cota superior: aunque comparta todo el sufijo, el par debe poder llegar al umbral.
+        largo_sufijo = sufijo_indptr[consulta + 1] - sufijo_indptr[consulta]
+        lq, ln = q_lengths[consulta], self._lengths[nombre_id]
+        ok = 2.0 * (compartidos + largo_sufijo) >= umbral * (lq + ln) - 1e-9
+        consulta, nombre_id, compartidos = consulta[ok], nombre_id[ok], compartidos[ok]
+
+        # Trigramas del sufijo: se busca cada par (trigrama, nombre) en los postings.
+        largo_sufijo = sufijo_indptr[consulta + 1] - sufijo_indptr[consulta]
+        par = np.repeat(np.arange(len(consulta)), largo_sufijo)
+        offsets = np.repeat(sufijo_indptr[consulta] - (np.cumsum(largo_sufijo) - largo_sufijo), largo_sufijo) + np.arange(int(largo_sufijo.sum()))
+        sondas = sufijo_t[offsets] * n + nombre_id[par]
+        posiciones = np.minimum(np.searchsorted(self._keys, sondas), len(self._keys) - 1)
+        encontrados = self._keys[posiciones] == sondas
+        compartidos = compartidos + np.bincount(par, weights=encontrados, minlength=len(consulta)).astype(np.int64)
+
+        dice = 2.0 * compartidos / (q_lengths[consulta] + self._lengths[nombre_id])
+        ok = dice >= umbral
+        return pd.DataFrame({'consulta': consulta[ok], 'nombre_id': nombre_id[ok], 'Puntaje': dice[ok]})
+
+    def _gather(self, q_ids: np.ndarray, t_ids: np.ndarray):
+        """Expande cada par (consulta, trigrama) a los nombres de sus postings."""
+        inicios = self._indptr[t_ids]
+        volumen = self._indptr[t_ids + 1] - inicios
+        consultas = np.repeat(q_ids, volumen)
+        offsets = np.repeat(inicios - (np.cumsum(volumen) - volumen), volumen) + np.arange(int(volumen.sum()))
+        return consultas, self._postings[offsets]
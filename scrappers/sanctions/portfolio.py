@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Re-verificación incremental de una cartera almacenada contra listas de sanciones.
+
+La cartera (documentos de clientes) y, por cada lista, la huella de cada entrada
+y las coincidencias vigentes se guardan en disco. Cuando una lista cambia, solo
+sus entradas nuevas o modificadas se cruzan contra la cartera, y solo se
+reportan las coincidencias que aparecen ("Nueva") o desaparecen ("Eliminada").
+Una entrada modificada cuenta como eliminada en su versión anterior y nueva en
+la actual.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from .sanctions_index import KEY_SCHEMES, SanctionsSource, normalize_documents
+
+DEFAULT_PORTFOLIO_DIR = ".cache/cartera"
+
+NUEVA = "Nueva"
+ELIMINADA = "Eliminada"
+
+
+def _entry_ids(entradas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Identifica cada entrada por la huella de su contenido y el número de
+    ocurrencia de esa huella (para entradas idénticas repetidas).
+    """
+    huella = pd.util.hash_pandas_object(entradas, index=False).to_numpy()
+    ocurrencia = pd.Series(huella).groupby(huella).cumcount().to_numpy()
+    return pd.DataFrame({'huella': huella, 'ocurrencia': ocurrencia}, index=entradas.index)
+
+
+def _ids_in(frame: pd.DataFrame, ids: pd.DataFrame) -> np.ndarray:
+    """Máscara de las filas de `frame` cuyo (huella, ocurrencia) está en `ids`."""
+    clave = pd.MultiIndex.from_frame(frame[['huella', 'ocurrencia']])
+    return clave.isin(pd.MultiIndex.from_frame(ids[['huella', 'ocurrencia']]))
+
+
+class PortfolioScreener:
+    """
+    Cartera de documentos almacenada con sus coincidencias por lista.
+
+    Uso típico: `set_documents` una vez y luego `rescreen(checker)` cada vez que
+    el verificador de una lista cargue una versión nueva. La primera llamada
+    para una lista verifica la cartera completa y reporta todas sus
+    coincidencias como nuevas.
+    """
+
+    def __init__(self, portfolio_dir: str = DEFAULT_PORTFOLIO_DIR) -> None:
+        """
+        Parameters
+        ----------
+        portfolio_dir : str
+            Directorio donde se guarda el estado de la cartera.
+        """
+        self.portfolio_dir = Path(portfolio_dir)
+        self.portfolio_dir.mkdir(parents=True, exist_ok=True)
+        estado_path = self.portfolio_dir / "estado.json"
+        self.estado: Dict[str, dict] = (
+            json.loads(estado_path.read_text(encoding="utf-8")) if estado_path.exists() else {}
+        )
+        documentos_path = self.portfolio_dir / "documentos.parquet"
+        self.documentos: pd.Series = (
+            pd.read_parquet(documentos_path)['Documento'] if documentos_path.exists()
+            else pd.Series([], dtype=object, name='Documento')
+        )
+
+    def set_documents(self, documentos: List[str]) -> None:
+        """
+        Reemplaza la cartera. Se descartan las coincidencias almacenadas, de modo
+        que el siguiente `rescreen` de cada lista la verifica completa.
+        """
+        unicos = pd.unique(pd.Series([str(d) for d in documentos], dtype=object))
+        self.documentos = pd.Series(unicos, dtype=object, name='Documento')
+        self.documentos.to_frame().to_parquet(self.portfolio_dir / "documentos.parquet", index=False)
+        for fuente in list(self.estado):
+            for sufijo in ("entradas", "hits"):
+                (self.portfolio_dir / f"{fuente}.{sufijo}.parquet").unlink(missing_ok=True)
+        self.estado = {}
+        self._save_estado()
+
+    def hits(self, fuente: str) -> pd.DataFrame:
+        """Coincidencias vigentes de la cartera en la lista `fuente`."""
+        path = self.portfolio_dir / f"{fuente}.hits.parquet"
+        if not path.exists():
+            return pd.DataFrame(columns=['Documento', 'huella', 'ocurrencia'])
+        return pd.read_parquet(path)
+
+    @staticmethod
+    def hits_template(source: SanctionsSource) -> pd.DataFrame:
+        """DataFrame vacío con las columnas de coincidencias de una lista."""
+        return pd.DataFrame({
+            'Documento': pd.Series(dtype=object),
+            'huella': pd.Series(dtype=np.uint64),
+            'ocurrencia': pd.Series(dtype=np.int64),
+            **{col: pd.Series(dtype=object) for col in source.columnas},
+        })
+
+    def rescreen(self, checker) -> pd.DataFrame:
+        """
+        Actualiza las coincidencias de la cartera con la versión vigente de la
+        lista del verificador.
+
+        Parameters
+        ----------
+        checker : UniversalModularSDNChecker | UniversalModularEUChecker
+            Verificador con `as_sanctions_source()`.
+
+        Returns
+        -------
+        pd.DataFrame
+            Solo los cambios, con columnas ['Cambio', 'Documento', *columnas de
+            la lista]. 'Cambio' es "Nueva" o "Eliminada". Si la versión de la
+            lista no cambió desde la última llamada, el resultado está vacío.
+        """
+        source: SanctionsSource = checker.as_sanctions_source()
+        columnas = ['Documento', *source.columnas]
+        if source.columna_version:
+            columnas.append(source.columna_version)
+
+        previo = self.estado.get(source.nombre)
+        if previo is not None and previo["version"] == source.version:
+            return pd.DataFrame(columns=['Cambio', *columnas])
+
+        entradas = source.entradas.reset_index(drop=True)
+        ids = _entry_ids(entradas[['texto_busqueda', *source.columnas]])
+        entradas = pd.concat([entradas, ids], axis=1)
+
+        entradas_path = self.portfolio_dir / f"{source.nombre}.entradas.parquet"
+        if previo is not None and entradas_path.exists():
+            ids_previos = pd.read_parquet(entradas_path)
+        else:
+            ids_previos = pd.DataFrame({'huella': np.array([], dtype=np.uint64), 'ocurrencia': np.array([], dtype=np.int64)})
+
+        agregadas = entradas[~_ids_in(ids, ids_previos)]
+        eliminadas = ids_previos[~_ids_in(ids_previos, ids)]
+
+        hits_previos = self.hits(source.nombre) if previo is not None else self.hits_template(source)
+        es_eliminado = _ids_in(hits_previos, eliminadas)
+        hits_eliminados = hits_previos[es_eliminado]
+        hits_nuevos = self._match_entries(source, agregadas)
+        if source.columna_version:
+            hits_nuevos[source.columna_version] = source.version
+
+        hits_vigentes = pd.concat([hits_previos[~es_eliminado], hits_nuevos], ignore_index=True)
+        hits_vigentes.to_parquet(self.portfolio_dir / f"{source.nombre}.hits.parquet", index=False)
+        ids.to_parquet(entradas_path, index=False)
+        self.estado[source.nombre] = {"version": source.version, "entradas": len(entradas)}
+        self._save_estado()
+
+        cambios = pd.concat([
+            hits_nuevos.assign(Cambio=NUEVA),
+            hits_eliminados.assign(Cambio=ELIMINADA),
+        ], ignore_index=True)
+        return cambios.reindex(columns=['Cambio', *columnas]).sort_values(['Documento', 'Cambio'], kind='stable').reset_index(drop=True)
+
+    def _match_entries(self, source: SanctionsSource, entradas: pd.DataFrame) -> pd.DataFrame:
+        """
+        Cruza un subconjunto de entradas de la lista contra toda la cartera.
+
+        Returns
+        -------
+        pd.DataFrame
+            Una fila por (documento, entrada) coincidente, con 'Documento',
+            'huella', 'ocurrencia' y las columnas de la lista.
+        """
+        salida = ['Documento', 'huella', 'ocurrencia', *source.columnas]
+        if entradas.empty or self.documentos.empty:
+            return self.hits_template(source)
+
+        esquema = KEY_SCHEMES[source.esquema]
+        normalizados = normalize_documents(self.documentos, source.esquema)
+        indexable = normalizados.str.fullmatch(esquema["clave_doc"].pattern).astype(bool)
+        cartera = pd.DataFrame({'original': self.documentos, 'clave': normalizados})
+
+        claves = entradas['texto_busqueda'].str.findall(esquema["indice"]).explode().dropna()
+        pares = pd.DataFrame({'clave': claves.to_numpy(dtype=object), 'fila': claves.index.to_numpy()}).drop_duplicates()
+        cruce = cartera[indexable.to_numpy()].merge(pares, on='clave')
+
+        # Documentos sin forma de clave: regex solo sobre las entradas recibidas.
+        fallback = []
+        for original, clave in cartera[(~indexable & (normalizados != "")).to_numpy()].itertuples(index=False):
+            pattern = re.compile(esquema["regex"].format(doc=re.escape(clave)))
+            for fila in entradas.index[entradas['texto_busqueda'].str.contains(pattern, regex=True, na=False)]:
+                fallback.append((original, clave, fila))
+        if fallback:
+            cruce = pd.concat([cruce, pd.DataFrame(fallback, columns=['original', 'clave', 'fila'])], ignore_index=True)
+
+        hits = cruce.merge(entradas, left_on='fila', right_index=True)
+        hits['Documento'] = hits['clave'] if source.documento_normalizado else hits['original']
+        return hits.sort_values(['original', 'fila'], kind='stable')[salida].reset_index(drop=True)
+
+    def _save_estado(self) -> None:
+        (self.portfolio_dir / "estado.json").write_text(
+            json.dumps(self.estado, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+Índice unificado de listas de sanciones (OFAC, UE, ...).
+
+Todas las listas cargadas se guardan en una sola estructura en disco formada por
+dos tablas Arrow (Feather sin compresión, por lo que se abren con memory-map):
+
+- `entradas.arrow`: una fila por entrada de lista, con su etiqueta de fuente,
+  el texto sobre el que se busca y las columnas de resultado de cada lista.
+- `claves.arrow`: pares (esquema, clave) -> entrada_id, con las claves ya
+  normalizadas según el esquema de la fuente.
+
+Cada fuente declara un esquema de claves ("token" para OFAC, "numerico" para la
+UE). Un lote de documentos se normaliza una vez por esquema y se cruza con
+`claves` en un único hash join, sin importar cuántas listas haya cargadas.
+"""
+
+import json
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+DEFAULT_INDEX_DIR = ".cache/indice_sanciones"
+
+NO_MATCH = "Sin coincidencias"
+
+# Esquemas de claves. Para cada uno:
+# - "indice": patrón que extrae las claves del texto de búsqueda de la lista.
+# - "clave_doc": forma que debe tener un documento normalizado para resolverse
+#   en el índice; los demás recurren a "regex" sobre el texto de búsqueda.
+KEY_SCHEMES = {
+    # Documento como palabra completa: r"\b{doc}\b" (OFAC, 'Remarks').
+    "token": {
+        "indice": re.compile(r"\w+"),
+        "clave_doc": re.compile(r"\w+"),
+        "regex": r"\b{doc}\b",
+    },
+    # Documento numérico ignorando ceros a la izquierda: r"\b0*{doc}(?:\D|$)" (UE, 'Iden_number').
+    "numerico": {
+        "indice": re.compile(r"\b0*([1-9]\d*)"),
+        "clave_doc": re.compile(r"[1-9]\d*"),
+        "regex": r"\b0*{doc}(?:\D|$)",
+    },
+}
+
+
+@dataclass(frozen=True)
+class SanctionsSource:
+    """
+    Descripción de una lista de sanciones para ingerir en el índice.
+
+    Attributes
+    ----------
+    nombre : str
+        Etiqueta de la fuente (p. ej. "OFAC").
+    esquema : str
+        Esquema de claves, una de las llaves de `KEY_SCHEMES`.
+    columnas : List[str]
+        Columnas de resultado de la lista, sin incluir 'Documento'.
+    documento_normalizado : bool
+        Si es True, las filas con coincidencia reportan el documento
+        normalizado; si es False, el documento tal como se recibió.
+    entradas : pd.DataFrame
+        Una fila por entrada, con 'texto_busqueda' y las `columnas`.
+    version : str
+        Identificador de la versión de la lista (p. ej. hash del archivo).
+    columna_version : str
+        Columna de resultado donde se informa `version` en todas las filas de
+        la fuente. Vacío si la fuente no la reporta.
+    columna_nombre : str
+        Columna de `entradas` con el nombre de la persona o entidad, para la
+        verificación por nombre (`NameIndex`). Vacío si la fuente no la tiene.
+    """
+
+    nombre: str
+    esquema: str
+    columnas: List[str]
+    documento_normalizado: bool
+    entradas: pd.DataFrame
+    version: str = ""
+    columna_version: str = ""
+    columna_nombre: str = ""
+
+
+def normalize_documents(documentos: pd.Series, esquema: str) -> pd.Series:
+    """
+    Normaliza documentos según el esquema: "token" elimina espacios en los
+    extremos y "numerico" además elimina los ceros a la izquierda.
+    """
+    if esquema == "numerico":
+        return documentos.str.lstrip('0').str.strip()
+    return documentos.str.strip()
+
+
+class SanctionsIndex:
+    """
+    Índice de solo lectura sobre una o varias listas de sanciones.
+
+    Se construye con `build` a partir de fuentes `SanctionsSource` y se abre con
+    `SanctionsIndex(index_dir)`; las tablas quedan mapeadas en memoria.
+    """
+
+    MANIFEST = "manifest.json"
+    ENTRADAS = "entradas.arrow"
+    CLAVES = "claves.arrow"
+
+    def __init__(self, index_dir: str = DEFAULT_INDEX_DIR) -> None:
+        """
+        Abre un índice existente.
+
+        Parameters
+        ----------
+        index_dir : str
+            Directorio del índice creado con `build`.
+
+        Raises
+        ------
+        FileNotFoundError
+            Si el directorio no contiene un índice.
+        """
+        self.index_dir = Path(index_dir)
+        manifest_path = self.index_dir / self.MANIFEST
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"No existe un índice de sanciones en: {index_dir}")
+        self.manifest: Dict[str, dict] = json.loads(manifest_path.read_text(encoding="utf-8"))
+        self.entradas: pa.Table = feather.read_table(self.index_dir / self.ENTRADAS, memory_map=True)
+        self.claves: pa.Table = feather.read_table(self.index_dir / self.CLAVES, memory_map=True)
+
+    @property
+    def fuentes(self) -> List[str]:
+        """Etiquetas de las fuentes cargadas, en orden de ingesta."""
+        return list(self.manifest["fuentes"])
+
+    @property
+    def versions(self) -> Dict[str, str]:
+        """Versión de cada fuente cargada."""
+        return {nombre: meta["version"] for nombre, meta in self.manifest["fuentes"].items()}
+
+    @classmethod
+    def build(cls, sources: Iterable[SanctionsSource], index_dir: str = DEFAULT_INDEX_DIR) -> "SanctionsIndex":
+        """
+        Construye el índice en disco a partir de las fuentes y lo abre.
+
+        El índice se escribe en un directorio temporal propio y se publica
+        renombrándolo a `index_dir`, de modo que un lector nunca ve un índice a
+        medio escribir. Un `index_dir` existente nunca se reemplaza: se da por
+        construido (por otro hilo o proceso) y se abre tal cual.
+
+        Parameters
+        ----------
+        sources : Iterable[SanctionsSource]
+            Listas a ingerir. Las etiquetas deben ser únicas.
+        index_dir : str
+            Directorio destino. Debe identificar las versiones de las fuentes.
+
+        Returns
+        -------
+        SanctionsIndex
+            Índice abierto sobre `index_dir`.
+        """
+        target = Path(index_dir)
+        if (target / cls.MANIFEST).exists():
+            return cls(str(target))
+
+        entradas_frames, claves_frames = [], []
+        fuentes: Dict[str, dict] = {}
+        offset = 0
+
+        for source in sources:
+            if source.nombre in fuentes:
+                raise ValueError(f"Fuente duplicada en el índice de sanciones: {source.nombre}")
+            if source.esquema not in KEY_SCHEMES:
+                raise ValueError(f"Esquema de claves desconocido: {source.esquema}")
+
+            entradas = source.entradas.reset_index(drop=True)
+            entrada_ids = np.arange(offset, offset + len(entradas), dtype=np.int64)
+
+            frame = entradas[['texto_busqueda', *source.columnas]].astype(str)
+            frame.insert(0, 'entrada_id', entrada_ids)
+            frame.insert(1, 'fuente', source.nombre)
+            frame.insert(2, 'esquema', source.esquema)
+            entradas_frames.append(frame)
+
+            claves = frame['texto_busqueda'].str.findall(KEY_SCHEMES[source.esquema]["indice"]).explode().dropna()
+            claves_frames.append(pd.DataFrame({
+                'esquema': source.esquema,
+                'clave': claves.to_numpy(dtype=object),
+                'entrada_id': entrada_ids[claves.index.to_numpy()],
+            }).drop_duplicates())
+
+            fuentes[source.nombre] = {
+                "esquema": source.esquema,
+                "columnas": list(source.columnas),
+                "documento_normalizado": source.documento_normalizado,
+                "version": source.version,
+                "columna_version": source.columna_version,
+                "entradas": len(entradas),
+            }
+            offset += len(entradas)
+
+        if not fuentes:
+            raise ValueError("Se necesita al menos una fuente para construir el índice de sanciones.")
+
+        entradas_df = pd.concat(entradas_frames, ignore_index=True)
+        claves_df = pd.concat(claves_frames, ignore_index=True)
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{target.name}.", suffix=".tmp", dir=target.parent))
+        try:
+            feather.write_feather(entradas_df, tmp_dir / cls.ENTRADAS, compression="uncompressed")
+            feather.write_feather(claves_df, tmp_dir / cls.CLAVES, compression="uncompressed")
+            (tmp_dir / cls.MANIFEST).write_text(json.dumps({"fuentes": fuentes}, ensure_ascii=False, indent=2), encoding="utf-8")
+            try:
+                tmp_dir.rename(target)
+            except OSError:
+                # Otro constructor publicó antes el mismo índice; se usa el suyo.
+                if not (target / cls.MANIFEST).exists():
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return cls(str(target))
+
+    def screen(self, documentos_a_buscar: List[str], fuentes: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Verifica un lote de documentos contra todas las listas cargadas en una sola pasada.
+
+        Parameters
+        ----------
+        documentos_a_buscar : List[str]
+            Documentos a verificar.
+        fuentes : List[str], opcional
+            Subconjunto de fuentes a reportar. Por defecto, todas.
+
+        Returns
+        -------
+        Dict[str, pd.DataFrame]
+            Un DataFrame por fuente con las mismas columnas que produce el
+            verificador de esa lista: ['Documento', *columnas] más la columna de
+            versión de la fuente, si la declara. Los documentos
+            sin coincidencias aparecen con "Sin coincidencias"; los que tienen
+            varias, con una fila por coincidencia en el orden de la lista.
+        """
+        fuentes = list(self.manifest["fuentes"]) if fuentes is None else list(fuentes)
+        metas = {nombre: self.manifest["fuentes"][nombre] for nombre in fuentes}
+        documentos = pd.Series([str(d) for d in documentos_a_buscar], dtype=object)
+
+        if documentos.empty:
+            return {
+                nombre: pd.DataFrame(columns=self._output_columns(meta))
+                for nombre, meta in metas.items()
+            }
+
+        esquemas = sorted({meta["esquema"] for meta in metas.values()})
+        normalizados = {esquema: normalize_documents(documentos, esquema) for esquema in esquemas}
+        hits = self._match(normalizados)
+        hits = hits[hits['fuente'].isin(fuentes)]
+
+        return {
+            nombre: self._assemble(documentos, normalizados[meta["esquema"]], hits[hits['fuente'] == nombre], meta)
+            for nombre, meta in metas.items()
+        }
+
+    def _match(self, normalizados: Dict[str, pd.Series]) -> pd.DataFrame:
+        """
+        Resuelve los documentos normalizados contra el índice.
+
+        Returns
+        -------
+        pd.DataFrame
+            Columnas ['pos', 'entrada_id', 'fuente', 'texto_busqueda', ...]: una
+            fila por (posición del documento en el lote, entrada coincidente).
+        """
+        lotes, fallback = [], []
+        for esquema, claves in normalizados.items():
+            # Cada clave única se resuelve una sola vez; luego se expande a sus posiciones.
+            unicas = pd.Series(claves[claves != ""].unique(), dtype=object)
+            indexable = unicas.str.fullmatch(KEY_SCHEMES[esquema]["clave_doc"].pattern).astype(bool)
+            lotes.append(pd.DataFrame({'esquema': esquema, 'clave': unicas[indexable]}))
+            fallback.extend((esquema, clave) for clave in unicas[~indexable])
+
+        lote = pa.Table.from_pandas(
+            pd.concat(lotes, ignore_index=True),
+            schema=pa.schema([self.claves.schema.field('esquema'), self.claves.schema.field('clave')]),
+            preserve_index=False,
+        )
+        cruce = self.claves.join(lote, keys=['esquema', 'clave'], join_type='inner')
+        pares = cruce.select(['esquema', 'clave', 'entrada_id']).to_pandas()
+
+        if fallback:
+            pares = pd.concat([pares, self._match_fallback(fallback)], ignore_index=True)
+
+        columnas = ['pos', 'entrada_id'] + [c for c in self.entradas.column_names if c != 'entrada_id']
+        if pares.empty:
+            return pd.DataFrame(columns=columnas)
+
+        posiciones = pd.concat(
+            pd.DataFrame({'esquema': esquema, 'clave': claves.to_numpy(), 'pos': np.arange(len(claves))})
+            for esquema, claves in normalizados.items()
+        )
+        pares = pares.merge(posiciones, on=['esquema', 'clave'])
+
+        entrada_ids = np.unique(pares['entrada_id'].to_numpy())
+        entradas = self.entradas.take(pa.array(entrada_ids)).to_pandas()
+        return pares[['pos', 'entrada_id']].merge(entradas, on='entrada_id')[columnas]
+
+    def _match_fallback(self, fallback: List[tuple]) -> pd.DataFrame:
+        """
+        Resuelve con regex los documentos que no tienen forma de clave del
+        esquema (p. ej. "12.345.678" en OFAC o pasaportes en la UE).
+        """
+        textos = self.entradas.select(['entrada_id', 'esquema', 'texto_busqueda']).to_pandas()
+        pares = []
+        for esquema, clave in fallback:
+            candidatos = textos[textos['esquema'] == esquema]
+            pattern = re.compile(KEY_SCHEMES[esquema]["regex"].format(doc=re.escape(clave)))
+            mask = candidatos['texto_busqueda'].str.contains(pattern, regex=True, na=False)
+            pares.extend((esquema, clave, entrada_id) for entrada_id in candidatos.loc[mask, 'entrada_id'])
+        return pd.DataFrame(pares, columns=['esquema', 'clave', 'entrada_id'])
+
+    @staticmethod
+    def _output_columns(meta: dict) -> List[str]:
+        """Columnas de resultado de una fuente, en el orden de su verificador."""
+        columnas = ['Documento', *meta["columnas"]]
+        if meta.get("columna_version"):
+            columnas.append(meta["columna_version"])
+        return columnas
+
+    @staticmethod
+    def _assemble(documentos: pd.Series, normalizados: pd.Series, hits: pd.DataFrame, meta: dict) -> pd.DataFrame:
+        """
+        Arma el DataFrame de resultados de una fuente a partir de sus coincidencias.
+        """
+        columnas = meta["columnas"]
+        hits = hits.sort_values(['pos', 'entrada_id'], kind='stable')
+        doc_source = normalizados if meta["documento_normalizado"] else documentos
+
+        con_match = hits[['pos', *columnas]].copy()
+        con_match.insert(1, 'Documento', doc_source.to_numpy()[hits['pos'].to_numpy(dtype=np.int64)])
+
+        sin_pos = np.setdiff1d(np.arange(len(documentos)), hits['pos'].to_numpy(dtype=np.int64))
+        sin_match = pd.DataFrame({'pos': sin_pos, 'Documento': documentos.to_numpy()[sin_pos]})
+        for col in columnas:
+            sin_match[col] = NO_MATCH
+
+        resultado = pd.concat([con_match, sin_match], ignore_index=True)
+        resultado = resultado.sort_values('pos', kind='stable')
+        resultado = resultado[['Documento', *columnas]].reset_index(drop=True)
+        if meta.get("columna_version"):
+            resultado[meta["columna_version"]] = meta["version"]
+        return resultado
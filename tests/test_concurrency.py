@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+from utils.concurrency import get_adaptive_concurrency
+from utils.rate_limit import TokenBucket
+
+
+def test_un_controlador_por_host():
+    a = get_adaptive_concurrency("limite.test", 1, 4, 5.0)
+    b = get_adaptive_concurrency("limite.test", 1, 4, 5.0)
+    assert a is b
+    assert get_adaptive_concurrency("otro.test", 1, 4, 5.0) is not a
+
+
+def test_limite_compartido_entre_event_loops():
+    controlador = get_adaptive_concurrency("loops.test", 3, 3, 5.0)
+    en_vuelo, maximo = 0, 0
+    lock = threading.Lock()
+
+    async def peticion():
+        nonlocal en_vuelo, maximo
+        async with controlador.slot():
+            with lock:
+                en_vuelo += 1
+                maximo = max(maximo, en_vuelo)
+            await asyncio.sleep(0.01)
+            with lock:
+                en_vuelo -= 1
+
+    async def ejecucion():
+        await asyncio.gather(*(peticion() for _ in range(20)))
+
+    hilos = [threading.Thread(target=asyncio.run, args=(ejecucion(),)) for _ in range(3)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert maximo == 3
+    assert controlador._en_vuelo == 0
+
+
+def test_otras_cotas_no_cambian_el_controlador_en_uso(caplog):
+    limitador = TokenBucket(5, 5)
+    controlador = get_adaptive_concurrency("cotas.test", 1, 4, 5.0, rate_limiter=limitador)
+
+    assert get_adaptive_concurrency("cotas.test", 2, 50, 1.0) is controlador
+
+    assert (controlador.min_concurrent, controlador.max_concurrent, controlador.latencia_objetivo) == (1, 4, 5.0)
+    assert controlador.rate_limiter is limitador
+    assert "se ignoran" in caplog.text
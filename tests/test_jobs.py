@@ -0,0 +1,55 @@
+import time
+
+import pandas as pd
+import pytest
+
+import utils.jobs as jobs
+from utils.jobs import COMPLETADO, FALLIDO, JobManager
+
+
+def _esperar(manager, job):
+    limite = time.monotonic() + 5
+    while not manager.get(job.id).finished:
+        assert time.monotonic() < limite
+        time.sleep(0.01)
+    return manager.get(job.id)
+
+
+@pytest.fixture
+def llamadas(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    registro = []
+
+    async def run_scraper(scraper_name, nuips, barra, etiqueta, modo, sink, run_id=None):
+        registro.append((run_id, list(nuips)))
+        if len(registro) == 1 and scraper_name == "falla":
+            return None, "fallo"
+        sink.write_frame(pd.DataFrame({"Documento": nuips}))
+        sink.close()
+        return sink, "ok"
+
+    monkeypatch.setattr(jobs, "run_scraper", run_scraper)
+    return registro
+
+
+def test_trabajos_del_mismo_archivo_no_comparten_bitacora(tmp_path, llamadas):
+    manager = JobManager(str(tmp_path / "trabajos"))
+    a = manager.submit("modulo", ["1", "2"])
+    b = manager.submit("modulo", ["1", "2"])
+    assert _esperar(manager, a).estado == COMPLETADO
+    assert _esperar(manager, b).estado == COMPLETADO
+    assert a.run_id != b.run_id
+    assert {run_id for run_id, _ in llamadas} == {a.run_id, b.run_id}
+
+
+def test_resume_reutiliza_la_bitacora_del_trabajo(tmp_path, llamadas):
+    manager = JobManager(str(tmp_path / "trabajos"))
+    fallido = _esperar(manager, manager.submit("falla", ["1", "2"]))
+    assert fallido.estado == FALLIDO
+
+    reanudado = _esperar(manager, manager.resume(fallido.id))
+    assert reanudado.estado == COMPLETADO
+    assert llamadas[1] == (fallido.run_id, ["1", "2"])
+
+    with pytest.raises(ValueError):
+        manager.resume(reanudado.id)
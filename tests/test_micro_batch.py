@@ -0,0 +1,48 @@
+import asyncio
+import gc
+
+import pytest
+
+from utils.micro_batch import MicroBatcher
+
+
+class _Lento(MicroBatcher):
+    def __init__(self) -> None:
+        super().__init__("prueba", ventana=0.001)
+        self.liberar = asyncio.Event()
+
+    async def _resolve(self, documentos):
+        await self.liberar.wait()
+        return {doc: {self.fuente: [{"Documento": doc}]} for doc in documentos}
+
+
+def test_lote_en_curso_sobrevive_al_recolector():
+    async def main():
+        batcher = _Lento()
+        consulta = asyncio.ensure_future(batcher.submit("1"))
+        await asyncio.sleep(0.01)
+        gc.collect()
+        assert len(batcher._tareas) == 1
+        batcher.liberar.set()
+        assert await asyncio.wait_for(consulta, 1) == {"prueba": [{"Documento": "1"}]}
+        await asyncio.sleep(0)
+        assert not batcher._tareas
+
+    asyncio.run(main())
+
+
+def test_aclose_cancela_lotes_y_consultas():
+    async def main():
+        batcher = _Lento()
+        en_curso = asyncio.ensure_future(batcher.submit("1"))
+        await asyncio.sleep(0.01)
+        batcher.ventana = 10
+        pendiente = asyncio.ensure_future(batcher.submit("2"))
+        await asyncio.sleep(0)
+        await batcher.aclose()
+        for consulta in (en_curso, pendiente):
+            with pytest.raises(asyncio.CancelledError):
+                await consulta
+        assert not batcher._tareas
+
+    asyncio.run(main())
@@ -0,0 +1,33 @@
+import pandas as pd
+
+from utils.dedup import DocumentDedup
+from utils.multi_source import join_wide
+
+
+def test_join_wide_una_fila_por_documento():
+    dedup = DocumentDedup(["2", "1", " 2"])
+    resultados = {
+        "ofac": pd.DataFrame({
+            "Documento": ["1", "1", "2"],
+            "Nombre_OFAC": ["ANA", "LUIS", "Sin coincidencias"],
+        }),
+        "ue": pd.DataFrame({
+            "Documento": ["1", "2", "2"],
+            "Nombre_UE": ["PEDRO", "MARIA", "MARIA"],
+        }),
+        "morosidad": pd.DataFrame({"Documento": ["1", "2"], "Sancionado": [True, False]}),
+    }
+
+    reporte = join_wide(dedup, resultados)
+
+    assert reporte["Documento"].tolist() == ["2", "1", " 2"]
+    fila_1 = reporte.iloc[1]
+    assert fila_1["ofac | Registros"] == 2
+    assert fila_1["ofac | Nombre_OFAC"] == "ANA; LUIS"
+    assert fila_1["ue | Nombre_UE"] == "PEDRO"
+    assert bool(fila_1["morosidad | Sancionado"]) is True
+    fila_2 = reporte.iloc[0]
+    assert fila_2["ofac | Registros"] == 0
+    assert fila_2["ofac | Nombre_OFAC"] == "Sin coincidencias"
+    assert fila_2["ue | Registros"] == 2
+    assert fila_2["ue | Nombre_UE"] == "MARIA"
@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from utils.dedup import DocumentDedup, FanOutSink
+from utils.result_sink import ResultSink, read_preview
+
+
+@pytest.mark.parametrize("formato", ["csv", "parquet"])
+def test_columnas_nuevas_amplian_el_archivo(tmp_path, formato):
+    sink = ResultSink(str(tmp_path / f"salida.{formato}"), batch_size=2)
+    sink.write([{"Documento": "1", "Estado": "Error"}, {"Documento": "2", "Estado": "Error"}])
+    sink.write([{"Documento": "3", "Estado": "Moroso", "Sancionado": "True"}, {"Documento": "4", "Estado": "No moroso"}])
+    sink.write([{"Documento": "5", "Extra": "x"}])
+    sink.close()
+
+    df = read_preview(sink.path)
+    assert list(df.columns) == ["Documento", "Estado", "Sancionado", "Extra"]
+    assert df["Documento"].tolist() == ["1", "2", "3", "4", "5"]
+    assert df.loc[2, "Sancionado"] == "True"
+    assert df.loc[4, "Extra"] == "x"
+
+
+def test_fan_out_sink_respeta_el_orden_de_entrada(tmp_path):
+    dedup = DocumentDedup(["3", "1", "2", "1 ", "4"])
+    sink = ResultSink(str(tmp_path / "salida.csv"))
+    fan_out = FanOutSink(sink, dedup, batch_size=2)
+    # Orden de finalización distinto del de entrada, con varias filas por documento.
+    fan_out.write([{"Documento": "4", "Fila": "a"}])
+    fan_out.write([{"Documento": "1", "Fila": "a"}, {"Documento": "1", "Fila": "b"}])
+    fan_out.write([{"Documento": "2", "Fila": "a"}])
+    fan_out.write([{"Documento": "3", "Fila": "a"}])
+    fan_out.close()
+
+    df = pd.read_csv(sink.path, dtype=str, keep_default_na=False)
+    assert list(zip(df["Documento"], df["Fila"])) == [
+        ("3", "a"), ("1", "a"), ("1", "b"), ("2", "a"), ("1 ", "a"), ("1 ", "b"), ("4", "a"),
+    ]
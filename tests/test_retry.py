@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.retry import CircuitBreaker, CircuitOpenError, RetryableStatus, RetryPolicy, retry_call
+
+
+def _abrir(breaker: CircuitBreaker) -> None:
+    """Abre el circuito y adelanta el reloj hasta pasado el enfriamiento."""
+    policy = RetryPolicy(max_intentos=1)
+
+    async def falla_503():
+        raise RetryableStatus(503)
+
+    with pytest.raises(RetryableStatus):
+        asyncio.run(retry_call(falla_503, policy, breaker))
+    assert breaker.is_open
+    breaker._abierto_hasta = time.monotonic() - 1
+
+
+@pytest.mark.parametrize("error", [ValueError("html"), asyncio.CancelledError()])
+def test_prueba_con_error_no_reintentable_no_bloquea_el_host(error):
+    breaker = CircuitBreaker("host.test", umbral_fallos=1, enfriamiento=30.0)
+    policy = RetryPolicy(max_intentos=1)
+    _abrir(breaker)
+
+    async def falla():
+        raise error
+
+    with pytest.raises(type(error)):
+        asyncio.run(retry_call(falla, policy, breaker))
+
+    assert not breaker._prueba_en_curso
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(retry_call(falla, policy, breaker))
+
+    # Tras otro enfriamiento, una prueba exitosa cierra el circuito.
+    breaker._abierto_hasta = time.monotonic() - 1
+
+    async def responde():
+        return "ok"
+
+    assert asyncio.run(retry_call(responde, policy, breaker)) == "ok"
+    assert not breaker.is_open
+
+
+def test_error_no_reintentable_con_circuito_cerrado_no_cuenta_como_fallo():
+    breaker = CircuitBreaker("host.test", umbral_fallos=1, enfriamiento=30.0)
+
+    async def falla():
+        raise ValueError("json")
+
+    with pytest.raises(ValueError):
+        asyncio.run(retry_call(falla, RetryPolicy(max_intentos=1), breaker))
+    assert not breaker.is_open
@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from scrappers.sanctions.sanctions_index import SanctionsIndex, SanctionsSource
+from utils.sanctions_screening import screen_sanctions
+from utils.scraper_runner import build_scraper
+
+FUENTES = ["Lista OFAC (SDN)", "Unión Europea"]
+
+
+def test_indice_combinado_equivale_a_cada_verificador(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "sdn.csv").write_text(
+        '1,"ANA PEREZ","individual","SDNT","","","","","","","","Cedula No. 123456; Passport AB123"\n'
+        '2,"LUIS GOMEZ","individual","SDNT","","","","","","","","Cedula No. 789"\n',
+        encoding="utf-8",
+    )
+    (tmp_path / "eu.csv").write_text(
+        "Iden_number;Naal_wholename;Subject_type;Entity_remark;EU_ref_num;Iden_programme\n"
+        "000123456;MARIA;person;x;EU.1;P\n555;JUAN;person;y;EU.2;P\n",
+        encoding="utf-8",
+    )
+    overrides = {"sdn_path": "sdn.csv", "eu_list_path": "eu.csv", "cache_dir": None}
+    documentos = ["123456", "789", "555", " 123456", "AB123", "999"]
+
+    resultados = screen_sanctions(FUENTES, documentos, overrides)
+
+    for nombre in FUENTES:
+        esperado = build_scraper(nombre, overrides).run(documentos)
+        assert resultados[nombre].astype(object).equals(esperado.astype(object))
+
+
+def test_construcciones_concurrentes_publican_un_solo_indice(tmp_path):
+    source = SanctionsSource(
+        nombre="OFAC", esquema="token", columnas=["Nombre"], documento_normalizado=False, version="v1",
+        entradas=pd.DataFrame({"texto_busqueda": ["Cedula 123"], "Nombre": ["ANA"]}),
+    )
+    destino = tmp_path / "OFAC-v1"
+    with ThreadPoolExecutor(8) as pool:
+        indices = list(pool.map(lambda _: SanctionsIndex.build([source], str(destino)), range(8)))
+
+    assert [p.name for p in tmp_path.iterdir()] == ["OFAC-v1"]
+    assert all(indice.screen(["123"])["OFAC"]["Nombre"].tolist() == ["ANA"] for indice in indices)
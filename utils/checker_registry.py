@@ -0,0 +1,140 @@
+"""
+Registro a nivel de proceso de los verificadores basados en archivo (OFAC, UE).
+
+Streamlit vuelve a ejecutar `app.py` en cada interacción, pero los módulos
+importados permanecen en memoria. Este registro guarda una instancia por
+(módulo, configuración) que se construye una sola vez y se comparte, de solo
+lectura, entre todas las sesiones. `invalidate` descarta instancias para
+forzar su reconstrucción en el siguiente uso.
+
+`start_watcher` lanza un hilo que vigila los archivos de las listas y, cuando
+cambian, recarga los verificadores en segundo plano (`reload_if_changed`).
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_WATCH_INTERVAL = 30.0
+
+_instances: Dict[Tuple[str, tuple], Any] = {}
+_lock = threading.Lock()
+# Un lock por clave: construir un verificador (la lista UE tarda segundos) no
+# bloquea el acceso a los demás, solo a quien pide ese mismo verificador.
+_build_locks: Dict[Tuple[str, tuple], threading.Lock] = {}
+_watcher: Optional[threading.Thread] = None
+
+
+def is_file_backed(scraper_class: type) -> bool:
+    """Indica si la clase es un verificador basado en archivo compartible."""
+    return getattr(scraper_class, "FILE_BACKED", False)
+
+
+def _key(name: str, cfg: dict) -> Tuple[str, tuple]:
+    return name, tuple(sorted((k, repr(v)) for k, v in cfg.items()))
+
+
+def get_checker(name: str, scraper_class: type, cfg: dict) -> Any:
+    """
+    Devuelve la instancia compartida del verificador, construyéndola si no existe.
+
+    Parameters
+    ----------
+    name : str
+        Nombre del módulo en `SCRAPERS`.
+    scraper_class : type
+        Clase del verificador.
+    cfg : dict
+        Parámetros de construcción.
+
+    Returns
+    -------
+    Any
+        Instancia del verificador.
+    """
+    key = _key(name, cfg)
+    instance = _instances.get(key)
+    if instance is not None:
+        return instance
+    with _lock:
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+    with build_lock:
+        instance = _instances.get(key)
+        if instance is None:
+            logging.info(f"Construyendo verificador compartido para '{name}'")
+            instance = scraper_class(**cfg)
+            with _lock:
+                _instances[key] = instance
+    return instance
+
+
+def invalidate(name: Optional[str] = None) -> int:
+    """
+    Descarta instancias del registro.
+
+    Parameters
+    ----------
+    name : str, opcional
+        Módulo a invalidar. Si es None, se invalidan todos.
+
+    Returns
+    -------
+    int
+        Número de instancias descartadas.
+    """
+    with _lock:
+        keys = [k for k in _instances if name is None or k[0] == name]
+        for k in keys:
+            del _instances[k]
+    return len(keys)
+
+
+def reload_changed() -> List[str]:
+    """
+    Recarga los verificadores registrados cuyo archivo de lista cambió.
+
+    Si la recarga de uno falla (p. ej. archivo a medio copiar), se registra el
+    error y ese verificador conserva su versión anterior hasta el próximo intento.
+
+    Returns
+    -------
+    List[str]
+        Nombres de los módulos recargados.
+    """
+    with _lock:
+        items = list(_instances.items())
+    recargados = []
+    for (name, _), instance in items:
+        reload = getattr(instance, "reload_if_changed", None)
+        if reload is None:
+            continue
+        try:
+            if reload():
+                recargados.append(name)
+        except Exception as e:
+            logging.warning(f"No se pudo recargar '{name}', se mantiene la versión anterior: {e}")
+    return recargados
+
+
+def _watch_loop(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        reload_changed()
+
+
+def start_watcher(interval: float = DEFAULT_WATCH_INTERVAL) -> None:
+    """
+    Inicia, una sola vez por proceso, el hilo que vigila los archivos de las listas.
+
+    Parameters
+    ----------
+    interval : float
+        Segundos entre revisiones.
+    """
+    global _watcher
+    with _lock:
+        if _watcher is not None and _watcher.is_alive():
+            return
+        _watcher = threading.Thread(target=_watch_loop, args=(interval,), name="list-watcher", daemon=True)
+        _watcher.start()
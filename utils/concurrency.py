@@ -0,0 +1,235 @@
+"""
+Control adaptativo de concurrencia (AIMD) para los scrapers HTTP asíncronos.
+
+En lugar de un semáforo fijo, `AdaptiveConcurrency` ajusta cuántas peticiones
+puede haber en vuelo contra un host según lo que observa:
+
+- Respuesta correcta y rápida: aumento aditivo (+1 por cada ventana completa
+  de respuestas; al inicio, +1 por respuesta hasta la primera reducción).
+- Timeout, error de conexión, HTTP 429/5xx o latencia sobre el objetivo:
+  reducción multiplicativa, como máximo una vez por ventana de latencia para
+  que una ráfaga de fallos simultáneos no colapse el límite.
+
+El límite siempre queda entre `min_concurrent` y `max_concurrent`. Hay un
+controlador por host en el proceso (`get_adaptive_concurrency`), compartido
+por todos los scrapers, trabajos, consultas combinadas y micro-lotes de la API
+que apuntan a ese host, de modo que el límite es del host y no de cada
+ejecución. Sus cotas y su limitador de tasa son los de quien lo creó; una
+ejecución que pide otros no cambia los de las que ya están en curso. Su estado se protege con un `threading.Lock` y las esperas se
+despiertan en el event loop de cada llamador, así que sirve a varios event
+loops a la vez, como el limitador de tasa.
+
+Si se indica un `rate_limiter`, cada cupo espera además su turno de tasa antes
+de empezar a medir la latencia, de modo que la espera por tasa no se confunde
+con congestión del servidor.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from utils.rate_limit import TokenBucket
+
+_controladores: Dict[str, "AdaptiveConcurrency"] = {}
+_registry_lock = threading.Lock()
+
+DEFAULT_INITIAL_CONCURRENT = 10
+
+
+class RequestOutcome:
+    """Resultado de una petición, que el llamador completa dentro de `slot()`."""
+
+    __slots__ = ("status", "fallo")
+
+    def __init__(self) -> None:
+        self.status: Optional[int] = None
+        self.fallo = False
+
+
+class AdaptiveConcurrency:
+    """
+    Límite AIMD de peticiones en vuelo contra un host.
+
+    Uso::
+
+        async with controller.slot() as outcome:
+            async with session.get(url) as resp:
+                outcome.status = resp.status
+
+    Una excepción que escape del bloque cuenta como fallo (timeout o error de
+    conexión), salvo la cancelación.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        min_concurrent: int = 1,
+        max_concurrent: int = 100,
+        latencia_objetivo: float = 5.0,
+        factor_reduccion: float = 0.5,
+        inicial: Optional[int] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        host : str
+            Host controlado.
+        min_concurrent, max_concurrent : int
+            Cotas del límite.
+        latencia_objetivo : float
+            Segundos por encima de los cuales una respuesta cuenta como congestión.
+        factor_reduccion : float
+            Factor multiplicativo aplicado al reducir.
+        inicial : int, opcional
+            Límite de arranque. Por defecto, `DEFAULT_INITIAL_CONCURRENT`.
+        rate_limiter : TokenBucket, opcional
+            Limitador de tasa compartido del host.
+        """
+        if not 1 <= min_concurrent <= max_concurrent:
+            raise ValueError("Se requiere 1 <= min_concurrent <= max_concurrent")
+        self.host = host
+        self.min_concurrent = min_concurrent
+        self.max_concurrent = max_concurrent
+        self.latencia_objetivo = latencia_objetivo
+        self.factor_reduccion = factor_reduccion
+        self.rate_limiter = rate_limiter
+        arranque = inicial if inicial is not None else DEFAULT_INITIAL_CONCURRENT
+        self._limite = float(min(max(arranque, min_concurrent), max_concurrent))
+        self._en_vuelo = 0
+        self._esperando: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._lock = threading.Lock()
+        self._arranque_lento = True
+        self._ultima_reduccion = float("-inf")
+        self.reducciones = 0
+        self.peticiones = 0
+        self.limite_maximo = self.limit
+
+    @property
+    def limit(self) -> int:
+        """Número de peticiones en vuelo permitidas ahora."""
+        return int(self._limite)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[RequestOutcome]:
+        """Reserva un cupo, mide la petición y ajusta el límite al liberarlo."""
+        await self._acquire()
+
+        outcome = RequestOutcome()
+        cancelada = False
+        inicio = time.monotonic()
+        try:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+                inicio = time.monotonic()
+            yield outcome
+        except asyncio.CancelledError:
+            cancelada = True
+            raise
+        except Exception:
+            outcome.fallo = True
+            raise
+        finally:
+            with self._lock:
+                if not cancelada:
+                    self._record(outcome, time.monotonic() - inicio)
+                self._en_vuelo -= 1
+            self._wake_all()
+
+    async def _acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._en_vuelo < self.limit:
+                    self._en_vuelo += 1
+                    return
+                espera = (loop, loop.create_future())
+                self._esperando.append(espera)
+            try:
+                await espera[1]
+            finally:
+                with self._lock:
+                    if espera in self._esperando:
+                        self._esperando.remove(espera)
+
+    def _wake_all(self) -> None:
+        """Despierta a todos los que esperan cupo, cada uno en su event loop."""
+        with self._lock:
+            esperando, self._esperando = self._esperando, []
+        for loop, futuro in esperando:
+            try:
+                loop.call_soon_threadsafe(_wake, futuro)
+            except RuntimeError:
+                pass  # Su event loop ya se cerró.
+
+    def _record(self, outcome: RequestOutcome, latencia: float) -> None:
+        """Ajusta el límite con el resultado de una petición. Se llama con `_lock` tomado."""
+        self.peticiones += 1
+        congestion = (
+            outcome.fallo
+            or (outcome.status is not None and (outcome.status == 429 or outcome.status >= 500))
+            or latencia > self.latencia_objetivo
+        )
+        if congestion:
+            ahora = time.monotonic()
+            if ahora - self._ultima_reduccion >= self.latencia_objetivo:
+                self._ultima_reduccion = ahora
+                self._arranque_lento = False
+                self._limite = max(float(self.min_concurrent), self._limite * self.factor_reduccion)
+                self.reducciones += 1
+                logging.info(f"Concurrencia hacia {self.host} reducida a {self.limit}")
+        elif self._arranque_lento:
+            self._limite = min(float(self.max_concurrent), self._limite + 1)
+        else:
+            self._limite = min(float(self.max_concurrent), self._limite + 1 / self._limite)
+        self.limite_maximo = max(self.limite_maximo, self.limit)
+
+    def summary(self) -> str:
+        """Texto con la concurrencia alcanzada, para el resumen de la ejecución."""
+        return (
+            f"Concurrencia hacia {self.host}: {self.limit} en vuelo al finalizar "
+            f"(máx. {self.limite_maximo}, cotas {self.min_concurrent}-{self.max_concurrent}, "
+            f"{self.reducciones} reducciones en {self.peticiones} peticiones del proceso)"
+        )
+
+
+def _wake(futuro: asyncio.Future) -> None:
+    if not futuro.done():
+        futuro.set_result(None)
+
+
+def get_adaptive_concurrency(
+    host: str,
+    min_concurrent: int = 1,
+    max_concurrent: int = 100,
+    latencia_objetivo: float = 5.0,
+    rate_limiter: Optional[TokenBucket] = None,
+) -> AdaptiveConcurrency:
+    """
+    Devuelve el controlador compartido de un host, creándolo si no existe.
+
+    Si ya existe, conserva la configuración con la que se creó: otras cotas o
+    otro limitador de tasa (p. ej. un `max_concurrent` distinto por línea de
+    comandos) solo generan una advertencia, para no cambiar los límites de
+    las ejecuciones en curso contra el host.
+    """
+    with _registry_lock:
+        controlador = _controladores.get(host)
+        if controlador is None:
+            controlador = AdaptiveConcurrency(
+                host, min_concurrent, max_concurrent, latencia_objetivo, rate_limiter=rate_limiter,
+            )
+            _controladores[host] = controlador
+            return controlador
+    vigentes = (controlador.min_concurrent, controlador.max_concurrent, controlador.latencia_objetivo)
+    if vigentes != (min_concurrent, max_concurrent, latencia_objetivo) or controlador.rate_limiter is not rate_limiter:
+        logging.warning(
+            f"El controlador de concurrencia hacia {host} ya está en uso con cotas "
+            f"{controlador.min_concurrent}-{controlador.max_concurrent} y latencia objetivo "
+            f"{controlador.latencia_objetivo} s; se ignoran las pedidas ({min_concurrent}-{max_concurrent}, "
+            f"{latencia_objetivo} s{', otro limitador de tasa' if controlador.rate_limiter is not rate_limiter else ''})"
+        )
+    return controlador
@@ -1,23 +1,22 @@
 import pandas as pd
 import streamlit as st
 
+from utils.input_reader import read_input
+
 
 @st.cache_data
 def load_data(uploaded_file) -> pd.DataFrame:
     """
-    Carga un CSV o Excel y devuelve un DataFrame.
+    Carga un CSV, Excel o Parquet y devuelve un DataFrame.
 
     Parameters
     ----------
     uploaded_file : UploadedFile
-        Archivo subido en Streamlit (csv o xlsx).
+        Archivo subido en Streamlit (csv, xlsx o parquet).
 
     Returns
     -------
     pd.DataFrame
         Datos cargados.
     """
-    name = uploaded_file.name.lower()
-    if name.endswith(".csv"):
-        return pd.read_csv(uploaded_file)
-    return pd.read_excel(uploaded_file)
+    return read_input(uploaded_file, uploaded_file.name)
@@ -0,0 +1,159 @@
+"""
+Deduplicación de documentos de entrada antes de consultar un scraper.
+
+Un archivo cargado puede repetir el mismo documento muchas veces. `DocumentDedup`
+normaliza los documentos, entrega la lista de únicos para consultar una sola
+vez cada uno y luego reparte (fan-out) los resultados sobre las filas
+originales, en su orden.
+"""
+
+import heapq
+import itertools
+import pickle
+import tempfile
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+
+def normalize_document(doc) -> str:
+    """Forma canónica de un documento para deduplicar: texto sin espacios extremos."""
+    return str(doc).strip()
+
+
+class DocumentDedup:
+    """
+    Plan de deduplicación de una lista de documentos.
+
+    Attributes
+    ----------
+    documentos : List[str]
+        Documentos originales, tal como se cargaron.
+    unicos : List[str]
+        Documentos normalizados únicos, en orden de primera aparición.
+    """
+
+    def __init__(self, documentos: List[str]) -> None:
+        """
+        Parameters
+        ----------
+        documentos : List[str]
+            Documentos originales.
+        """
+        self.documentos = [str(d) for d in documentos]
+        self._claves = [normalize_document(d) for d in self.documentos]
+        self.unicos = list(dict.fromkeys(self._claves))
+
+    @property
+    def ratio(self) -> float:
+        """Fracción de filas que no requieren consulta (0 si no hay duplicados)."""
+        if not self.documentos:
+            return 0.0
+        return 1 - len(self.unicos) / len(self.documentos)
+
+    def summary(self) -> str:
+        """Texto para el resumen de la ejecución."""
+        return (
+            f"{len(self.unicos)} documentos únicos de {len(self.documentos)} filas "
+            f"(deduplicación {self.ratio:.1%})"
+        )
+
+    def fan_out(self, resultados: pd.DataFrame) -> pd.DataFrame:
+        """
+        Reparte los resultados de los documentos únicos sobre las filas originales.
+
+        Cada fila original recibe todas las filas de resultado de su documento,
+        en el orden en que el scraper las devolvió, y conserva el valor
+        original en 'Documento'.
+
+        Parameters
+        ----------
+        resultados : pd.DataFrame
+            Resultados del scraper con columna 'Documento'.
+
+        Returns
+        -------
+        pd.DataFrame
+            Resultados en el orden de `documentos`, con las mismas columnas.
+        """
+        columnas = list(resultados.columns)
+        resultados = resultados.assign(
+            _clave=resultados['Documento'].astype(str).str.strip(),
+            _orden=range(len(resultados)),
+        ).drop(columns='Documento')
+        entrada = pd.DataFrame({
+            '_pos': range(len(self.documentos)),
+            'Documento': self.documentos,
+            '_clave': self._claves,
+        })
+        salida = entrada.merge(resultados, on='_clave', how='left')
+        salida = salida.sort_values(['_pos', '_orden'], kind='stable')
+        return salida[columnas].reset_index(drop=True)
+
+
+class FanOutSink:
+    """
+    Envoltorio de un `ResultSink` que repite cada fila por cada aparición
+    original de su documento, para el modo streaming.
+
+    Las filas llegan en orden de finalización; como en `DocumentDedup.fan_out`,
+    el archivo final respeta el orden del archivo cargado. Para no acumular
+    todo en memoria, cada lote de `batch_size` filas se ordena y se vuelca a
+    un archivo temporal, y `close` los mezcla (merge de k vías) en el sink.
+    """
+
+    def __init__(self, sink, dedup: DocumentDedup, batch_size: Optional[int] = None) -> None:
+        self._sink = sink
+        self._batch_size = batch_size or getattr(sink, "batch_size", 10_000)
+        self._originales: Dict[str, List[Tuple[int, str]]] = {}
+        for pos, (original, clave) in enumerate(zip(dedup.documentos, dedup._claves)):
+            self._originales.setdefault(clave, []).append((pos, original))
+        self._fuera_de_lista = len(dedup.documentos)
+        self._secuencia = itertools.count()
+        self._buffer: List[Tuple[int, int, dict]] = []
+        self._tramos: List[IO[bytes]] = []
+
+    def write(self, filas: Iterable[dict]) -> None:
+        """Agrega las filas, una vez por cada aparición original del documento."""
+        for fila in filas:
+            apariciones = self._originales.get(
+                normalize_document(fila['Documento']), [(self._fuera_de_lista, fila['Documento'])]
+            )
+            for pos, original in apariciones:
+                self._buffer.append((pos, next(self._secuencia), {**fila, 'Documento': original}))
+        if len(self._buffer) >= self._batch_size:
+            self._spill()
+
+    def _spill(self) -> None:
+        """Vuelca el buffer, ordenado, a un tramo temporal."""
+        tramo = tempfile.TemporaryFile()
+        for item in sorted(self._buffer, key=lambda item: item[:2]):
+            pickle.dump(item, tramo, protocol=pickle.HIGHEST_PROTOCOL)
+        tramo.seek(0)
+        self._tramos.append(tramo)
+        self._buffer = []
+
+    @staticmethod
+    def _read(tramo: IO[bytes]) -> Iterator[Tuple[int, int, dict]]:
+        while True:
+            try:
+                yield pickle.load(tramo)
+            except EOFError:
+                return
+
+    def close(self) -> None:
+        """Escribe todas las filas en el sink, en el orden original, y lo cierra."""
+        actuales = sorted(self._buffer, key=lambda item: item[:2])
+        self._buffer = []
+        mezcla = heapq.merge(actuales, *(self._read(t) for t in self._tramos), key=lambda item: item[:2])
+        lote: List[dict] = []
+        for _, _, fila in mezcla:
+            lote.append(fila)
+            if len(lote) >= self._batch_size:
+                self._sink.write(lote)
+                lote = []
+        self._sink.write(lote)
+        for tramo in self._tramos:
+            tramo.close()
+        self._tramos = []
+        self._sink.close()
@@ -0,0 +1,166 @@
+"""
+Pool compartido de conexiones HTTP para los scrapers de red.
+
+En lugar de que cada ejecución arme su propia `ClientSession`, los scrapers
+piden prestada una sesión por host con `http_session(host, verify_ssl)`:
+
+- Las sesiones viven mientras dura el event loop y se comparten entre los
+  scrapers y ejecuciones concurrentes del mismo loop. Al devolver la última,
+  la sesión queda abierta `IDLE_SEGUNDOS` más, de modo que una ejecución
+  siguiente reutiliza las conexiones ya abiertas (keep-alive).
+- Los contextos TLS se crean una sola vez por proceso.
+- Las resoluciones DNS se guardan `DNS_TTL_SEGUNDOS` en una caché del proceso,
+  compartida entre event loops.
+
+Un event loop cerrado no puede reutilizar conexiones de otro: con
+`asyncio.run` por ejecución, lo que se conserva entre ejecuciones son los
+contextos TLS y la caché DNS; las conexiones se reutilizan dentro del loop.
+"""
+
+import asyncio
+import logging
+import ssl
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from aiohttp import ClientSession, TCPConnector
+from aiohttp.abc import AbstractResolver, ResolveResult
+from aiohttp.resolver import DefaultResolver
+
+DNS_TTL_SEGUNDOS = 300.0
+KEEPALIVE_SEGUNDOS = 60.0
+IDLE_SEGUNDOS = 60.0
+
+_dns_cache: Dict[Tuple[str, int, int], Tuple[float, List[ResolveResult]]] = {}
+_dns_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_ssl_context(verify_ssl: bool = True) -> ssl.SSLContext:
+    """
+    Contexto TLS compartido por el proceso.
+
+    Parameters
+    ----------
+    verify_ssl : bool
+        Si es False, no se validan el certificado ni el nombre del host.
+    """
+    ctx = ssl.create_default_context()
+    if not verify_ssl:
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+class CachingResolver(AbstractResolver):
+    """Resolver DNS con caché por proceso y vigencia `DNS_TTL_SEGUNDOS`."""
+
+    def __init__(self, ttl: float = DNS_TTL_SEGUNDOS) -> None:
+        self.ttl = ttl
+        self._resolver = DefaultResolver()
+
+    async def resolve(self, host: str, port: int = 0, family=0) -> List[ResolveResult]:
+        clave = (host, port, int(family))
+        with _dns_lock:
+            guardado = _dns_cache.get(clave)
+        if guardado is not None and guardado[0] > time.monotonic():
+            return guardado[1]
+        resultados = await self._resolver.resolve(host, port, family)
+        with _dns_lock:
+            _dns_cache[clave] = (time.monotonic() + self.ttl, resultados)
+        return resultados
+
+    async def close(self) -> None:
+        await self._resolver.close()
+
+
+class _Entrada:
+    """Sesión de un host con sus préstamos activos."""
+
+    def __init__(self, session: ClientSession) -> None:
+        self.session = session
+        self.prestamos = 0
+        self.cierre: Optional[asyncio.Task] = None
+
+
+class HttpPool:
+    """Sesiones por (host, verify_ssl) de un event loop."""
+
+    def __init__(self, idle: float = IDLE_SEGUNDOS) -> None:
+        self.idle = idle
+        self._entradas: Dict[Tuple[str, bool], _Entrada] = {}
+
+    def _crear(self, verify_ssl: bool) -> ClientSession:
+        # Sin límite propio de conexiones: las peticiones en vuelo ya las
+        # acota el control de concurrencia (AIMD) de cada scraper.
+        connector = TCPConnector(
+            ssl=get_ssl_context(verify_ssl),
+            limit=0,
+            use_dns_cache=False,
+            resolver=CachingResolver(),
+            keepalive_timeout=KEEPALIVE_SEGUNDOS,
+            enable_cleanup_closed=True,
+        )
+        return ClientSession(connector=connector)
+
+    @asynccontextmanager
+    async def session(self, host: str, verify_ssl: bool = True) -> AsyncIterator[ClientSession]:
+        clave = (host, verify_ssl)
+        entrada = self._entradas.get(clave)
+        if entrada is None or entrada.session.closed:
+            entrada = _Entrada(self._crear(verify_ssl))
+            self._entradas[clave] = entrada
+        entrada.prestamos += 1
+        if entrada.cierre is not None:
+            entrada.cierre.cancel()
+            entrada.cierre = None
+        try:
+            yield entrada.session
+        finally:
+            entrada.prestamos -= 1
+            if entrada.prestamos == 0:
+                entrada.cierre = asyncio.ensure_future(self._cerrar_inactiva(clave, entrada))
+
+    async def _cerrar_inactiva(self, clave: Tuple[str, bool], entrada: _Entrada) -> None:
+        # Se cancela si la sesión vuelve a prestarse, o si el loop termina
+        # (asyncio.run cancela las tareas pendientes): en ese caso se cierra ya.
+        try:
+            await asyncio.sleep(self.idle)
+        except asyncio.CancelledError:
+            if entrada.prestamos == 0:
+                await self._cerrar(clave, entrada)
+            raise
+        await self._cerrar(clave, entrada)
+
+    async def _cerrar(self, clave: Tuple[str, bool], entrada: _Entrada) -> None:
+        if self._entradas.get(clave) is entrada:
+            del self._entradas[clave]
+        await entrada.session.close()
+        logging.debug(f"Sesión HTTP hacia {clave[0]} cerrada")
+
+
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, HttpPool]" = weakref.WeakKeyDictionary()
+
+
+def get_http_pool() -> HttpPool:
+    """Pool del event loop en curso, creándolo si no existe."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = HttpPool()
+        _pools[loop] = pool
+    return pool
+
+
+def http_session(host: str, verify_ssl: bool = True):
+    """
+    Presta la sesión compartida de un host en el event loop en curso.
+
+    Uso: ``async with http_session(host) as session: ...``. La sesión no debe
+    cerrarse; el pool la cierra tras `IDLE_SEGUNDOS` sin préstamos.
+    """
+    return get_http_pool().session(host, verify_ssl)
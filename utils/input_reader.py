@@ -0,0 +1,36 @@
+"""
+Lectura de archivos de entrada (CSV, Excel o Parquet) sin depender de Streamlit.
+"""
+
+import os
+
+import pandas as pd
+
+FORMATOS_ENTRADA = (".csv", ".xlsx", ".xls", ".parquet")
+
+
+def read_input(origen, nombre: str = None) -> pd.DataFrame:
+    """
+    Carga un CSV, Excel o Parquet y devuelve un DataFrame.
+
+    Parameters
+    ----------
+    origen : str | file-like
+        Ruta o archivo abierto.
+    nombre : str, opcional
+        Nombre del archivo, para deducir el formato cuando `origen` no es una
+        ruta (p. ej. un archivo subido).
+
+    Raises
+    ------
+    ValueError
+        Si la extensión no es un formato soportado.
+    """
+    extension = os.path.splitext(str(nombre or origen))[1].lower()
+    if extension == ".csv":
+        return pd.read_csv(origen)
+    if extension in (".xlsx", ".xls"):
+        return pd.read_excel(origen)
+    if extension == ".parquet":
+        return pd.read_parquet(origen)
+    raise ValueError(f"Formato de entrada no soportado: '{extension}'. Usa uno de {', '.join(FORMATOS_ENTRADA)}")
@@ -0,0 +1,292 @@
+"""
+Trabajos de consulta en segundo plano.
+
+Una consulta larga no debe depender de la sesión de Streamlit que la lanzó:
+un rerun o una pestaña cerrada la interrumpirían. `JobManager` mantiene un
+event loop propio en un hilo de fondo, acepta trabajos (módulo, documentos,
+modo, formato), los ejecuta con `run_scraper` y guarda su estado. La página
+envía el trabajo, consulta su avance periódicamente y, al terminar, lee el
+archivo de resultados.
+
+El estado de cada trabajo se guarda además en `<jobs_dir>/<id>.json` en cada
+cambio de estado, y sus documentos en `<jobs_dir>/<id>.documentos`. Cada
+trabajo tiene su propia bitácora (`run_id`), así que dos consultas del mismo
+archivo a la vez no se pisan. Si el proceso se reinicia, los trabajos que
+quedaron en curso aparecen como "Interrumpido"; `resume` los vuelve a enviar
+con su misma bitácora, consultando solo lo que faltaba.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+from utils.multi_source import run_sources
+from utils.result_sink import DEFAULT_RESULTS_DIR, ResultSink, remove_stale_results
+from utils.run_journal import DEFAULT_JOURNAL_DIR, make_run_id
+from utils.scraper_runner import run_scraper
+
+DEFAULT_JOBS_DIR = ".cache/trabajos"
+DEFAULT_MAX_JOBS = 2
+
+EN_COLA = "En cola"
+EN_EJECUCION = "En ejecución"
+COMPLETADO = "Completado"
+FALLIDO = "Error"
+CANCELADO = "Cancelado"
+INTERRUMPIDO = "Interrumpido"
+ESTADOS_FINALES = (COMPLETADO, FALLIDO, CANCELADO, INTERRUMPIDO)
+ESTADOS_REANUDABLES = (FALLIDO, CANCELADO, INTERRUMPIDO)
+
+_manager: Optional["JobManager"] = None
+_manager_lock = threading.Lock()
+
+
+class Job:
+    """Estado de un trabajo. Lo actualiza el hilo de fondo; la UI solo lo lee."""
+
+    CAMPOS = (
+        "id", "scraper", "modo", "usuario", "total", "estado", "fraccion", "texto",
+        "mensaje", "resultado", "filas", "creado", "iniciado", "terminado", "fuentes", "run_id",
+    )
+
+    def __init__(self, scraper: str, modo: str, usuario: Optional[str], total: int, resultado: str,
+                 fuentes: Optional[List[str]] = None, run_id: Optional[str] = None) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.run_id = run_id
+        self.scraper = scraper
+        self.fuentes = fuentes
+        self.modo = modo
+        self.usuario = usuario
+        self.total = total
+        self.estado = EN_COLA
+        self.fraccion = 0.0
+        self.texto = ""
+        self.mensaje = ""
+        self.resultado = resultado
+        self.filas = 0
+        self.creado = time.time()
+        self.iniciado: Optional[float] = None
+        self.terminado: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.estado in ESTADOS_FINALES
+
+    @property
+    def duracion(self) -> float:
+        """Segundos de ejecución (hasta ahora, si sigue en curso)."""
+        if self.iniciado is None:
+            return 0.0
+        return (self.terminado or time.time()) - self.iniciado
+
+    # Interfaz de barra y etiqueta de progreso que esperan los scrapers.
+    def progress(self, fraccion: float) -> None:
+        self.fraccion = fraccion
+
+    def text(self, texto: str) -> None:
+        self.texto = texto
+
+    def to_dict(self) -> dict:
+        return {campo: getattr(self, campo) for campo in self.CAMPOS}
+
+    @classmethod
+    def from_dict(cls, datos: dict) -> "Job":
+        job = cls.__new__(cls)
+        for campo in cls.CAMPOS:
+            setattr(job, campo, datos.get(campo))
+        return job
+
+
+class JobManager:
+    """Cola de trabajos ejecutados en un event loop de fondo."""
+
+    def __init__(self, jobs_dir: str = DEFAULT_JOBS_DIR, max_jobs: int = DEFAULT_MAX_JOBS) -> None:
+        """
+        Parameters
+        ----------
+        jobs_dir : str
+            Directorio donde se guarda el estado de los trabajos.
+        max_jobs : int
+            Trabajos que se ejecutan a la vez; el resto espera en cola.
+        """
+        os.makedirs(jobs_dir, exist_ok=True)
+        # El estado de un trabajo se descarta junto con su archivo de resultados,
+        # y con él la bitácora que ya nadie puede reanudar.
+        remove_stale_results(jobs_dir)
+        remove_stale_results(DEFAULT_JOURNAL_DIR)
+        self.jobs_dir = jobs_dir
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, Job] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._load()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="job-manager", daemon=True)
+        self._thread.start()
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _load(self) -> None:
+        # Trabajos de ejecuciones anteriores del proceso; los que no terminaron
+        # quedaron interrumpidos.
+        for nombre in os.listdir(self.jobs_dir):
+            if not nombre.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.jobs_dir, nombre), encoding="utf-8") as f:
+                    job = Job.from_dict(json.load(f))
+            except (OSError, json.JSONDecodeError) as e:
+                logging.warning(f"Estado de trabajo ilegible {nombre}: {e}")
+                continue
+            if not job.finished:
+                job.estado = INTERRUMPIDO
+                job.mensaje = "El proceso se reinició antes de terminar. Puedes reanudarlo."
+                self._save(job)
+            self._jobs[job.id] = job
+
+    def _save(self, job: Job) -> None:
+        tmp = self._path(job.id) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(job.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp, self._path(job.id))
+
+    def _documents_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.documentos")
+
+    def submit(self, scraper_name: str, nuips: List[str], modo: str = "Documento",
+               formato: str = "csv", usuario: Optional[str] = None, fuentes: Optional[List[str]] = None) -> Job:
+        """
+        Encola un trabajo y devuelve su estado inicial.
+
+        Parameters
+        ----------
+        scraper_name : str
+            Módulo de consulta.
+        nuips : List[str]
+            Documentos (o nombres, en modo "Nombre").
+        modo : str
+            "Documento" o "Nombre".
+        formato : str
+            Formato del archivo de resultados: "csv" o "parquet".
+        usuario : str, opcional
+            Usuario que envía el trabajo.
+        fuentes : List[str], opcional
+            Para una consulta combinada, los módulos a consultar a la vez; el
+            resultado es un único reporte ancho (`run_sources`).
+        """
+        return self._enqueue(scraper_name, list(nuips), modo, formato, usuario, fuentes, make_run_id(scraper_name))
+
+    def resume(self, job_id: str) -> Job:
+        """
+        Vuelve a enviar un trabajo que no terminó, con su misma bitácora.
+
+        El nuevo trabajo omite los documentos que el anterior ya resolvió.
+
+        Raises
+        ------
+        ValueError
+            Si el trabajo no existe, terminó bien, sus documentos ya no están
+            disponibles o ya se está reanudando en otro trabajo.
+        """
+        anterior = self.get(job_id)
+        if anterior is None or anterior.estado not in ESTADOS_REANUDABLES or not anterior.run_id:
+            raise ValueError("Solo se pueden reanudar trabajos interrumpidos, cancelados o fallidos.")
+        try:
+            with open(self._documents_path(job_id), encoding="utf-8") as f:
+                nuips = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"Los documentos del trabajo ya no están disponibles: {e}") from e
+        formato = os.path.splitext(anterior.resultado)[1].lstrip(".")
+        return self._enqueue(
+            anterior.scraper, nuips, anterior.modo, formato, anterior.usuario, anterior.fuentes, anterior.run_id,
+        )
+
+    def _enqueue(self, scraper_name: str, nuips: List[str], modo: str, formato: str, usuario: Optional[str],
+                 fuentes: Optional[List[str]], run_id: str) -> Job:
+        remove_stale_results()
+        resultado = os.path.join(DEFAULT_RESULTS_DIR, f"{run_id}-{uuid.uuid4().hex[:8]}.{formato.lower()}")
+        job = Job(scraper_name, modo, usuario, len(nuips), resultado, fuentes, run_id)
+        with self._lock:
+            # Dos trabajos en curso nunca comparten bitácora.
+            if any(j.run_id == run_id and not j.finished for j in self._jobs.values()):
+                raise ValueError("Este trabajo ya se está reanudando.")
+            self._jobs[job.id] = job
+        self._save(job)
+        with open(self._documents_path(job.id), "w", encoding="utf-8") as f:
+            json.dump(nuips, f, ensure_ascii=False)
+        self._futures[job.id] = asyncio.run_coroutine_threadsafe(self._run(job, nuips), self._loop)
+        return job
+
+    async def _run(self, job: Job, nuips: List[str]) -> None:
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_jobs)
+        sink = None
+        try:
+            async with self._semaforo:
+                job.estado = EN_EJECUCION
+                job.iniciado = time.time()
+                self._save(job)
+                sink = ResultSink(job.resultado)
+                if job.fuentes:
+                    result_sink, job.mensaje = await run_sources(
+                        job.fuentes, nuips, job, job, sink, run_id=job.run_id,
+                    )
+                else:
+                    result_sink, job.mensaje = await run_scraper(
+                        job.scraper, nuips, job, job, job.modo, sink, run_id=job.run_id,
+                    )
+                job.estado = COMPLETADO if result_sink is not None else FALLIDO
+        except asyncio.CancelledError:
+            # Tarea raíz del trabajo: la cancelación termina aquí.
+            job.estado = CANCELADO
+            job.mensaje = "Trabajo cancelado por el usuario."
+        except Exception as e:
+            logging.exception(f"Trabajo {job.id} fallido")
+            job.estado = FALLIDO
+            job.mensaje = f"{type(e).__name__} - {e}"
+        finally:
+            if sink is not None:
+                # Cerrar dos veces es inofensivo; deja legible lo escrito hasta aquí.
+                sink.close()
+                job.filas = sink.filas_escritas
+            job.terminado = time.time()
+            if job.estado == COMPLETADO:
+                job.fraccion = 1.0
+            self._save(job)
+            self._futures.pop(job.id, None)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Estado actual de un trabajo, o None si no existe."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, usuario: Optional[str] = None, scraper: Optional[str] = None) -> List[Job]:
+        """Trabajos, del más reciente al más antiguo, filtrados por usuario y módulo."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        jobs = [j for j in jobs if (usuario is None or j.usuario == usuario) and (scraper is None or j.scraper == scraper)]
+        return sorted(jobs, key=lambda j: j.creado, reverse=True)
+
+    def cancel(self, job_id: str) -> bool:
+        """Pide cancelar un trabajo en cola o en curso. Devuelve False si ya terminó."""
+        future = self._futures.get(job_id)
+        if future is None:
+            return False
+        return future.cancel()
+
+
+def get_job_manager() -> JobManager:
+    """Devuelve el gestor de trabajos del proceso, creándolo si no existe."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+    return _manager
@@ -0,0 +1,128 @@
+"""
+Carga columnar de listas de sanciones con caché Parquet en disco.
+
+El archivo fuente (CSV o XLSX) se lee una sola vez, conservando únicamente
+las columnas que necesita el verificador. El resultado se guarda como Parquet
+en `cache_dir`, con el hash SHA-256 del archivo fuente en el nombre, de modo
+que los siguientes arranques lo leen directamente mientras la fuente no cambie.
+El hash y los datos salen de una misma lectura del archivo, así que la versión
+que informa el llamador siempre describe los datos que recibe.
+"""
+
+import hashlib
+import io
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+import pandas as pd
+
+DEFAULT_CACHE_DIR = ".cache/listas"
+
+
+def file_signature(path: str) -> Tuple[int, int]:
+    """
+    Firma barata de un archivo, (mtime en ns, tamaño), para detectar cambios
+    sin leer su contenido.
+    """
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def read_list_file(
+    path: str, columns: Iterable[str], sep: str = ";", contenido: Optional[bytes] = None,
+) -> pd.DataFrame:
+    """
+    Lee un CSV o XLSX como texto conservando solo las columnas indicadas.
+
+    Las columnas ausentes en el archivo simplemente no aparecen en el
+    resultado; validar cuáles son obligatorias queda a cargo del llamador.
+
+    Parameters
+    ----------
+    path : str
+        Ruta del archivo (.csv o .xlsx).
+    columns : Iterable[str]
+        Columnas a conservar.
+    sep : str
+        Separador para archivos CSV.
+    contenido : bytes, opcional
+        Contenido ya leído de `path`; si se indica, el archivo no se vuelve a abrir.
+
+    Returns
+    -------
+    pd.DataFrame
+        Datos leídos, todas las columnas de tipo string.
+    """
+    wanted = set(columns)
+    options = dict(
+        usecols=lambda c: c in wanted,
+        dtype=str,
+        keep_default_na=False,
+        na_values=[''],
+    )
+    fuente = io.BytesIO(contenido) if contenido is not None else path
+    if path.lower().endswith((".xlsx", ".xls")):
+        return pd.read_excel(fuente, **options)
+    return pd.read_csv(fuente, sep=sep, **options)
+
+
+def load_list_cached(
+    path: str,
+    columns: Iterable[str],
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+    sep: str = ";",
+) -> Tuple[pd.DataFrame, str]:
+    """
+    Carga una lista desde la caché Parquet o, si no existe, desde la fuente.
+
+    Parameters
+    ----------
+    path : str
+        Ruta del archivo fuente (.csv o .xlsx).
+    columns : Iterable[str]
+        Columnas a conservar.
+    cache_dir : str, opcional
+        Directorio de la caché. Si es None no se usa caché.
+    sep : str
+        Separador para archivos CSV.
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, str]
+        (datos de la lista con las columnas solicitadas presentes en la
+        fuente, hash SHA-256 de los bytes de los que salieron).
+
+    Raises
+    ------
+    FileNotFoundError
+        Si el archivo fuente no existe.
+    """
+    columns = list(columns)
+    with open(path, "rb") as f:
+        contenido = f.read()
+    digest = hashlib.sha256(contenido).hexdigest()
+    if cache_dir is None:
+        return read_list_file(path, columns, sep=sep, contenido=contenido), digest
+
+    # La clave combina el contenido de la fuente y el conjunto de columnas pedido.
+    columns_digest = hashlib.sha256("\0".join(sorted(columns)).encode()).hexdigest()
+    cache_path = Path(cache_dir) / f"{Path(path).stem}-{digest[:16]}-{columns_digest[:8]}.parquet"
+
+    if cache_path.exists():
+        try:
+            return pd.read_parquet(cache_path), digest
+        except Exception as e:
+            logging.warning(f"Caché de lista ilegible en {cache_path}, se regenera: {e}")
+
+    df = read_list_file(path, columns, sep=sep, contenido=contenido)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+    except Exception as e:
+        logging.warning(f"No se pudo escribir la caché de lista en {cache_path}: {e}")
+    return df, digest
+
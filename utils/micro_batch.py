@@ -0,0 +1,155 @@
+"""
+Agrupación de consultas individuales en micro-lotes.
+
+Las consultas de un documento que llegan a una fuente dentro de una ventana
+corta (`ventana` segundos) se juntan y se resuelven con una sola llamada al
+`run` del scraper: los scrapers de red lo reparten en su pool de workers
+sobre las sesiones HTTP compartidas, con una sola instancia de scraper por
+fuente (y el controlador de concurrencia del host). Las listas de sanciones (OFAC, UE)
+comparten un `SanctionsBatcher` que resuelve el lote contra todas ellas en
+una sola pasada del índice unificado. Cada solicitante recibe solo las filas
+de su documento.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from utils.dedup import normalize_document
+from utils.sanctions_screening import screen_sanctions
+from utils.scraper_runner import build_scraper, call_run
+
+DEFAULT_VENTANA = 0.02
+DEFAULT_MAX_LOTE = 500
+
+
+class MicroBatcher:
+    """Cola de consultas de una fuente que se despacha por micro-lotes."""
+
+    def __init__(self, fuente: str, ventana: float = DEFAULT_VENTANA, max_lote: int = DEFAULT_MAX_LOTE) -> None:
+        """
+        Parameters
+        ----------
+        fuente : str
+            Nombre de la fuente en `SCRAPERS`.
+        ventana : float
+            Segundos que se espera, desde la primera consulta pendiente, antes
+            de despachar el lote.
+        max_lote : int
+            Documentos a partir de los cuales el lote se despacha sin esperar.
+        """
+        self.fuente = fuente
+        self.ventana = ventana
+        self.max_lote = max_lote
+        self.lotes = 0
+        self.consultas = 0
+        self._pendientes: List[Tuple[str, asyncio.Future]] = []
+        self._temporizador: Optional[asyncio.TimerHandle] = None
+        # El event loop solo guarda referencias débiles a las tareas; sin este
+        # conjunto un lote en curso podría recolectarse y dejar esperando a sus solicitantes.
+        self._tareas: Set[asyncio.Task] = set()
+        self._scraper: Any = None
+
+    async def submit(self, documento: str) -> Dict[str, List[dict]]:
+        """
+        Encola un documento y espera sus filas de resultado, por fuente.
+
+        Raises
+        ------
+        Exception
+            El error del lote, si la consulta falló.
+        """
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self._pendientes.append((normalize_document(documento), futuro))
+        self.consultas += 1
+        if len(self._pendientes) >= self.max_lote:
+            self._flush()
+        elif self._temporizador is None:
+            self._temporizador = loop.call_later(self.ventana, self._flush)
+        return await futuro
+
+    def _flush(self) -> None:
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        lote, self._pendientes = self._pendientes, []
+        if lote:
+            self.lotes += 1
+            tarea = asyncio.ensure_future(self._dispatch(lote))
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+
+    async def aclose(self) -> None:
+        """Cancela los lotes en curso y las consultas pendientes (cierre del servicio)."""
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        lote, self._pendientes = self._pendientes, []
+        for _, futuro in lote:
+            if not futuro.done():
+                futuro.cancel()
+        tareas = list(self._tareas)
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+
+    async def _resolve(self, documentos: List[str]) -> Dict[str, Dict[str, List[dict]]]:
+        """Resuelve un lote: documento normalizado -> fuente -> filas."""
+        # Una instancia por fuente para todos los lotes; los verificadores de
+        # archivo devuelven además su instancia compartida del proceso.
+        if self._scraper is None:
+            self._scraper = build_scraper(self.fuente)
+        df = await call_run(self._scraper, documentos, None, None)
+        return {doc: {self.fuente: filas} for doc, filas in _rows_by_document(df).items()}
+
+    async def _dispatch(self, lote: List[Tuple[str, asyncio.Future]]) -> None:
+        documentos = list(dict.fromkeys(doc for doc, _ in lote))
+        try:
+            filas = await self._resolve(documentos)
+        except asyncio.CancelledError:
+            for _, futuro in lote:
+                futuro.cancel()
+            raise
+        except Exception as e:
+            logging.exception(f"Lote de {len(documentos)} documentos fallido en '{self.fuente}'")
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+        for doc, futuro in lote:
+            if not futuro.done():
+                futuro.set_result(filas.get(doc, {}))
+
+
+class SanctionsBatcher(MicroBatcher):
+    """Micro-lotes de las listas de sanciones, resueltos juntos en el índice unificado."""
+
+    def __init__(self, fuentes: List[str], ventana: float = DEFAULT_VENTANA, max_lote: int = DEFAULT_MAX_LOTE) -> None:
+        """
+        Parameters
+        ----------
+        fuentes : List[str]
+            Listas indexables en `SCRAPERS` (ver `is_indexable`).
+        """
+        super().__init__("Listas de sanciones", ventana, max_lote)
+        self.fuentes = list(fuentes)
+
+    async def _resolve(self, documentos: List[str]) -> Dict[str, Dict[str, List[dict]]]:
+        resultados = await asyncio.to_thread(screen_sanctions, self.fuentes, documentos)
+        filas: Dict[str, Dict[str, List[dict]]] = {}
+        for fuente, df in resultados.items():
+            for doc, filas_doc in _rows_by_document(df).items():
+                filas.setdefault(doc, {})[fuente] = filas_doc
+        return filas
+
+
+def _rows_by_document(df: pd.DataFrame) -> Dict[str, List[dict]]:
+    """Filas del resultado agrupadas por documento normalizado, con NaN como None."""
+    df = df.astype(object).where(pd.notna(df), None)
+    filas: Dict[str, List[dict]] = {}
+    for fila in df.to_dict("records"):
+        filas.setdefault(normalize_document(fila["Documento"]), []).append(fila)
+    return filas
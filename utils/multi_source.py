@@ -0,0 +1,203 @@
+"""
+Consulta combinada: varias fuentes sobre una misma lista, en un solo reporte.
+
+`run_sources` normaliza y deduplica la lista una sola vez, consulta todas las
+fuentes elegidas a la vez (el tiempo total es el de la más lenta, no la suma)
+y une sus resultados en un reporte ancho por 'Documento', con las columnas de
+cada fuente prefijadas por su nombre. Si se eligen varias listas de sanciones
+(OFAC, UE), se resuelven juntas en el índice unificado (`utils.sanctions_screening`).
+
+Algunas fuentes devuelven varias filas por documento (coincidencias OFAC/UE,
+declaraciones de Función Pública). El reporte tiene exactamente una fila por
+documento: las filas de cada fuente se agregan en "<fuente> | Registros" (cuántas
+coincidencias o registros devolvió, sin contar las filas "Sin coincidencias" o
+"No existe") y, por columna, en sus valores distintos unidos con
+"; ". Filas de fuentes distintas nunca se mezclan en una misma celda.
+"""
+
+import asyncio
+import logging
+import time
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from scrappers.sanctions.sanctions_index import NO_MATCH
+from utils.dedup import DocumentDedup
+from utils.progress import ProgressChannel
+from utils.result_sink import ResultSink
+from utils.run_journal import source_run_id
+from utils.sanctions_screening import is_indexable, screen_sanctions
+from utils.scraper_runner import build_scraper, call_run, run_summary
+
+MODULO_COMBINADO = "Consulta combinada"
+SEPARADOR = " | "
+SEPARADOR_VALORES = "; "
+COLUMNA_REGISTROS = "Registros"
+# Valores con los que las fuentes marcan un documento sin resultados (OFAC/UE, Función Pública).
+SIN_RESULTADO = [NO_MATCH, "No existe"]
+
+
+class _SourceProgress:
+    """Barra y etiqueta de progreso de una fuente dentro de la consulta combinada."""
+
+    def __init__(self, nombre: str, avance: Dict[str, float], canal: ProgressChannel) -> None:
+        self.nombre = nombre
+        self._avance = avance
+        self._canal = canal
+
+    def progress(self, fraccion: float) -> None:
+        self._avance[self.nombre] = fraccion
+        total = sum(self._avance.values()) / len(self._avance)
+        texto = " · ".join(f"{nombre}: {frac:.0%}" for nombre, frac in self._avance.items())
+        self._canal.report(total, texto)
+
+    def text(self, texto: str) -> None:
+        pass
+
+
+def _join_values(valores: pd.Series):
+    """Valores distintos no vacíos de una columna; uno solo conserva su tipo."""
+    distintos = valores.dropna().drop_duplicates()
+    if distintos.empty:
+        return None
+    if len(distintos) == 1:
+        return distintos.iloc[0]
+    return SEPARADOR_VALORES.join(distintos.astype(str))
+
+
+def aggregate_source(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Reduce los resultados de una fuente a una fila por documento.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Resultados de la fuente, con columna 'Documento' y posiblemente
+        varias filas por documento.
+
+    Returns
+    -------
+    pd.DataFrame
+        'Documento', COLUMNA_REGISTROS con el número de filas que traen algún
+        dato y no son de "sin resultado" (SIN_RESULTADO) y, por cada columna original, sus valores distintos unidos con
+        SEPARADOR_VALORES.
+    """
+    df = df.assign(Documento=df['Documento'].astype(str).str.strip())
+    columnas = [col for col in df.columns if col != 'Documento']
+    if columnas:
+        valores = df[columnas]
+        con_datos = valores.notna().any(axis=1) & ~valores.isin(SIN_RESULTADO).any(axis=1)
+    else:
+        con_datos = pd.Series(False, index=df.index)
+    registros = con_datos.groupby(df['Documento'], sort=False).sum().rename(COLUMNA_REGISTROS)
+    if df['Documento'].is_unique:
+        valores = df.set_index('Documento')[columnas]
+    else:
+        valores = df.groupby('Documento', sort=False)[columnas].agg(_join_values)
+    return pd.concat([registros, valores], axis=1).reset_index()
+
+
+def join_wide(dedup: DocumentDedup, resultados: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Une los resultados de varias fuentes en un reporte ancho por documento.
+
+    Parameters
+    ----------
+    dedup : DocumentDedup
+        Plan de deduplicación de la lista original.
+    resultados : Dict[str, pd.DataFrame]
+        Fuente -> resultados sobre `dedup.unicos`, con columna 'Documento'.
+
+    Returns
+    -------
+    pd.DataFrame
+        Una fila por documento de la lista original, en su orden: 'Documento'
+        y, por cada fuente, sus columnas agregadas (`aggregate_source`) como
+        "<fuente> | <columna>".
+    """
+    ancho = pd.DataFrame({'Documento': dedup.unicos})
+    for nombre, df in resultados.items():
+        agregado = aggregate_source(df)
+        agregado = agregado.rename(columns={
+            col: f"{nombre}{SEPARADOR}{col}" for col in agregado.columns if col != 'Documento'
+        })
+        ancho = ancho.merge(agregado, on='Documento', how='left')
+        registros = f"{nombre}{SEPARADOR}{COLUMNA_REGISTROS}"
+        ancho[registros] = ancho[registros].fillna(0).astype(int)
+    return dedup.fan_out(ancho)
+
+
+async def run_sources(
+    scraper_names: List[str], nuips: List[str], progress_bar=None, progress_label=None,
+    sink: Optional[ResultSink] = None, overrides: Optional[dict] = None, run_id: Optional[str] = None,
+) -> Tuple[Optional[ResultSink], str]:
+    """
+    Consulta varias fuentes a la vez y escribe un único reporte ancho en `sink`.
+
+    Si una fuente falla, el reporte se arma con las demás y el error se
+    informa en el resumen. `overrides` se aplica a la configuración de cada
+    fuente (ver `build_scraper`). Con `run_id`, cada fuente lleva su propia
+    bitácora dentro de la ejecución (ver `source_run_id`).
+
+    Returns
+    -------
+    Tuple[ResultSink | None, str]
+        (sink cerrado, resumen), o (None, mensaje) si ninguna fuente respondió.
+    """
+    dedup = DocumentDedup(nuips)
+    canal = ProgressChannel(progress_bar, progress_label, len(dedup.unicos))
+    avance = {nombre: 0.0 for nombre in scraper_names}
+
+    async def consultar(nombre: str) -> List[Tuple[str, Optional[pd.DataFrame], str]]:
+        inicio = time.monotonic()
+        try:
+            scraper = build_scraper(nombre, overrides)
+            barra = _SourceProgress(nombre, avance, canal)
+            df = await call_run(
+                scraper, dedup.unicos, barra, barra, run_id=source_run_id(run_id, nombre) if run_id else None,
+            )
+            if df is None or 'Documento' not in df.columns:
+                return [(nombre, None, f"'{nombre}' no devolvió la columna 'Documento'.")]
+            barra.progress(1.0)
+            resumen = run_summary(scraper)
+            return [(nombre, df, f"'{nombre}' en {time.monotonic() - inicio:.1f} s." + (f" {resumen}" if resumen else ""))]
+        except Exception as e:
+            logging.error(f"Error en la fuente '{nombre}':\n{traceback.format_exc()}")
+            return [(nombre, None, f"Error en '{nombre}': {type(e).__name__} - {e}.")]
+
+    async def consultar_sanciones(nombres: List[str]) -> List[Tuple[str, Optional[pd.DataFrame], str]]:
+        inicio = time.monotonic()
+        try:
+            dfs = await asyncio.to_thread(screen_sanctions, nombres, dedup.unicos, overrides)
+        except Exception as e:
+            logging.error(f"Error en el índice de sanciones:\n{traceback.format_exc()}")
+            return [(nombre, None, f"Error en '{nombre}': {type(e).__name__} - {e}.") for nombre in nombres]
+        for nombre in nombres:
+            _SourceProgress(nombre, avance, canal).progress(1.0)
+        msg = f"{', '.join(repr(n) for n in nombres)} en una pasada del índice de sanciones, {time.monotonic() - inicio:.1f} s."
+        return [(nombre, dfs[nombre], msg if i == 0 else "") for i, nombre in enumerate(nombres)]
+
+    # Las listas de sanciones consultadas juntas se resuelven en un solo cruce del índice unificado.
+    sanciones = [nombre for nombre in scraper_names if is_indexable(nombre)]
+    if len(sanciones) < 2:
+        sanciones = []
+    tareas = [consultar(nombre) for nombre in scraper_names if nombre not in sanciones]
+    if sanciones:
+        tareas.append(consultar_sanciones(sanciones))
+    salidas = [salida for grupo in await asyncio.gather(*tareas) for salida in grupo]
+    salidas.sort(key=lambda salida: scraper_names.index(salida[0]))
+    resultados = {nombre: df for nombre, df, _ in salidas if df is not None}
+    mensajes = [msg for _, _, msg in salidas if msg]
+    if not resultados:
+        return None, " ".join(mensajes)
+
+    sink.write_frame(join_wide(dedup, resultados))
+    sink.close()
+    canal.report(1.0, f"{len(resultados)} de {len(scraper_names)} fuentes completadas", force=True)
+    msg = (
+        f"Consulta combinada de {len(resultados)} de {len(scraper_names)} fuentes completada. "
+        f"{dedup.summary()}. " + " ".join(mensajes)
+    )
+    return sink, msg
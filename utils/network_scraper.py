@@ -0,0 +1,122 @@
+"""
+Base común de los scrapers de red (Defunciones, Morosidad, Función Pública).
+
+`run` sirve desde la caché de resultados los documentos con resultado vigente;
+con `run_id` omite además los ya registrados en la bitácora de la ejecución, y
+solo el resto se consulta en red. Con `sink`, las filas se escriben a disco a
+medida que llegan y no se devuelven.
+
+En la consulta de red un número fijo de workers (`max_concurrent`) consume los
+documentos de a uno, sobre la sesión compartida del host (conexiones, TLS y
+DNS ya calientes). Si otra ejecución ya está consultando el mismo documento,
+se espera su resultado (single-flight). Cada subclase toma el cupo de
+concurrencia por intento dentro de `_fetch`, no durante las esperas entre
+reintentos.
+"""
+
+import logging
+from typing import Callable, List, Optional, Union
+
+import pandas as pd
+from aiohttp import ClientSession
+
+from utils.http_pool import http_session
+from utils.progress import ProgressChannel
+from utils.result_cache import is_error_row, run_cached
+from utils.result_sink import ResultSink
+from utils.run_journal import run_journaled
+from utils.single_flight import single_flight
+from utils.worker_pool import run_worker_pool
+
+
+class NetworkScraper:
+    """
+    Scraper que consulta un documento por petición contra un host.
+
+    Las subclases definen `CACHE_SOURCE`, implementan `_fetch` y fijan en su
+    constructor `host`, `max_concurrent`, `cache_ttl_horas` y `concurrency`.
+    """
+
+    CACHE_SOURCE = ""
+    verify_ssl = True
+
+    async def _fetch(self, session: ClientSession, doc: str) -> Union[dict, List[dict]]:
+        """Consulta un documento; devuelve su fila o sus filas de resultado."""
+        raise NotImplementedError
+
+    async def run(
+        self,
+        nuips: List[str],
+        progress_bar=None,
+        progress_label=None,
+        run_id: Optional[str] = None,
+        sink: Optional[ResultSink] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Ejecuta las consultas y actualiza UI.
+
+        Parameters
+        ----------
+        nuips : List[str]
+        progress_bar : st.Progress
+        progress_label : st.Empty
+        run_id : str, opcional
+            ID de la ejecución. Si una ejecución con el mismo ID quedó a medias,
+            se reanuda desde su bitácora en disco.
+        sink : ResultSink, opcional
+            Si se indica, las filas se escriben a disco a medida que llegan.
+
+        Returns
+        -------
+        pd.DataFrame | None
+            Incluye la columna 'Origen' ("Caché" o "Consulta"). None si se usó `sink`.
+        """
+        return await run_cached(
+            self.CACHE_SOURCE, self.cache_ttl_horas, nuips,
+            lambda faltantes, registrar: run_journaled(
+                run_id, faltantes,
+                lambda pendientes, anotar: self._run_network(
+                    pendientes, progress_bar, progress_label, anotar, acumular=sink is None
+                ),
+                registrar,
+            ),
+            sink=sink,
+        )
+
+    async def _run_network(
+        self, nuips: List[str], progress_bar=None, progress_label=None,
+        registrar: Optional[Callable[[str, List[dict]], None]] = None,
+        acumular: bool = True,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Consulta en red los documentos indicados y actualiza UI. Las filas de
+        cada documento se entregan también a `registrar(documento, filas)`, si
+        se indica. Con `acumular=False` los resultados no se guardan en memoria
+        y se devuelve None.
+        """
+        resultados = []
+        progreso = ProgressChannel(progress_bar, progress_label, len(nuips))
+
+        def recibir(filas: List[dict]) -> None:
+            if acumular:
+                resultados.extend(filas)
+            if registrar:
+                registrar(filas[0]["Documento"], filas)
+            progreso.advance(error=any(is_error_row(fila) for fila in filas))
+
+        async def consultar(session: ClientSession, doc: str) -> List[dict]:
+            res = await single_flight(self.CACHE_SOURCE, doc, lambda: self._fetch(session, doc))
+            return res if isinstance(res, list) else [res]
+
+        async with http_session(self.host, self.verify_ssl) as session:
+            await run_worker_pool(
+                (str(doc) for doc in nuips),
+                lambda doc: consultar(session, doc),
+                recibir,
+                num_workers=self.max_concurrent,
+            )
+
+        progreso.close()
+        logging.info(progreso.summary())
+        logging.info(self.concurrency.summary())
+        return pd.DataFrame(resultados) if acumular else None
@@ -0,0 +1,86 @@
+"""
+Canal de progreso con tasa de refresco limitada.
+
+Cada actualización de `st.progress` o `st.empty().text` es un mensaje por
+websocket al navegador. Los scrapers no actualizan la UI por documento:
+emiten eventos de finalización a un `ProgressChannel`, que lleva la cuenta de
+completados y errores y refresca la UI como máximo `max_hz` veces por
+segundo, más una última vez al cerrar.
+"""
+
+import time
+from typing import Optional
+
+DEFAULT_MAX_HZ = 4.0
+
+
+class ProgressChannel:
+    """Contador de avance que actualiza la barra y la etiqueta de forma acotada."""
+
+    def __init__(self, progress_bar=None, progress_label=None, total: int = 0, max_hz: float = DEFAULT_MAX_HZ) -> None:
+        """
+        Parameters
+        ----------
+        progress_bar : st.progress, opcional
+        progress_label : st.empty, opcional
+        total : int
+            Número de documentos esperados.
+        max_hz : float
+            Máximo de refrescos de la UI por segundo.
+        """
+        self.progress_bar = progress_bar
+        self.progress_label = progress_label
+        self.total = total
+        self.completados = 0
+        self.errores = 0
+        self._intervalo = 1.0 / max_hz if max_hz > 0 else 0.0
+        self._inicio = time.monotonic()
+        self._ultimo_refresco: Optional[float] = None
+
+    @property
+    def throughput(self) -> float:
+        """Documentos completados por segundo desde que se creó el canal."""
+        transcurrido = time.monotonic() - self._inicio
+        return self.completados / transcurrido if transcurrido > 0 else 0.0
+
+    def advance(self, n: int = 1, error: bool = False) -> None:
+        """Registra `n` documentos terminados (con error si `error`)."""
+        self.completados += n
+        if error:
+            self.errores += n
+        if self._due():
+            self._render()
+
+    def report(self, fraccion: float, texto: str, force: bool = False) -> None:
+        """Muestra un avance por etapas (verificadores que no avanzan por documento)."""
+        if force or self._due():
+            self._show(fraccion, texto)
+
+    def close(self) -> None:
+        """Refresca la UI con el estado final."""
+        self._render()
+
+    def summary(self) -> str:
+        """Texto del estado actual: completados, errores y documentos por segundo."""
+        frac = self.completados / self.total if self.total else 1.0
+        return (
+            f"{self.completados} de {self.total} ({frac:.1%}) · "
+            f"{self.errores} con error · {self.throughput:.1f} docs/s"
+        )
+
+    def _due(self) -> bool:
+        ahora = time.monotonic()
+        if self._ultimo_refresco is not None and ahora - self._ultimo_refresco < self._intervalo:
+            return False
+        self._ultimo_refresco = ahora
+        return True
+
+    def _render(self) -> None:
+        frac = self.completados / self.total if self.total else 1.0
+        self._show(min(frac, 1.0), self.summary())
+
+    def _show(self, fraccion: float, texto: str) -> None:
+        if self.progress_bar:
+            self.progress_bar.progress(fraccion)
+        if self.progress_label:
+            self.progress_label.text(texto)
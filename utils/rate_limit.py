@@ -0,0 +1,103 @@
+"""
+Limitador de tasa por host (token bucket) compartido entre scrapers.
+
+El semáforo de concurrencia limita las peticiones en vuelo, pero no cuántas se
+envían por segundo: con respuestas rápidas se producen ráfagas que los
+servidores bloquean. `TokenBucket` deja pasar en promedio `qps` peticiones por
+segundo con ráfagas de hasta `burst`.
+
+Cada petición reserva su turno en una sola operación (el saldo de fichas puede
+quedar negativo) y duerme exactamente hasta ese turno, sin sondeo activo. El
+estado es aritmética protegida por un `threading.Lock`, por lo que un mismo
+limitador sirve a varios event loops (sesiones de Streamlit) a la vez.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+_buckets: Dict[str, "TokenBucket"] = {}
+_registry_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Token bucket con reserva de turnos para asyncio."""
+
+    def __init__(self, qps: float, burst: int = 1) -> None:
+        """
+        Parameters
+        ----------
+        qps : float
+            Peticiones por segundo sostenidas.
+        burst : int
+            Máximo de peticiones que pueden salir de inmediato tras un periodo
+            inactivo.
+        """
+        if qps <= 0 or burst < 1:
+            raise ValueError("Se requiere qps > 0 y burst >= 1")
+        self.qps = float(qps)
+        self.burst = burst
+        self._fichas = float(burst)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def configure(self, qps: float, burst: int) -> None:
+        """Cambia la tasa y la ráfaga conservando el saldo actual."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.qps = float(qps)
+            self.burst = burst
+            self._fichas = min(self._fichas, float(burst))
+
+    def _refill(self, ahora: float) -> None:
+        self._fichas = min(float(self.burst), self._fichas + (ahora - self._ultimo) * self.qps)
+        self._ultimo = ahora
+
+    def reserve(self) -> float:
+        """
+        Reserva una ficha y devuelve cuántos segundos hay que esperar para usarla.
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self._fichas -= 1
+            return -self._fichas / self.qps if self._fichas < 0 else 0.0
+
+    async def acquire(self) -> None:
+        """Espera (sin sondeo) hasta que la petición pueda enviarse."""
+        espera = self.reserve()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+
+def get_rate_limiter(host: str, qps: Optional[float], burst: Optional[int] = None) -> Optional[TokenBucket]:
+    """
+    Devuelve el limitador compartido de un host, creándolo si no existe.
+
+    Parameters
+    ----------
+    host : str
+        Host de destino; todos los scrapers hacia el mismo host comparten limitador.
+    qps : float, opcional
+        Peticiones por segundo. None o 0 deshabilita el límite para este llamador.
+    burst : int, opcional
+        Ráfaga máxima; por defecto, `qps` redondeado hacia arriba.
+
+    Returns
+    -------
+    TokenBucket | None
+        Limitador del host, o None si no hay límite configurado.
+    """
+    if not qps:
+        return None
+    burst = burst or max(1, int(-(-qps // 1)))
+    with _registry_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(qps, burst)
+            _buckets[host] = bucket
+        elif (bucket.qps, bucket.burst) != (float(qps), burst):
+            logging.info(f"Límite de tasa hacia {host} actualizado a {qps} qps (ráfaga {burst})")
+            bucket.configure(qps, burst)
+    return bucket
@@ -0,0 +1,223 @@
+"""
+Caché persistente (SQLite) de resultados de los scrapers de red.
+
+Cada consulta exitosa se guarda por (fuente, documento) junto con la hora en
+que se obtuvo. Mientras no supere el TTL de su fuente, el resultado se sirve
+desde disco y el documento no se vuelve a consultar. Los resultados "Error"
+nunca se guardan, de modo que un fallo transitorio se reintenta en la
+siguiente ejecución.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+DEFAULT_CACHE_PATH = ".cache/resultados.sqlite3"
+
+# Columna del reporte que indica el origen de cada fila.
+COLUMNA_ORIGEN = "Origen"
+ORIGEN_CACHE = "Caché"
+ORIGEN_CONSULTA = "Consulta"
+
+
+def is_error_row(row: dict) -> bool:
+    """Indica si una fila de resultado corresponde a una consulta fallida."""
+    return any(
+        isinstance(v, str) and (v == "Error" or v.startswith("Error "))
+        for v in row.values()
+    )
+
+
+class ResultCache:
+    """
+    Resultados por (fuente, documento) en una base SQLite local.
+
+    Cada operación abre su propia conexión, por lo que una misma instancia
+    puede usarse desde varios hilos o sesiones.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+            Ruta del archivo SQLite.
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resultados ("
+                " fuente TEXT NOT NULL,"
+                " documento TEXT NOT NULL,"
+                " filas TEXT NOT NULL,"
+                " consultado REAL NOT NULL,"
+                " PRIMARY KEY (fuente, documento))"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def lookup(self, fuente: str, documentos: Iterable[str], ttl_horas: float) -> Dict[str, List[dict]]:
+        """
+        Busca resultados vigentes de una fuente.
+
+        Parameters
+        ----------
+        fuente : str
+            Nombre de la fuente.
+        documentos : Iterable[str]
+            Documentos a buscar.
+        ttl_horas : float
+            Antigüedad máxima, en horas, de un resultado servible.
+
+        Returns
+        -------
+        Dict[str, List[dict]]
+            Documento -> filas de resultado guardadas. Solo incluye aciertos.
+        """
+        documentos = list(dict.fromkeys(str(d) for d in documentos))
+        if not documentos or ttl_horas <= 0:
+            return {}
+        limite = time.time() - ttl_horas * 3600
+        encontrados: Dict[str, List[dict]] = {}
+        with self._connect() as conn:
+            # SQLite limita el número de parámetros por consulta.
+            for i in range(0, len(documentos), 500):
+                bloque = documentos[i:i + 500]
+                marcas = ",".join("?" * len(bloque))
+                cursor = conn.execute(
+                    f"SELECT documento, filas FROM resultados"
+                    f" WHERE fuente = ? AND consultado >= ? AND documento IN ({marcas})",
+                    [fuente, limite, *bloque],
+                )
+                for documento, filas in cursor:
+                    encontrados[documento] = json.loads(filas)
+        return encontrados
+
+    def store(self, fuente: str, resultados: pd.DataFrame) -> int:
+        """
+        Guarda los resultados de una fuente, agrupados por 'Documento'.
+
+        Un documento con alguna fila de error no se guarda.
+
+        Returns
+        -------
+        int
+            Número de documentos guardados.
+        """
+        if resultados.empty:
+            return 0
+        ahora = time.time()
+        registros = []
+        for documento, grupo in resultados.groupby(resultados["Documento"].astype(str), sort=False):
+            filas = grupo.astype(object).where(grupo.notna(), None).to_dict("records")
+            if any(is_error_row(fila) for fila in filas):
+                continue
+            registros.append((fuente, documento, json.dumps(filas, ensure_ascii=False, default=str), ahora))
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO resultados (fuente, documento, filas, consultado) VALUES (?, ?, ?, ?)",
+                registros,
+            )
+        return len(registros)
+
+
+async def run_cached(
+    fuente: str,
+    ttl_horas: float,
+    nuips: List[str],
+    consultar: Callable[[List[str], Callable[[str, List[dict]], None]], Awaitable[Optional[pd.DataFrame]]],
+    cache: Optional[ResultCache] = None,
+    sink=None,
+) -> Optional[pd.DataFrame]:
+    """
+    Sirve desde la caché los documentos vigentes y consulta solo los faltantes.
+
+    Parameters
+    ----------
+    fuente : str
+        Nombre de la fuente en la caché.
+    ttl_horas : float
+        TTL de la fuente. Con 0 la caché queda deshabilitada.
+    nuips : List[str]
+        Documentos a consultar.
+    consultar : Callable
+        Corrutina `consultar(faltantes, registrar)` que consulta en red los
+        documentos y llama a `registrar(documento, filas)` por cada uno que
+        termina. Devuelve sus resultados (con columna 'Documento'), o None si
+        solo los entregó por `registrar`.
+    cache : ResultCache, opcional
+        Caché a usar; por defecto la de `DEFAULT_CACHE_PATH`.
+    sink : ResultSink, opcional
+        Si se indica, todas las filas (de caché y de red) se escriben en él a
+        medida que están listas y la función devuelve None.
+
+    Returns
+    -------
+    pd.DataFrame | None
+        Resultados de caché y de red, con la columna `COLUMNA_ORIGEN`; None si
+        se usó `sink`.
+    """
+    documentos = [str(d) for d in nuips]
+    aciertos: Dict[str, List[dict]] = {}
+    if ttl_horas > 0:
+        try:
+            cache = cache or ResultCache()
+            aciertos = cache.lookup(fuente, documentos, ttl_horas)
+        except sqlite3.Error as e:
+            logging.warning(f"No se pudo leer la caché de '{fuente}': {e}")
+            cache = None
+        logging.info(f"Caché '{fuente}': {len(aciertos)} aciertos")
+    faltantes = [d for d in documentos if d not in aciertos]
+
+    filas_cache = [
+        {**fila, COLUMNA_ORIGEN: ORIGEN_CACHE}
+        for d in documentos if d in aciertos for fila in aciertos[d]
+    ]
+    if sink is not None:
+        sink.write(filas_cache)
+        filas_cache = []
+
+    # Los resultados nuevos se guardan en la caché por lotes, a medida que llegan.
+    por_guardar: List[dict] = []
+
+    def guardar() -> None:
+        if por_guardar and cache is not None:
+            try:
+                cache.store(fuente, pd.DataFrame(por_guardar))
+            except sqlite3.Error as e:
+                logging.warning(f"No se pudo escribir la caché de '{fuente}': {e}")
+        por_guardar.clear()
+
+    def registrar(documento: str, filas: List[dict]) -> None:
+        if ttl_horas > 0:
+            por_guardar.extend(filas)
+            if len(por_guardar) >= 500:
+                guardar()
+        if sink is not None:
+            sink.write({**fila, COLUMNA_ORIGEN: ORIGEN_CONSULTA} for fila in filas)
+
+    nuevos = None
+    if faltantes:
+        try:
+            nuevos = await consultar(faltantes, registrar)
+        finally:
+            guardar()
+    if sink is not None:
+        return None
+
+    partes = []
+    if filas_cache:
+        partes.append(pd.DataFrame(filas_cache))
+    if nuevos is not None:
+        partes.append(nuevos.assign(**{COLUMNA_ORIGEN: ORIGEN_CONSULTA}))
+    if not partes:
+        return pd.DataFrame(columns=["Documento", COLUMNA_ORIGEN])
+    return pd.concat(partes, ignore_index=True)
@@ -0,0 +1,189 @@
+"""
+Escritura incremental de resultados a disco (CSV o Parquet).
+
+Los scrapers entregan filas a medida que terminan; `ResultSink` las acumula en
+lotes de `batch_size` y escribe cada lote al archivo de salida, de modo que la
+memoria usada no depende del número total de filas. La descarga final se sirve
+desde ese archivo.
+"""
+
+import logging
+import os
+import time
+from typing import Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_RESULTS_DIR = ".cache/resultados"
+
+FORMATOS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def remove_stale_results(results_dir: str = DEFAULT_RESULTS_DIR, max_age_horas: float = 24) -> int:
+    """
+    Elimina archivos de resultados más antiguos que `max_age_horas`.
+
+    Returns
+    -------
+    int
+        Número de archivos eliminados.
+    """
+    if not os.path.isdir(results_dir):
+        return 0
+    limite = time.time() - max_age_horas * 3600
+    eliminados = 0
+    for nombre in os.listdir(results_dir):
+        path = os.path.join(results_dir, nombre)
+        try:
+            if os.path.isfile(path) and os.path.getmtime(path) < limite:
+                os.remove(path)
+                eliminados += 1
+        except OSError as e:
+            logging.warning(f"No se pudo eliminar {path}: {e}")
+    return eliminados
+
+
+class ResultSink:
+    """
+    Archivo de resultados que se escribe por lotes.
+
+    Las columnas son la unión de las de todos los lotes, en orden de aparición.
+    Si un lote trae columnas nuevas, lo ya escrito se reescribe por lotes con
+    las columnas ampliadas (vacías en las filas anteriores). En Parquet todas
+    las columnas se guardan como texto para que el esquema no dependa de los
+    valores del primer lote.
+    """
+
+    def __init__(self, path: str, batch_size: int = 10_000) -> None:
+        """
+        Parameters
+        ----------
+        path : str
+            Ruta del archivo; la extensión (.csv o .parquet) define el formato.
+        batch_size : int
+            Filas acumuladas antes de escribir un lote.
+
+        Raises
+        ------
+        ValueError
+            Si la extensión no es un formato soportado.
+        """
+        self.formato = os.path.splitext(path)[1].lstrip(".").lower()
+        if self.formato not in FORMATOS:
+            raise ValueError(f"Formato de salida no soportado: '{self.formato}'")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.columnas: Optional[List[str]] = None
+        self.filas_escritas = 0
+        self._buffer: List[dict] = []
+        self._iniciado = False
+        self._parquet_writer: Optional[pq.ParquetWriter] = None
+        # Archivo Parquet en escritura; difiere de `path` tras ampliar columnas.
+        self._parquet_path = path
+        if os.path.exists(path):
+            os.remove(path)
+
+    @property
+    def mime(self) -> str:
+        """Tipo MIME del archivo, para la descarga."""
+        return FORMATOS[self.formato]
+
+    def write(self, filas: Iterable[dict]) -> None:
+        """Agrega filas; se escriben a disco al completar un lote."""
+        self._buffer.extend(filas)
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+
+    def write_frame(self, df: pd.DataFrame) -> None:
+        """Escribe un DataFrame completo, por lotes."""
+        for inicio in range(0, len(df), self.batch_size):
+            self._write_batch(df.iloc[inicio:inicio + self.batch_size])
+        if df.empty and self.columnas is None:
+            self._write_batch(df)
+
+    def _flush(self) -> None:
+        if self._buffer:
+            self._write_batch(pd.DataFrame(self._buffer))
+            self._buffer = []
+
+    def _write_batch(self, lote: pd.DataFrame) -> None:
+        if self.columnas is None:
+            self.columnas = list(lote.columns)
+        else:
+            nuevas = [c for c in lote.columns if c not in self.columnas]
+            if nuevas:
+                self._widen(nuevas)
+            lote = lote.reindex(columns=self.columnas)
+
+        if self.formato == "csv":
+            lote.to_csv(self.path, mode="a", header=not self._iniciado, index=False)
+        else:
+            tabla = pa.table({
+                col: pa.array([None if pd.isna(v) else str(v) for v in lote[col]], type=pa.string())
+                for col in self.columnas
+            })
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self._parquet_path, tabla.schema)
+            self._parquet_writer.write_table(tabla)
+        self._iniciado = True
+        self.filas_escritas += len(lote)
+
+    def _widen(self, nuevas: List[str]) -> None:
+        """Agrega columnas y reescribe, por lotes, lo que ya está en disco."""
+        logging.info(f"Columnas nuevas en {self.path}: {nuevas}; se reescribe lo ya escrito")
+        self.columnas = self.columnas + nuevas
+        if not self._iniciado:
+            return
+        if self.formato == "csv":
+            tmp = f"{self.path}.tmp"
+            lotes = pd.read_csv(self.path, dtype=str, keep_default_na=False, chunksize=self.batch_size)
+            for i, lote in enumerate(lotes):
+                lote.reindex(columns=self.columnas).to_csv(tmp, mode="w" if i == 0 else "a", header=i == 0, index=False)
+            os.replace(tmp, self.path)
+            return
+        self._parquet_writer.close()
+        origen = self._parquet_path
+        self._parquet_path = f"{self.path}.{'b' if origen.endswith('.a') else 'a'}"
+        esquema = pa.schema([(col, pa.string()) for col in self.columnas])
+        self._parquet_writer = pq.ParquetWriter(self._parquet_path, esquema)
+        for lote in pq.ParquetFile(origen).iter_batches(batch_size=self.batch_size):
+            tabla = pa.Table.from_batches([lote])
+            self._parquet_writer.write_table(pa.table({
+                col: tabla[col] if col in tabla.column_names else pa.nulls(len(tabla), pa.string())
+                for col in self.columnas
+            }, schema=esquema))
+        os.remove(origen)
+
+    def close(self) -> None:
+        """Escribe el último lote y cierra el archivo."""
+        self._flush()
+        if not self._iniciado:
+            # Sin filas: archivo vacío pero válido.
+            self._write_batch(pd.DataFrame(columns=self.columnas or ["Documento"]))
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        if self._parquet_path != self.path:
+            os.replace(self._parquet_path, self.path)
+            self._parquet_path = self.path
+
+    def preview(self, n: int = 1000) -> pd.DataFrame:
+        """Primeras `n` filas del archivo ya cerrado, para mostrar en pantalla."""
+        return read_preview(self.path, n)
+
+
+def read_preview(path: str, n: int = 1000) -> pd.DataFrame:
+    """Primeras `n` filas de un archivo de resultados (CSV o Parquet)."""
+    if path.lower().endswith(".csv"):
+        return pd.read_csv(path, nrows=n, dtype=str, keep_default_na=False)
+    archivo = pq.ParquetFile(path)
+    lotes = archivo.iter_batches(batch_size=n)
+    primero = next(lotes, None)
+    return primero.to_pandas() if primero is not None else archivo.schema_arrow.empty_table().to_pandas()
+
@@ -0,0 +1,252 @@
+"""
+Política de reintentos y circuit breaker por host para los scrapers de red.
+
+`RetryPolicy` decide qué fallos se reintentan (errores de conexión, timeouts y
+HTTP 408/429/5xx) y cuánto esperar: backoff exponencial con jitter completo,
+o lo que indique la cabecera `Retry-After` si el servidor la envía.
+
+`CircuitBreaker` cuenta los fallos consecutivos contra un host. Al superar el
+umbral se abre y las peticiones fallan de inmediato (`CircuitOpenError`) en
+lugar de esperar y reintentar contra una fuente caída. Pasado el tiempo de
+enfriamiento deja pasar una petición de prueba: si responde, se cierra; si
+no, vuelve a abrirse.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, FrozenSet, Optional, TypeVar
+
+import aiohttp
+
+T = TypeVar("T")
+
+RETRYABLE_STATUSES: FrozenSet[int] = frozenset({408, 429, 500, 502, 503, 504})
+
+_breakers: Dict[str, "CircuitBreaker"] = {}
+_registry_lock = threading.Lock()
+
+
+class RetryableStatus(Exception):
+    """Respuesta HTTP con un estado que vale la pena reintentar."""
+
+    def __init__(self, status: int, retry_after: Optional[float] = None) -> None:
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(Exception):
+    """El circuito del host está abierto; la petición no se envió."""
+
+
+def parse_retry_after(valor: Optional[str]) -> Optional[float]:
+    """
+    Interpreta la cabecera `Retry-After` (segundos o fecha HTTP).
+
+    Returns
+    -------
+    float | None
+        Segundos a esperar, o None si no hay cabecera o no es válida.
+    """
+    if not valor:
+        return None
+    valor = valor.strip()
+    if valor.isdigit():
+        return float(valor)
+    try:
+        return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Qué se reintenta y cuánto se espera entre intentos."""
+
+    def __init__(
+        self,
+        max_intentos: int = 3,
+        espera_base: float = 0.5,
+        espera_maxima: float = 30.0,
+        statuses: FrozenSet[int] = RETRYABLE_STATUSES,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        max_intentos : int
+            Intentos totales por petición, incluido el primero.
+        espera_base : float
+            Segundos de la primera espera; se duplica en cada intento.
+        espera_maxima : float
+            Tope de cualquier espera, incluida la pedida por `Retry-After`.
+        statuses : FrozenSet[int]
+            Estados HTTP reintentables.
+        """
+        self.max_intentos = max(1, max_intentos)
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.statuses = statuses
+
+    def is_retryable_status(self, status: int) -> bool:
+        return status in self.statuses
+
+    @staticmethod
+    def is_retryable_exception(exc: BaseException) -> bool:
+        """Errores de conexión y timeouts; no los de contenido (JSON, parseo)."""
+        return isinstance(exc, (RetryableStatus, asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError))
+
+    def backoff(self, intento: int, retry_after: Optional[float] = None) -> float:
+        """
+        Espera antes del intento `intento + 1`.
+
+        Con `Retry-After` se respeta lo pedido por el servidor; si no, se usa
+        jitter completo sobre un tope exponencial para no sincronizar a todos
+        los clientes que fallaron a la vez.
+        """
+        if retry_after is not None:
+            return min(retry_after, self.espera_maxima)
+        tope = min(self.espera_maxima, self.espera_base * 2 ** (intento - 1))
+        return random.uniform(0, tope)
+
+
+class CircuitBreaker:
+    """Circuit breaker de un host, compartido entre scrapers y event loops."""
+
+    def __init__(self, host: str, umbral_fallos: int = 10, enfriamiento: float = 30.0) -> None:
+        """
+        Parameters
+        ----------
+        host : str
+            Host protegido.
+        umbral_fallos : int
+            Fallos consecutivos que abren el circuito.
+        enfriamiento : float
+            Segundos que el circuito permanece abierto antes de probar de nuevo.
+        """
+        self.host = host
+        self.umbral_fallos = umbral_fallos
+        self.enfriamiento = enfriamiento
+        self._fallos = 0
+        self._abierto_hasta: Optional[float] = None
+        self._prueba_en_curso = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._abierto_hasta is not None
+
+    def allow(self) -> bool:
+        """Indica si una petición puede salir ahora."""
+        with self._lock:
+            if self._abierto_hasta is None:
+                return True
+            if time.monotonic() < self._abierto_hasta or self._prueba_en_curso:
+                return False
+            # Semiabierto: una única petición de prueba.
+            self._prueba_en_curso = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._abierto_hasta is not None:
+                logging.info(f"Circuito hacia {self.host} cerrado")
+            self._fallos = 0
+            self._abierto_hasta = None
+            self._prueba_en_curso = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._fallos += 1
+            if self._prueba_en_curso or (self._abierto_hasta is None and self._fallos >= self.umbral_fallos):
+                logging.warning(f"Circuito hacia {self.host} abierto por {self.enfriamiento:.0f} s tras {self._fallos} fallos")
+                self._abierto_hasta = time.monotonic() + self.enfriamiento
+                self._prueba_en_curso = False
+
+    def record_abort(self) -> None:
+        """
+        La petición terminó sin veredicto sobre el host: error de contenido o
+        cancelación.
+
+        Fuera de una prueba no cuenta como fallo. Si había una prueba en curso
+        el circuito se reabre otro periodo de enfriamiento; de lo contrario la
+        prueba quedaría tomada para siempre y el host bloqueado.
+        """
+        with self._lock:
+            if self._prueba_en_curso:
+                logging.warning(f"Prueba hacia {self.host} sin respuesta válida; circuito abierto por {self.enfriamiento:.0f} s")
+                self._abierto_hasta = time.monotonic() + self.enfriamiento
+                self._prueba_en_curso = False
+
+
+def get_circuit_breaker(host: str, umbral_fallos: int = 10, enfriamiento: float = 30.0) -> CircuitBreaker:
+    """Devuelve el circuit breaker compartido de un host, creándolo si no existe."""
+    with _registry_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(host, umbral_fallos, enfriamiento)
+            _breakers[host] = breaker
+    return breaker
+
+
+async def retry_call(
+    intento: Callable[[], Awaitable[T]],
+    policy: RetryPolicy,
+    breaker: Optional[CircuitBreaker] = None,
+    descripcion: str = "",
+) -> T:
+    """
+    Ejecuta `intento` aplicando la política de reintentos y el circuit breaker.
+
+    Parameters
+    ----------
+    intento : Callable[[], Awaitable[T]]
+        Corrutina que hace una petición. Para un estado HTTP reintentable debe
+        lanzar `RetryableStatus`.
+    policy : RetryPolicy
+        Política de reintentos.
+    breaker : CircuitBreaker, opcional
+        Circuit breaker del host.
+    descripcion : str
+        Texto para los mensajes de log (p. ej. el documento).
+
+    Returns
+    -------
+    T
+        Resultado del primer intento exitoso.
+
+    Raises
+    ------
+    CircuitOpenError
+        Si el circuito está abierto.
+    Exception
+        El último error reintentable al agotar los intentos, o el primero no
+        reintentable.
+    """
+    for n in range(1, policy.max_intentos + 1):
+        if breaker is not None and not breaker.allow():
+            raise CircuitOpenError(f"Circuito abierto hacia {breaker.host}")
+        try:
+            resultado = await intento()
+        except Exception as e:
+            if not policy.is_retryable_exception(e):
+                if breaker is not None:
+                    breaker.record_abort()
+                raise
+            if breaker is not None:
+                breaker.record_failure()
+            logging.warning(f"Intento {n} fallido para {descripcion}: {e}")
+            if n == policy.max_intentos:
+                raise
+            await asyncio.sleep(policy.backoff(n, getattr(e, "retry_after", None)))
+            continue
+        except BaseException:
+            # Cancelación del trabajo (CancelledError) u otra salida abrupta.
+            if breaker is not None:
+                breaker.record_abort()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return resultado
@@ -0,0 +1,181 @@
+"""
+Bitácora en disco (append-only) de ejecuciones largas, para reanudarlas.
+
+Cada documento terminado se escribe como una línea JSON en
+`<journal_dir>/<run_id>.jsonl` apenas su resultado está listo. Cada trabajo
+recibe un `run_id` propio (`make_run_id`), así que dos ejecuciones del mismo
+archivo a la vez no comparten bitácora. Si la sesión se cae o el proceso se
+reinicia, reanudar el trabajo con su mismo `run_id` lee la bitácora, omite
+los documentos ya resueltos y une sus resultados al DataFrame final. Los
+resultados "Error" no se registran, así que se reintentan. Al terminar la
+ejecución sin fallos la bitácora se elimina.
+"""
+
+import json
+import logging
+import os
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from utils.result_cache import is_error_row
+
+DEFAULT_JOURNAL_DIR = ".cache/bitacoras"
+
+# Cada cuántas líneas se fuerza la escritura a disco (fsync).
+_FSYNC_CADA = 1000
+
+Registrar = Callable[[str, List[dict]], None]
+
+
+def _slug(nombre: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in nombre.lower())
+
+
+def make_run_id(nombre: str) -> str:
+    """
+    ID de ejecución nuevo para un trabajo del módulo indicado.
+
+    Es único por trabajo: para reanudar una ejecución interrumpida hay que
+    volver a pasar su mismo ID.
+    """
+    return f"{_slug(nombre)}-{uuid.uuid4().hex[:16]}"
+
+
+def source_run_id(run_id: str, fuente: str) -> str:
+    """ID de la bitácora de una fuente dentro de una consulta combinada."""
+    return f"{run_id}-{_slug(fuente)}"
+
+
+class RunJournal:
+    """Bitácora append-only de (documento, filas de resultado) de una ejecución."""
+
+    def __init__(self, run_id: str, journal_dir: str = DEFAULT_JOURNAL_DIR) -> None:
+        """
+        Parameters
+        ----------
+        run_id : str
+            Identificador de la ejecución.
+        journal_dir : str
+            Directorio de las bitácoras.
+        """
+        os.makedirs(journal_dir, exist_ok=True)
+        self.run_id = run_id
+        self.path = os.path.join(journal_dir, f"{run_id}.jsonl")
+        self._archivo = None
+        self._pendientes_fsync = 0
+
+    def completed(self) -> Dict[str, List[dict]]:
+        """
+        Lee los documentos ya resueltos.
+
+        Una última línea truncada (escritura interrumpida) se ignora.
+
+        Returns
+        -------
+        Dict[str, List[dict]]
+            Documento -> filas de resultado, en orden de registro.
+        """
+        hechos: Dict[str, List[dict]] = {}
+        if not os.path.exists(self.path):
+            return hechos
+        with open(self.path, encoding="utf-8") as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                except json.JSONDecodeError:
+                    logging.warning(f"Línea incompleta ignorada en la bitácora {self.path}")
+                    continue
+                hechos[registro["documento"]] = registro["filas"]
+        return hechos
+
+    def append(self, documento: str, filas: List[dict]) -> None:
+        """Registra un documento terminado; los que tienen filas de error se omiten."""
+        if any(is_error_row(fila) for fila in filas):
+            return
+        if self._archivo is None:
+            self._archivo = open(self.path, "a", encoding="utf-8")
+        self._archivo.write(json.dumps({"documento": documento, "filas": filas}, ensure_ascii=False, default=str) + "\n")
+        self._archivo.flush()
+        self._pendientes_fsync += 1
+        if self._pendientes_fsync >= _FSYNC_CADA:
+            os.fsync(self._archivo.fileno())
+            self._pendientes_fsync = 0
+
+    def close(self) -> None:
+        """Cierra la bitácora asegurando lo escrito en disco."""
+        if self._archivo is not None:
+            os.fsync(self._archivo.fileno())
+            self._archivo.close()
+            self._archivo = None
+
+    def discard(self) -> None:
+        """Cierra y elimina la bitácora."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def run_journaled(
+    run_id: Optional[str],
+    nuips: List[str],
+    consultar: Callable[[List[str], Registrar], Awaitable[Optional[pd.DataFrame]]],
+    registrar: Optional[Registrar] = None,
+    journal_dir: str = DEFAULT_JOURNAL_DIR,
+) -> Optional[pd.DataFrame]:
+    """
+    Ejecuta `consultar` sobre los documentos que la bitácora aún no tiene.
+
+    Parameters
+    ----------
+    run_id : str, opcional
+        ID de la ejecución. Sin ID no se usa bitácora.
+    nuips : List[str]
+        Documentos de la ejecución.
+    consultar : Callable
+        Corrutina `consultar(pendientes, registrar)` que debe llamar a
+        `registrar(documento, filas)` por cada documento terminado. Devuelve
+        sus resultados, o None si solo los entregó por `registrar`.
+    registrar : Callable, opcional
+        Receptor externo de cada documento terminado, incluidos los
+        recuperados de la bitácora.
+    journal_dir : str
+        Directorio de las bitácoras.
+
+    Returns
+    -------
+    pd.DataFrame | None
+        Filas recuperadas de la bitácora seguidas de las recién consultadas;
+        None si `consultar` devolvió None.
+    """
+    externo = registrar or (lambda documento, filas: None)
+    if not run_id:
+        return await consultar(nuips, externo)
+
+    journal = RunJournal(run_id, journal_dir)
+    hechos = journal.completed()
+    pendientes = [d for d in nuips if str(d) not in hechos]
+    if hechos:
+        logging.info(f"Reanudando '{run_id}': {len(nuips) - len(pendientes)} documentos ya resueltos, {len(pendientes)} pendientes")
+
+    for d in (str(d) for d in nuips):
+        if d in hechos:
+            externo(d, hechos[d])
+
+    def registrar_y_anotar(documento: str, filas: List[dict]) -> None:
+        journal.append(documento, filas)
+        externo(documento, filas)
+
+    try:
+        nuevos = await consultar(pendientes, registrar_y_anotar) if pendientes else pd.DataFrame()
+    finally:
+        journal.close()
+    journal.discard()
+
+    if nuevos is None:
+        return None
+    recuperados = [fila for d in (str(d) for d in nuips) if d in hechos for fila in hechos[d]]
+    if not recuperados:
+        return nuevos
+    return pd.concat([pd.DataFrame(recuperados), nuevos], ignore_index=True)
@@ -0,0 +1,91 @@
+"""
+Verificación combinada de las listas de sanciones (OFAC, UE) en una sola pasada.
+
+Cuando se consultan a la vez varias listas basadas en archivo, sus
+verificadores compartidos se ingieren en un `SanctionsIndex` y el lote de
+documentos se resuelve con un único hash join sobre todas ellas. El índice
+se guarda en disco por combinación de versiones: se reutiliza entre procesos
+(app, API, CLI) y se reconstruye solo cuando alguna lista cambia.
+"""
+
+import logging
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from scrappers import SCRAPER_CLASSES
+from scrappers.sanctions.sanctions_index import DEFAULT_INDEX_DIR, SanctionsIndex
+from utils.scraper_runner import build_scraper
+
+_indices: Dict[tuple, SanctionsIndex] = {}
+_lock = threading.Lock()
+
+
+def is_indexable(scraper_name: str) -> bool:
+    """Indica si la fuente puede resolverse en el índice unificado de sanciones."""
+    return hasattr(SCRAPER_CLASSES.get(scraper_name), "as_sanctions_source")
+
+
+def get_sanctions_index(
+    scraper_names: List[str], overrides: Optional[dict] = None, index_dir: str = DEFAULT_INDEX_DIR,
+) -> Tuple[SanctionsIndex, Dict[str, str]]:
+    """
+    Devuelve el índice de sanciones de las versiones vigentes de las listas.
+
+    El índice de una combinación de versiones se abre desde disco si otro
+    proceso ya lo construyó; al construir uno nuevo se borran los de
+    versiones anteriores.
+
+    Parameters
+    ----------
+    scraper_names : List[str]
+        Fuentes indexables (ver `is_indexable`).
+    overrides : dict, opcional
+        Parámetros de construcción de los verificadores (ver `build_scraper`).
+    index_dir : str
+        Directorio base de los índices.
+
+    Returns
+    -------
+    Tuple[SanctionsIndex, Dict[str, str]]
+        (índice, fuente en `SCRAPERS` -> etiqueta de la lista en el índice).
+    """
+    sources = {nombre: build_scraper(nombre, overrides).as_sanctions_source() for nombre in scraper_names}
+    clave = tuple((source.nombre, source.version) for source in sources.values())
+    etiquetas = {nombre: source.nombre for nombre, source in sources.items()}
+
+    with _lock:
+        indice = _indices.get(clave)
+        if indice is None:
+            destino = Path(index_dir) / "_".join(f"{nombre}-{version}" for nombre, version in clave)
+            try:
+                indice = SanctionsIndex(str(destino))
+            except FileNotFoundError:
+                logging.info(f"Construyendo índice de sanciones {destino.name}")
+                indice = SanctionsIndex.build(sources.values(), str(destino))
+                for anterior in destino.parent.iterdir():
+                    if anterior != destino and anterior.is_dir() and "." not in anterior.name:
+                        shutil.rmtree(anterior, ignore_errors=True)
+            _indices.clear()
+            _indices[clave] = indice
+    return indice, etiquetas
+
+
+def screen_sanctions(
+    scraper_names: List[str], documentos: List[str], overrides: Optional[dict] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    Verifica un lote de documentos contra varias listas en una sola pasada.
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        Fuente en `SCRAPERS` -> resultados con las mismas columnas que el
+        `run` de su verificador.
+    """
+    indice, etiquetas = get_sanctions_index(scraper_names, overrides)
+    resultados = indice.screen(documentos, fuentes=list(etiquetas.values()))
+    return {nombre: resultados[etiqueta] for nombre, etiqueta in etiquetas.items()}
@@ -0,0 +1,168 @@
+"""
+Ejecución de un módulo de consulta, independiente de la interfaz.
+
+`run_scraper` arma el scraper configurado, deduplica los documentos, reanuda
+desde la bitácora, escribe los resultados en un `ResultSink` y devuelve un
+resumen. No importa Streamlit: la usan tanto la página de la app (a través de
+los trabajos en segundo plano) como cualquier otro punto de entrada.
+"""
+
+import asyncio
+import inspect
+import logging
+import traceback
+from typing import Optional, Tuple
+
+from config.scrappers_config import SCRAPERS
+from scrappers import SCRAPER_CLASSES
+from utils.checker_registry import get_checker, is_file_backed
+from utils.dedup import DocumentDedup, FanOutSink
+from utils.result_sink import ResultSink
+
+
+def build_scraper(scraper_name: str, overrides: Optional[dict] = None):
+    """
+    Instancia el scraper configurado con el nombre dado.
+
+    Los verificadores basados en archivo (OFAC, UE) se construyen una vez por
+    proceso y se comparten.
+
+    Parameters
+    ----------
+    scraper_name : str
+        Clave en `SCRAPERS` y `SCRAPER_CLASSES`.
+    overrides : dict, opcional
+        Parámetros que reemplazan a los de la configuración (p. ej.
+        `max_concurrent`, `qps`). Los que el scraper no admite se ignoran.
+
+    Raises
+    ------
+    KeyError
+        Si no hay implementación o configuración para `scraper_name`.
+    """
+    cfg = SCRAPERS.get(scraper_name)
+    ScraperClass = SCRAPER_CLASSES.get(scraper_name)
+    if not ScraperClass or cfg is None:
+        raise KeyError(f"No existe implementación o configuración para '{scraper_name}'.")
+    if overrides:
+        admitidos = inspect.signature(ScraperClass.__init__).parameters
+        cfg = {**cfg, **{k: v for k, v in overrides.items() if k in admitidos}}
+    if is_file_backed(ScraperClass):
+        return get_checker(scraper_name, ScraperClass, cfg)
+    return ScraperClass(**cfg)
+
+
+def accepts_sink(scraper_instance) -> bool:
+    """Indica si el `run` del scraper puede escribir sus filas en un sink."""
+    return "sink" in inspect.signature(scraper_instance.run).parameters
+
+
+async def call_run(
+    scraper_instance, documentos, progress_bar, progress_label, sink=None, run_id: Optional[str] = None,
+):
+    """
+    Llama al `run` del scraper con los argumentos que acepte.
+
+    Pasa la barra y etiqueta de progreso, el `run_id` (bitácora de la
+    ejecución, si se indica) y el `sink` si el método los admite. Los métodos síncronos corren en un hilo para no bloquear el
+    event loop.
+
+    Returns
+    -------
+    pd.DataFrame | None
+        Lo que devuelva `run`; None si escribió en `sink`.
+    """
+    run_method = scraper_instance.run
+    params = inspect.signature(run_method).parameters
+    run_args = [documentos]
+    run_kwargs = {}
+
+    if "progress_bar" in params and "progress_label" in params:
+        run_args.extend([progress_bar, progress_label])
+    if run_id and "run_id" in params:
+        run_kwargs["run_id"] = run_id
+    if sink is not None and "sink" in params:
+        run_kwargs["sink"] = sink
+
+    if inspect.iscoroutinefunction(run_method):
+        return await run_method(*run_args, **run_kwargs)
+    return await asyncio.to_thread(run_method, *run_args, **run_kwargs)
+
+
+def run_summary(scraper_instance) -> str:
+    """Resúmenes de concurrencia y tiempos que exponga el scraper, si los tiene."""
+    partes = []
+    concurrency = getattr(scraper_instance, "concurrency", None)
+    if concurrency is not None:
+        partes.append(f"{concurrency.summary()}.")
+    timing_summary = getattr(scraper_instance, "timing_summary", None)
+    if timing_summary is not None:
+        partes.append(f"{timing_summary()}.")
+    return " ".join(partes)
+
+
+async def run_scraper(
+    scraper_name: str, nuips, progress_bar, progress_label, modo: str = "Documento", sink: Optional[ResultSink] = None,
+    overrides: Optional[dict] = None, run_id: Optional[str] = None,
+) -> Tuple[Optional[ResultSink], str]:
+    """
+    Ejecuta un único scraper y escribe los resultados en `sink`.
+
+    Los scrapers que aceptan `sink` escriben sus filas a medida que terminan;
+    los que devuelven un DataFrame (OFAC, UE, búsqueda por nombre) se vuelcan
+    al final. Los métodos síncronos corren en un hilo para no bloquear el
+    event loop. `overrides` reemplaza parámetros de la configuración (ver
+    `build_scraper`). Con `run_id`, los scrapers que lo admiten registran
+    cada documento en su bitácora y reanudan desde ella (ver `run_journal`).
+    Devuelve (sink cerrado, resumen) o (None, mensaje de error).
+    """
+    try:
+        scraper_instance = build_scraper(scraper_name, overrides)
+    except KeyError as e:
+        return None, e.args[0]
+    ScraperClass = type(scraper_instance)
+    try:
+        if modo == "Nombre":
+            sink.write_frame(await asyncio.to_thread(scraper_instance.screen_names, nuips))
+            sink.close()
+            return sink, f"Búsqueda por nombre en '{scraper_name}' completada exitosamente."
+
+        # Los scrapers de red consultan cada documento único una sola vez; los
+        # verificadores basados en archivo ya deduplican internamente.
+        dedup = None if is_file_backed(ScraperClass) else DocumentDedup(nuips)
+
+        streaming = accepts_sink(scraper_instance)
+        sink_scraper = None
+        if streaming:
+            sink_scraper = FanOutSink(sink, dedup) if dedup else sink
+        df_res = await call_run(
+            scraper_instance, dedup.unicos if dedup else nuips,
+            progress_bar, progress_label, sink_scraper, run_id,
+        )
+
+        msg = f"Consulta en '{scraper_name}' completada exitosamente."
+        if streaming:
+            # Con deduplicación, FanOutSink restablece el orden del archivo cargado al cerrar.
+            sink_scraper.close()
+            if "Documento" not in sink.columnas:
+                return None, f"El scraper '{scraper_name}' no devolvió la columna 'Documento'."
+        else:
+            if "Documento" not in df_res.columns:
+                return None, f"El scraper '{scraper_name}' no devolvió la columna 'Documento'."
+            df_res["Documento"] = df_res["Documento"].astype(str)
+            if dedup:
+                df_res = dedup.fan_out(df_res)
+            sink.write_frame(df_res)
+            sink.close()
+
+        if dedup:
+            msg += f" {dedup.summary()}."
+        resumen = run_summary(scraper_instance)
+        if resumen:
+            msg += f" {resumen}"
+        return sink, msg
+
+    except Exception as e:
+        error_type = type(e).__name__
+        logging.error(f"Error crítico en '{scraper_name}':\n{traceback.format_exc()}")
+        return None, f"Error crítico en '{scraper_name}': {error_type} - {e}."
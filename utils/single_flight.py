@@ -0,0 +1,100 @@
+"""
+Coalescencia de consultas simultáneas (single-flight) por (fuente, documento).
+
+Cuando varias ejecuciones (trabajos de distintos usuarios, fuentes de una
+consulta combinada) piden el mismo documento a la misma fuente al mismo
+tiempo, solo la primera sale a la red; las demás esperan su resultado y
+reciben una copia. El registro es del proceso y funciona entre event loops:
+el resultado se publica en un `concurrent.futures.Future`.
+
+Solo se comparten consultas en curso; lo ya resuelto lo sirve la caché de
+resultados (`utils.result_cache`).
+"""
+
+import asyncio
+import copy
+import threading
+from collections import Counter
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _LeaderCancelled(Exception):
+    """La consulta que se compartía se canceló; los que esperaban la repiten."""
+
+
+class SingleFlight:
+    """Registro de consultas en vuelo por clave."""
+
+    def __init__(self) -> None:
+        self._en_vuelo: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.compartidas: Counter = Counter()
+
+    async def do(self, clave: Tuple[str, str], consulta: Callable[[], Awaitable[T]]) -> T:
+        """
+        Ejecuta `consulta` o espera a la que ya está en curso con la misma clave.
+
+        Parameters
+        ----------
+        clave : Tuple[str, str]
+            (fuente, documento).
+        consulta : Callable[[], Awaitable[T]]
+            Corrutina que hace la consulta de red.
+
+        Returns
+        -------
+        T
+            Resultado de la consulta; quienes esperaban reciben una copia.
+        """
+        while True:
+            with self._lock:
+                futuro = self._en_vuelo.get(clave)
+                lider = futuro is None
+                if lider:
+                    futuro = Future()
+                    self._en_vuelo[clave] = futuro
+                else:
+                    self.compartidas[clave[0]] += 1
+
+            if not lider:
+                try:
+                    # shield: si se cancela quien espera, la consulta compartida sigue.
+                    resultado = await asyncio.shield(asyncio.wrap_future(futuro))
+                except _LeaderCancelled:
+                    continue
+                return copy.deepcopy(resultado)
+
+            try:
+                resultado = await consulta()
+            except asyncio.CancelledError:
+                self._finish(clave, futuro, excepcion=_LeaderCancelled())
+                raise
+            except BaseException as e:
+                self._finish(clave, futuro, excepcion=e)
+                raise
+            self._finish(clave, futuro, resultado=resultado)
+            return resultado
+
+    def _finish(self, clave, futuro: Future, resultado=None, excepcion=None) -> None:
+        with self._lock:
+            self._en_vuelo.pop(clave, None)
+        if excepcion is not None:
+            futuro.set_exception(excepcion)
+        else:
+            futuro.set_result(resultado)
+
+
+_grupo = SingleFlight()
+
+
+async def single_flight(fuente: str, documento: str, consulta: Callable[[], Awaitable[T]]) -> T:
+    """Ejecuta `consulta` compartiéndola con las simultáneas de la misma (fuente, documento)."""
+    return await _grupo.do((fuente, str(documento)), consulta)
+
+
+def coalesced_count(fuente: str) -> int:
+    """Consultas de `fuente` que se resolvieron esperando a otra en curso."""
+    return _grupo.compartidas[fuente]
@@ -0,0 +1,81 @@
+"""
+Pool acotado de workers asíncronos (productor/consumidor).
+
+En lugar de crear una corrutina por documento antes de enviar la primera
+petición, un productor recorre el iterador de entrada y llena una cola de
+tamaño fijo de la que un número fijo de workers toma documentos. Cada
+resultado se entrega al `sink` apenas está listo. La memoria usada por la
+ejecución no depende del tamaño del lote, salvo lo que acumule el propio sink.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_FIN = object()
+
+
+async def run_worker_pool(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[R]],
+    sink: Callable[[R], None],
+    num_workers: int,
+    queue_size: Optional[int] = None,
+) -> int:
+    """
+    Procesa `items` con `num_workers` workers y entrega cada resultado a `sink`.
+
+    Parameters
+    ----------
+    items : Iterable[T]
+        Entrada; se consume de forma perezosa.
+    worker : Callable[[T], Awaitable[R]]
+        Corrutina que procesa un elemento.
+    sink : Callable[[R], None]
+        Recibe cada resultado, en orden de finalización.
+    num_workers : int
+        Número de workers concurrentes.
+    queue_size : int, opcional
+        Capacidad de la cola de entrada; por defecto, el doble de workers.
+
+    Returns
+    -------
+    int
+        Número de elementos procesados.
+
+    Raises
+    ------
+    Exception
+        La primera excepción de un worker o del sink; los demás se cancelan.
+    """
+    num_workers = max(1, num_workers)
+    cola: asyncio.Queue = asyncio.Queue(maxsize=queue_size or 2 * num_workers)
+    procesados = 0
+
+    async def producir() -> None:
+        for item in items:
+            await cola.put(item)
+        for _ in range(num_workers):
+            await cola.put(_FIN)
+
+    async def consumir() -> None:
+        nonlocal procesados
+        while True:
+            item = await cola.get()
+            if item is _FIN:
+                return
+            sink(await worker(item))
+            procesados += 1
+
+    tareas = [asyncio.ensure_future(producir())]
+    tareas += [asyncio.ensure_future(consumir()) for _ in range(num_workers)]
+    try:
+        await asyncio.gather(*tareas)
+    except BaseException:
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        raise
+    return procesados